@@ -15,9 +15,22 @@ display_search_mode_ui():
 display_search_value_ui(search_mode):
     Displays text box for user to enter query to search; retrieves user input.
 
+display_suggestions(search_mode, search_val):
+    Displays drop down of completions of user's title or author; returns
+    the chosen value.
+
 display_genre_dropdown():
     Displays drop down for genre selection; retrieves value; returns input.
 
+start_warm_up()
+    Starts loading the catalog and indexes, once per server process.
+
+read_text(file_name)
+    Reads a text file, once per server process.
+
+encode_image(file_name)
+    Base64-encodes an image file, once per server process.
+
 main()
     Displays UI; gathers user feedback; executes serach.
     
@@ -25,13 +38,14 @@ main()
 
 
 import base64
+import threading
 import streamlit as st
 
 # import streamlit.components.v1 as components
 try:
-    from search_wrapper import search_wrapper
+    from search_wrapper import search_wrapper, warm_up, complete
 except ImportError:
-    from bookworm.search_wrapper import search_wrapper
+    from bookworm.search_wrapper import search_wrapper, warm_up, complete
 
 
 # Set page configuration
@@ -43,6 +57,60 @@ st.set_page_config(
     )
 
 
+# Resources shared by all sessions and reruns of the script
+@st.cache_resource(show_spinner=False)
+def start_warm_up():
+    """
+    Starts loading the catalog and indexes, once per server process.
+
+    The data is loaded on a background thread (see
+    search_wrapper.warm_up), so the page renders meanwhile; a search made
+    before it finishes waits for the data being loaded.
+
+    Return value
+        The warm-up thread.
+    """
+    thread = threading.Thread(target=warm_up, name="bookworm-warm-up",
+                              daemon=True)
+    thread.start()
+    return thread
+
+
+@st.cache_resource(show_spinner=False)
+def read_text(file_name):
+    """
+    Reads a text file, once per server process.
+
+    Parameters:
+    file_name (str): The name of the file to read.
+
+    Raises:
+    FileNotFoundError: If the file cannot be found.
+    """
+    with open(file_name, encoding='utf-8') as f:
+        return f.read()
+
+
+@st.cache_resource(show_spinner=False)
+def encode_image(file_name):
+    """
+    Base64-encodes an image file, once per server process.
+
+    Parameters:
+    file_name (str): The name of the image file.
+
+    Return value
+        The encoded image, as a string.
+    """
+    with open(file_name, "rb") as file:
+        return base64.b64encode(file.read()).decode()
+
+
+# Warm up as the server process starts serving, not on the first search
+if st.runtime.exists():
+    start_warm_up()
+
+
 # Define CSS for styling
 def local_css(file_name):
     """
@@ -60,8 +128,8 @@ def local_css(file_name):
     FileNotFoundError: If the CSS file cannot be found.
     """
 
-    with open(file_name, encoding='utf-8') as f:
-        st.markdown(f'<style>{f.read()}</style>', unsafe_allow_html=True)
+    st.markdown(f'<style>{read_text(file_name)}</style>',
+                unsafe_allow_html=True)
 
 
 try:
@@ -151,8 +219,31 @@ def display_search_value_ui(search_mode):
     display_str = search_mode
     if display_str in ["Author1", "Author2"]:
         display_str = display_str[:-1]
-    return st.text_input(f"Input your favorite {display_str}",
-                         key="search_val")
+    search_val = st.text_input(f"Input your favorite {display_str}",
+                               key="search_val")
+    return display_suggestions(search_mode, search_val)
+
+
+def display_suggestions(search_mode, search_val):
+    """
+    Displays drop down of titles or authors completing the user's input;
+    returns the chosen value.
+
+    Nothing is shown if there are no completions or the input already is
+    one of them.
+
+        Return value
+            The chosen completion, or the user's input, as a string.
+    """
+    if not search_val:
+        return search_val
+    suggestions = complete(search_mode, search_val)
+    if not suggestions or search_val.casefold() in [
+            value.casefold() for value in suggestions]:
+        return search_val
+    return st.selectbox("Did you mean:", [search_val] + suggestions,
+                        key="suggestion",
+                        help="Pick a suggestion to search for it exactly.")
 
 
 def display_genre_dropdown():
@@ -190,10 +281,7 @@ def main():
     # Display header banner with stock image of books
     st.image("images/books_banner.png", use_column_width=True)
 
-    title_image = "images/butterfly.png"
-
-    with open(title_image, "rb") as file:
-        image_data = base64.b64encode(file.read()).decode()
+    image_data = encode_image("images/butterfly.png")
 
     st.markdown(
         f"""
@@ -233,7 +321,7 @@ def main():
                                              min_ave_rating, min_num_ratings)
                     col_to_show = ["book_title", "author", "Book-Rating",
                                    "RatingCount"]
-                    st.write(results[col_to_show])
+                    st.write(results.project(col_to_show))
                 except ValueError as e:
                     st.write(f"{str(e)}")
 
@@ -0,0 +1,173 @@
+"""
+Module with prefix indexes for completing title and author inputs.
+
+Title and author searches only learn that a query misses after a full
+keyword or fuzzy search, which then suggests "Did you mean...". A
+PrefixIndex completes what the user has typed so far instead, so most
+searches are made with a value that matches exactly.
+
+Values are normalized like the exact-match keys of title search (see
+search.HelperFunctions.normalize_key) and grouped, one entry per distinct
+key, weighted by the RatingCount of its books. The keys are kept in one
+sorted array: the keys starting with a prefix form a contiguous range,
+found with two binary searches, and its heaviest entries are picked by
+sorting the range on weight. Ranges long enough to make that sort the main
+cost (those of short prefixes) have their completions precomputed.
+
+CLASSES
+=======
+PrefixIndex(keys, labels, weights, num_results=MAX_RESULTS)
+    Sorted-array prefix index over normalized values, ranked by weight.
+
+FUNCTIONS
+=========
+group_values(values, weights)
+    Groups a column of values by normalized key, one entry per key.
+"""
+
+import numpy as np
+import pandas as pd
+try:
+    import search
+except ImportError:
+    # pylint: disable=consider-using-from-import
+    import bookworm.search as search
+
+# completions returned per prefix, at most
+MAX_RESULTS = 10
+
+# ranges of more keys than this have their completions precomputed
+PRECOMPUTE_RANGE = 2048
+
+# sorts after every character, so key + KEY_END bounds the keys
+# starting with key
+KEY_END = "\U0010ffff"
+
+
+def group_values(values, weights):
+    """
+    Groups a column of values by normalized key, one entry per key.
+
+    Values with the same key are one entry, weighted by the sum of their
+    weights and shown as the value with the highest weight.
+
+    Parameters:
+        values: A pandas series of strings, e.g. df["book_title"].
+            Missing values are skipped.
+        weights: A pandas series of weights, e.g. df["RatingCount"],
+            aligned with values. Missing weights count as 0.
+    Returns:
+        Numpy arrays of the sorted distinct keys, the value shown for each
+        key and the weight of each key.
+    """
+    entries = pd.DataFrame({
+        "key": search.HelperFunctions.normalize_key_column(
+            values.fillna("")).to_numpy(),
+        "label": values.to_numpy(),
+        "weight": pd.to_numeric(weights, errors="coerce").fillna(0)
+                    .to_numpy(dtype=np.float64)})
+    entries = entries[entries["key"] != ""]
+    # the heaviest row of each key comes first and gives its label
+    entries = entries.sort_values(["key", "weight"],
+                                  ascending=[True, False], kind="stable")
+    grouped = entries.groupby("key", sort=True)
+    return (grouped["key"].first().to_numpy(dtype=object),
+            grouped["label"].first().to_numpy(dtype=object),
+            grouped["weight"].sum().to_numpy())
+
+
+class PrefixIndex:
+    """
+    Sorted-array prefix index over normalized values, ranked by weight.
+
+    Built once from a column of the catalog (see build), then shared
+    read-only, so it is safe to use from several threads.
+    """
+
+    def __init__(self, keys, labels, weights, num_results=MAX_RESULTS):
+        """
+        Parameters:
+            keys: Sorted numpy array of distinct normalized keys.
+            labels: Numpy array of the value shown for each key.
+            weights: Numpy array of the weight of each key.
+            num_results: Int. The most completions complete returns.
+        """
+        self.keys = keys
+        self.labels = labels
+        self.weights = weights
+        self.num_results = num_results
+        self._precomputed = {}
+        # the keys are sorted, so the keys sharing a prefix are a run; a
+        # run of a prefix holds the runs of its extensions, so only the
+        # keys in long runs need checking at the next length
+        positions = np.arange(len(keys))
+        length = 1
+        while len(positions) > PRECOMPUTE_RANGE:
+            prefixes = pd.Series(keys[positions], dtype=object).str[:length]
+            starts = np.flatnonzero((prefixes != prefixes.shift()).to_numpy())
+            stops = np.append(starts[1:], len(positions))
+            long_runs = stops - starts > PRECOMPUTE_RANGE
+            for start, stop in zip(starts[long_runs], stops[long_runs]):
+                self._precomputed[prefixes.iloc[start]] = self._top(
+                    positions[start], positions[stop - 1] + 1, num_results)
+            positions = np.concatenate(
+                [positions[start:stop] for start, stop
+                 in zip(starts[long_runs], stops[long_runs])] +
+                [positions[:0]])
+            length += 1
+
+    def __len__(self):
+        return len(self.keys)
+
+    @classmethod
+    def build(cls, values, weights, num_results=MAX_RESULTS):
+        """
+        Builds an index over a column of values, grouped as in
+        group_values.
+
+        Parameters:
+            values: A pandas series of strings, e.g. df["book_title"].
+            weights: A pandas series of weights, e.g. df["RatingCount"],
+                aligned with values.
+            num_results: Int. The most completions complete returns.
+        Returns:
+            A PrefixIndex.
+        """
+        return cls(*group_values(values, weights), num_results)
+
+    def complete(self, prefix, num_results=None):
+        """
+        Returns the values whose key starts with the prefix's key.
+
+        Parameters:
+            prefix: A string, e.g. what the user has typed so far.
+            num_results: Int. The most completions returned. Defaults to,
+                and is capped at, the index's num_results.
+        Returns:
+            A list of values, highest weight first (ties in key order).
+            Empty if the prefix has no key.
+        """
+        if num_results is None or num_results > self.num_results:
+            num_results = self.num_results
+        key = search.HelperFunctions.normalize_key(prefix)
+        if not key or num_results <= 0:
+            return []
+        top = self._precomputed.get(key)
+        if top is None:
+            top = self._top(*self._range(key), num_results)
+        return self.labels[top[:num_results]].tolist()
+
+    def _range(self, key):
+        """
+        Returns the start and stop of the keys starting with key.
+        """
+        return (int(np.searchsorted(self.keys, key, side="left")),
+                int(np.searchsorted(self.keys, key + KEY_END, side="left")))
+
+    def _top(self, start, stop, num_results):
+        """
+        Returns the positions of the heaviest keys in start:stop, ties in
+        key order.
+        """
+        order = np.argsort(-self.weights[start:stop], kind="stable")
+        return start + order[:num_results]
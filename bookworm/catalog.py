@@ -0,0 +1,398 @@
+"""
+Module to build and load the binary catalog store.
+
+The book catalog with embeddings is kept in the repo as four csv parts that
+must be parsed and reassembled on every search. This module converts that
+catalog, once, into a columnar binary store that loads in milliseconds:
+
+    data/catalog/books.parquet   - all scalar columns (title, author, ...)
+    data/catalog/embeddings.npy  - float32 matrix, one row per book
+    data/catalog/embeddings_normalized.npy
+                                 - the same matrix with unit length rows,
+                                   memory-mapped by plot search
+
+Row i of embeddings.npy belongs to row i of books.parquet, which keeps the
+row ids used by the pre-processed semantic neighbors (indices_updated.npy)
+unchanged.
+
+The module also provides the Catalog class, which loads each dataset the
+search modes use (ratings, embeddings and genre) once per process and hands
+out views of them that share its memory.
+
+FUNCTIONS
+=========
+parse_embeddings(embeddings_series)
+    Converts a column of stringified embeddings into a float32 matrix.
+
+normalize_rows(matrix)
+    Scales each row of a matrix to unit length.
+
+build_catalog_store(df, store_dir=STORE_DIR)
+    Writes the catalog dataframe to the binary store.
+
+append_to_catalog_store(new_df, store_dir=STORE_DIR)
+    Appends new books to the end of the binary store.
+
+load_catalog_store(store_dir=STORE_DIR)
+    Loads the binary store back into a dataframe.
+
+load_normalized_embeddings(store_dir=STORE_DIR)
+    Memory-maps the normalized embeddings matrix.
+
+CLASSES
+=======
+Catalog(ratings_loader, embeddings_loader, genre_loader,
+        matrix_loader=None, index_loader=None)
+    Loads each dataset once per process and hands out views.
+"""
+
+import os
+import ast
+import threading
+import numpy as np
+import pandas as pd
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+STORE_DIR = os.path.join(DATA_DIR, "catalog")
+BOOKS_FILE = "books.parquet"
+EMBEDDINGS_FILE = "embeddings.npy"
+NORMALIZED_FILE = "embeddings_normalized.npy"
+
+
+def parse_embeddings(embeddings_series):
+    """
+    Converts a column of stringified embeddings into a float32 matrix.
+
+    Parameters:
+        embeddings_series: A pandas Series. Each value is a list of floats,
+            the string representation of one, or missing.
+    Returns:
+        A float32 numpy array with one row per value. Rows for missing
+        embeddings are filled with zeros.
+    """
+    vectors = [ast.literal_eval(emb) if isinstance(emb, str) else emb
+               for emb in embeddings_series]
+    dim = next((len(vec) for vec in vectors
+                if isinstance(vec, (list, tuple, np.ndarray))), 0)
+    matrix = np.zeros((len(vectors), dim), dtype=np.float32)
+    for row, vec in enumerate(vectors):
+        if isinstance(vec, (list, tuple, np.ndarray)):
+            matrix[row] = vec
+    return matrix
+
+
+def normalize_rows(matrix):
+    """
+    Scales each row of a matrix to unit length.
+
+    With unit length rows the cosine similarity between two books is a
+    plain dot product.
+
+    Parameters:
+        matrix: A 2d numpy array.
+    Returns:
+        A float32 numpy array. Rows of all zeros are left as zeros.
+    """
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return matrix / norms
+
+
+def build_catalog_store(df, store_dir=STORE_DIR):
+    """
+    Writes the catalog dataframe to the binary store.
+
+    Parameters:
+        df: A pandas dataframe, each row representing a book. Must
+            contain an "embeddings" column.
+        store_dir: The directory to write the store to. Created if
+            it does not exist.
+    Returns:
+        The float32 embeddings matrix that was written.
+    """
+    if "embeddings" not in df.columns:
+        raise ValueError("Your data must have an embeddings column")
+
+    os.makedirs(store_dir, exist_ok=True)
+    matrix = parse_embeddings(df["embeddings"])
+    books = df.drop(columns=["embeddings"]).reset_index(drop=True)
+    books.to_parquet(os.path.join(store_dir, BOOKS_FILE), index=False)
+    np.save(os.path.join(store_dir, EMBEDDINGS_FILE), matrix)
+    np.save(os.path.join(store_dir, NORMALIZED_FILE), normalize_rows(matrix))
+    return matrix
+
+
+def append_to_catalog_store(new_df, store_dir=STORE_DIR):
+    """
+    Appends new books to the end of the binary store.
+
+    Existing books keep their row ids, so the semantic neighbors graph can
+    be extended (see knn_graph.update_knn_graph) rather than rebuilt.
+
+    Parameters:
+        new_df: A pandas dataframe of new books with the same columns as
+            the store, including "embeddings".
+        store_dir: The directory the store was written to.
+    Returns:
+        A tuple (old, new) of the float32 embeddings matrices of the books
+        already in the store and of the appended books.
+    """
+    if "embeddings" not in new_df.columns:
+        raise ValueError("Your data must have an embeddings column")
+
+    books = pd.read_parquet(os.path.join(store_dir, BOOKS_FILE))
+    old = np.load(os.path.join(store_dir, EMBEDDINGS_FILE))
+    new = parse_embeddings(new_df["embeddings"])
+    if old.shape[0] and new.shape[1] != old.shape[1]:
+        raise ValueError(f"New embeddings have {new.shape[1]} dimensions, "
+                         f"the store has {old.shape[1]}")
+
+    new_books = new_df.drop(columns=["embeddings"])
+    books = pd.concat([books, new_books], ignore_index=True)
+    books.to_parquet(os.path.join(store_dir, BOOKS_FILE), index=False)
+    matrix = np.vstack([old, new])
+    np.save(os.path.join(store_dir, EMBEDDINGS_FILE), matrix)
+    np.save(os.path.join(store_dir, NORMALIZED_FILE), normalize_rows(matrix))
+    return old, new
+
+
+def load_catalog_store(store_dir=STORE_DIR):
+    """
+    Loads the binary store back into a dataframe.
+
+    Parameters:
+        store_dir: The directory the store was written to.
+    Returns:
+        A dataframe with the scalar columns of the catalog and an
+        "embeddings" column holding one float32 array per book.
+    Exceptions:
+        FileNotFoundError if the store has not been built.
+    """
+    books = pd.read_parquet(os.path.join(store_dir, BOOKS_FILE))
+    matrix = np.load(os.path.join(store_dir, EMBEDDINGS_FILE))
+    if matrix.shape[0] != books.shape[0]:
+        raise ValueError("Catalog store is corrupt: "
+                         f"{books.shape[0]} books but "
+                         f"{matrix.shape[0]} embeddings")
+    books["embeddings"] = list(matrix)
+    return books
+
+
+def load_normalized_embeddings(store_dir=STORE_DIR):
+    """
+    Memory-maps the normalized embeddings matrix.
+
+    Parameters:
+        store_dir: The directory the store was written to.
+    Returns:
+        A read-only float32 numpy memmap with one unit length row per book.
+    Exceptions:
+        FileNotFoundError if the store has not been built.
+    """
+    return np.load(os.path.join(store_dir, NORMALIZED_FILE), mmap_mode="r")
+
+
+class Catalog:
+    """
+    Loads each dataset once per process and hands out views.
+
+    Datasets are loaded on first request with the loader supplied for
+    them, then kept in memory. When a dataset is loaded its book ids are
+    checked against the datasets already in memory: every book with
+    embeddings and every genre row must refer to a book in the ratings
+    data.
+
+    The frames handed out are shallow copies: they share the arrays of
+    the cached data, so no data is copied per request, while columns
+    added or replaced by the search functions (e.g. "ratio") never reach
+    the cached data. Values must not be set in place; the search
+    functions read the search text precomputed by
+    search.HelperFunctions.add_search_text instead of filling missing
+    values of their input. The normalized embeddings matrix is handed out as a
+    read-only array, and pre-fitted keyword indexes are shared as is.
+    """
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, ratings_loader, embeddings_loader, genre_loader,
+                 matrix_loader=None, index_loader=None):
+        """
+        Parameters:
+            ratings_loader: Callable returning the ratings dataframe.
+            embeddings_loader: Callable returning the embeddings dataframe.
+            genre_loader: Callable returning the genre dataframe.
+            matrix_loader: Callable returning the normalized embeddings
+                matrix. If None, or if it raises FileNotFoundError, the
+                matrix is computed from the embeddings dataframe.
+            index_loader: Callable taking a list of column names and
+                returning the pre-fitted keyword index over those columns
+                of the embeddings dataframe.
+        """
+        self._loaders = {"ratings": ratings_loader,
+                         "embeddings": embeddings_loader,
+                         "genre": genre_loader}
+        self._matrix_loader = matrix_loader
+        self._index_loader = index_loader
+        self._frames = {}
+        self._derived = {}
+        self._lock = threading.RLock()
+        # bumped by clear, so caches of search results can tell the data
+        # they were computed from is gone
+        self.version = 0
+
+    def _get(self, name):
+        """
+        Returns a view of the named dataset, loading it if needed.
+        """
+        frame = self._frames.get(name)
+        if frame is None:
+            with self._lock:
+                frame = self._frames.get(name)
+                if frame is None:
+                    frame = self._loaders[name]()
+                    self._check_alignment(name, frame)
+                    self._frames[name] = frame
+        return frame.copy(deep=False)
+
+    def _check_alignment(self, name, frame):
+        """
+        Checks the book ids of a new dataset against the loaded datasets.
+
+        Exceptions:
+            ValueError if a book id is missing from the ratings data.
+        """
+        frames = dict(self._frames, **{name: frame})
+        if "ratings" not in frames:
+            return
+        if name == "ratings":
+            to_check = [other for other in frames if other != "ratings"]
+        else:
+            to_check = [name]
+        known_ids = pd.Index(frames["ratings"]["book_id"])
+        for other in to_check:
+            missing = ~pd.Index(frames[other]["book_id"]).isin(known_ids)
+            if missing.any():
+                raise ValueError(f"Catalog is inconsistent: {missing.sum()} "
+                                 f"{other} rows have no matching book in "
+                                 "the ratings data")
+
+    def ratings(self):
+        """
+        Returns a view of the ratings dataframe.
+        """
+        return self._get("ratings")
+
+    def embeddings(self):
+        """
+        Returns a view of the embeddings dataframe.
+        """
+        return self._get("embeddings")
+
+    def genre(self):
+        """
+        Returns a view of the genre dataframe.
+        """
+        return self._get("genre")
+
+    def embedding_matrix(self):
+        """
+        Returns the read-only normalized embeddings matrix.
+
+        Row i of the matrix belongs to row i of the embeddings dataframe.
+
+        Exceptions:
+            ValueError if the matrix and the embeddings data differ in
+            number of rows.
+        """
+        return self.derived("embedding_matrix", self._load_matrix)
+
+    def _load_matrix(self):
+        """
+        Loads the normalized embeddings matrix and checks its shape.
+        """
+        matrix = None
+        if self._matrix_loader is not None:
+            try:
+                matrix = self._matrix_loader()
+            except FileNotFoundError:
+                matrix = None
+        if matrix is None:
+            embeddings = self.embeddings()["embeddings"]
+            matrix = normalize_rows(parse_embeddings(embeddings))
+            matrix.flags.writeable = False
+        elif "embeddings" in self._frames and \
+                matrix.shape[0] != self._frames["embeddings"].shape[0]:
+            raise ValueError("Catalog is inconsistent: "
+                             f"{matrix.shape[0]} embedding rows but "
+                             f"{self._frames['embeddings'].shape[0]} "
+                             "books with embeddings")
+        return matrix
+
+    def keyword_index(self, columns):
+        """
+        Returns the pre-fitted keyword index over the given columns.
+
+        Parameters:
+            columns: A list of column names, e.g. ["book_title"].
+        Returns:
+            The index, or None if there is no index_loader or the index
+            has not been built (the caller then fits one per query).
+        Exceptions:
+            ValueError if the index and the embeddings data differ in
+            number of rows.
+        """
+        return self.derived(("keyword_index", tuple(columns)),
+                            lambda: self._load_index(columns))
+
+    def _load_index(self, columns):
+        """
+        Loads a keyword index and checks it against the embeddings data.
+        """
+        if self._index_loader is None:
+            return None
+        try:
+            index = self._index_loader(list(columns))
+        except FileNotFoundError:
+            return None
+        num_books = self.embeddings().shape[0]
+        if len(index) != num_books:
+            raise ValueError(f"Catalog is inconsistent: keyword index over "
+                             f"{columns} has {len(index)} rows but there "
+                             f"are {num_books} books with embeddings")
+        return index
+
+    def derived(self, key, builder):
+        """
+        Returns a structure derived from the catalog, building it once.
+
+        Used for lookup structures computed from the loaded data (e.g. the
+        exact-match dictionaries), which are then shared like the data.
+
+        Parameters:
+            key: A hashable name for the structure.
+            builder: Callable with no arguments that builds the structure.
+        Returns:
+            The structure returned by the first call of builder for key.
+        """
+        if key not in self._derived:
+            with self._lock:
+                if key not in self._derived:
+                    self._derived[key] = builder()
+        return self._derived[key]
+
+    def is_loaded(self, name):
+        """
+        Returns True if the named dataset is already in memory.
+        """
+        return name in self._frames
+
+    def clear(self):
+        """
+        Drops all loaded datasets; they are reloaded on next request.
+
+        Also increments version.
+        """
+        with self._lock:
+            self._frames = {}
+            self._derived = {}
+            self.version += 1
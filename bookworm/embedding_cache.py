@@ -0,0 +1,258 @@
+"""
+Module with a cache for the query embeddings used by plot search.
+
+plot_semantic_search embeds every query with a remote voyageai call, which
+is most of its latency, and the same queries come up again and again. An
+EmbeddingCache sits in front of the client and keeps embeddings in two
+tiers:
+
+    memory - a least-recently-used dictionary of up to max_entries vectors
+    disk   - an optional sqlite file that survives restarts, trimmed to
+             the max_disk_entries most recently used vectors
+
+Entries are keyed by the model name and the normalized query text (see
+normalize_query), so queries differing only in case or spacing share one
+embedding. The client is still sent the query as typed. Vectors are
+stored as float32.
+
+CLASSES
+=======
+EmbeddingCache(client, model=MODEL, input_type=INPUT_TYPE,
+               max_entries=MAX_ENTRIES, db_path=None,
+               max_disk_entries=MAX_DISK_ENTRIES, batch_size=BATCH_SIZE)
+    Two-tier cache of query embeddings in front of an embedding client.
+
+FUNCTIONS
+=========
+normalize_query(query)
+    Folds case and whitespace of a query for use as a cache key.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+DB_PATH = os.path.join(DATA_DIR, "query_embeddings.sqlite")
+MODEL = "voyage-lite-02-instruct"
+INPUT_TYPE = "document"
+MAX_ENTRIES = 1024
+MAX_DISK_ENTRIES = 100000
+BATCH_SIZE = 24
+
+
+def normalize_query(query):
+    """
+    Folds case and whitespace of a query for use as a cache key.
+
+    Parameters:
+        query: A string.
+    Returns:
+        The query lowercased, with runs of whitespace replaced by a
+        single space and no leading or trailing whitespace.
+    """
+    return " ".join(str(query).lower().split())
+
+
+class EmbeddingCache:  # pylint: disable=too-many-instance-attributes
+    """
+    Two-tier cache of query embeddings in front of an embedding client.
+
+    The client is only called on a miss in both tiers, with the query as
+    given, and the result is stored in both under the normalized query.
+    Counters of memory hits, disk hits and misses are kept in the stats
+    dictionary. Safe to share between threads.
+    """
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, client, model=MODEL, input_type=INPUT_TYPE,
+                 max_entries=MAX_ENTRIES, db_path=None,
+                 max_disk_entries=MAX_DISK_ENTRIES, batch_size=BATCH_SIZE):
+        """
+        Parameters:
+            client: An object with the voyageai Client embed method.
+            model: The embedding model name, part of every key.
+            input_type: Passed to the client's embed method.
+            max_entries: Int. Vectors kept in memory.
+            db_path: Path of the sqlite file. If None, nothing is kept on
+                disk. The file and its directory are created if needed.
+            max_disk_entries: Int. Vectors kept in the sqlite file.
+            batch_size: Int. Most queries sent in one client call, as
+                in scripts/Embeddings.py.
+        """
+        self.client = client
+        self.model = model
+        self.input_type = input_type
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.batch_size = batch_size
+        self.stats = {"hits": 0, "disk_hits": 0, "misses": 0}
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if db_path is not None:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)),
+                        exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            with self._db:
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS embeddings ("
+                    "model TEXT, query TEXT, vector BLOB, last_used REAL, "
+                    "PRIMARY KEY (model, query))")
+
+    def __len__(self):
+        return len(self._memory)
+
+    def embed(self, query):
+        """
+        Returns the embedding of a query, calling the client on a miss.
+
+        Parameters:
+            query: A string.
+        Returns:
+            A read-only 1d float32 numpy array.
+        """
+        key = normalize_query(query)
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                self.stats["hits"] += 1
+                return vector
+            vector = self._read_disk(key)
+            if vector is not None:
+                self.stats["disk_hits"] += 1
+                self._remember(key, vector)
+                return vector
+
+        # the remote call is made outside the lock
+        result = self.client.embed([query], model=self.model,
+                                   input_type=self.input_type)
+        vector = np.asarray(result.embeddings[0], dtype=np.float32)
+        vector.flags.writeable = False
+        with self._lock:
+            self.stats["misses"] += 1
+            self._remember(key, vector)
+            self._write_disk(key, vector)
+        return vector
+
+    def embed_many(self, queries):
+        """
+        Returns the embeddings of several queries, with few client calls.
+
+        Queries missing from both tiers are sent to the client in chunks
+        of batch_size, once per distinct normalized query (as first
+        given). Each chunk is cached as it arrives, so if a call fails the
+        chunks before it are kept.
+
+        Parameters:
+            queries: A list of strings.
+        Returns:
+            A 2d float32 numpy array with one row per query, in order.
+        Exceptions:
+            Whatever the client raises for a failed chunk.
+        """
+        keys = [normalize_query(query) for query in queries]
+        found = {}
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    self.stats["hits"] += 1
+                else:
+                    vector = self._read_disk(key)
+                    if vector is None:
+                        continue
+                    self.stats["disk_hits"] += 1
+                    self._remember(key, vector)
+                found[key] = vector
+        # the first query given for each missing key is the one embedded
+        missing = {}
+        for key, query in zip(keys, queries):
+            if key not in found:
+                missing.setdefault(key, query)
+        missing = list(missing.items())
+
+        for start in range(0, len(missing), self.batch_size):
+            chunk = missing[start:start + self.batch_size]
+            # the remote call is made outside the lock
+            result = self.client.embed([query for _, query in chunk],
+                                       model=self.model,
+                                       input_type=self.input_type)
+            vectors = np.asarray(result.embeddings, dtype=np.float32)
+            vectors.flags.writeable = False
+            with self._lock:
+                for (key, _), vector in zip(chunk, vectors):
+                    self.stats["misses"] += 1
+                    self._remember(key, vector)
+                    self._write_disk(key, vector)
+                    found[key] = vector
+        return np.array([found[key] for key in keys], dtype=np.float32)
+
+    def clear(self):
+        """
+        Drops the in-memory tier and resets the counters. The sqlite file
+        is kept.
+        """
+        with self._lock:
+            self._memory.clear()
+            self.stats = {"hits": 0, "disk_hits": 0, "misses": 0}
+
+    def close(self):
+        """
+        Closes the sqlite file, if any. Later lookups use memory only.
+        """
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _remember(self, key, vector):
+        """
+        Adds a vector to the memory tier, evicting the least recently used.
+        """
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _read_disk(self, key):
+        """
+        Returns the stored vector for key, or None, and marks it used.
+        """
+        if self._db is None:
+            return None
+        row = self._db.execute(
+            "SELECT vector FROM embeddings WHERE model = ? AND query = ?",
+            (self.model, key)).fetchone()
+        if row is None:
+            return None
+        with self._db:
+            self._db.execute(
+                "UPDATE embeddings SET last_used = ? "
+                "WHERE model = ? AND query = ?",
+                (time.time(), self.model, key))
+        return np.frombuffer(row[0], dtype=np.float32)
+
+    def _write_disk(self, key, vector):
+        """
+        Stores a vector on disk, trimming the least recently used entries.
+        """
+        if self._db is None:
+            return
+        with self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?)",
+                (self.model, key, vector.tobytes(), time.time()))
+            count = self._db.execute(
+                "SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            if count > self.max_disk_entries:
+                self._db.execute(
+                    "DELETE FROM embeddings WHERE rowid IN ("
+                    "SELECT rowid FROM embeddings "
+                    "ORDER BY last_used LIMIT ?)",
+                    (count - self.max_disk_entries,))
@@ -0,0 +1,156 @@
+"""
+Module to add new books to every dataset the search modes use.
+
+Each search mode reads its own copy of the catalog: author search the
+ratings data (complete_w_ratings.csv), genre search the genre data
+(genre.csv), plot search the binary catalog store and the semantic
+neighbors graph, and title and author search the pre-fitted keyword
+indexes. Catalog refuses to serve data whose book ids do not line up, so
+add_books appends the new books to all of them in one run.
+
+Rows of genre.csv carry a standardized "generic_genre" besides the raw
+genre. New books take the generic genre the genre data already maps their
+raw genre to, or "Other" for genres it has not seen.
+
+FUNCTIONS
+=========
+genre_rows(new_books, genres)
+    Builds the genre data rows of new books.
+
+build_keyword_indexes(df, index_dir=INDEX_DIR)
+    Fits and saves the keyword indexes over the embeddings data.
+
+add_books(new_books, ratings_path=RATINGS_PATH, genre_path=GENRE_PATH,
+          store_dir=STORE_DIR, graph_dir=GRAPH_DIR, index_dir=INDEX_DIR)
+    Appends new books to the ratings, genre, plot and keyword search data.
+"""
+
+import os
+import json
+import numpy as np
+import pandas as pd
+try:
+    import catalog
+    import knn_graph
+    import keyword_index
+    import search
+except ImportError:
+    from bookworm import catalog
+    from bookworm import knn_graph
+    from bookworm import keyword_index
+    from bookworm import search
+
+RATINGS_PATH = os.path.join(catalog.DATA_DIR, "complete_w_ratings.csv")
+GENRE_PATH = os.path.join(catalog.DATA_DIR, "genre.csv")
+STORE_DIR = catalog.STORE_DIR
+GRAPH_DIR = knn_graph.DATA_DIR
+INDEX_DIR = keyword_index.INDEX_DIR
+KEYWORD_COLUMNS = [["book_title"], ["author"]]
+OTHER_GENRE = "Other"
+
+
+def genre_rows(new_books, genres):
+    """
+    Builds the genre data rows of new books.
+
+    A book gets one row per raw genre in its "genre" dictionary; books
+    without genres get none, as in genre.csv.
+
+    Parameters:
+        new_books: A pandas dataframe of new books with the columns of
+            complete_w_ratings.csv.
+        genres: The existing genre data.
+    Returns:
+        A dataframe with the columns of genres.
+    """
+    generic = genres.drop_duplicates("genre").set_index("genre")[
+        "generic_genre"]
+    rows = []
+    for _, book in new_books.iterrows():
+        if pd.isna(book["genre"]):
+            continue
+        for genre in json.loads(book["genre"]).values():
+            row = book.to_dict()
+            row["genre"] = genre
+            row["generic_genre"] = generic.get(genre, OTHER_GENRE)
+            rows.append(row)
+    return pd.DataFrame(rows).reindex(columns=genres.columns)
+
+
+def build_keyword_indexes(df, index_dir=INDEX_DIR):
+    """
+    Fits and saves the keyword indexes over the embeddings data.
+
+    One index is fitted per column set searched by select_search
+    (KEYWORD_COLUMNS), over the same text query_to_index builds.
+
+    Parameters:
+        df: The embeddings data, e.g. from catalog.load_catalog_store.
+        index_dir: The directory to write the indexes to.
+    Returns:
+        A dict of the fitted KeywordIndex by index name.
+    """
+    df = search.HelperFunctions.add_search_text(df)
+    indexes = {}
+    for columns in KEYWORD_COLUMNS:
+        texts = search.HelperFunctions.combine_columns(df, columns)
+        name = keyword_index.index_name(columns)
+        indexes[name] = keyword_index.KeywordIndex.fit(texts)
+        indexes[name].save(name, index_dir)
+    return indexes
+
+
+# pylint: disable=too-many-arguments
+def add_books(new_books, ratings_path=RATINGS_PATH, genre_path=GENRE_PATH,
+              store_dir=STORE_DIR, graph_dir=GRAPH_DIR, index_dir=INDEX_DIR):
+    """
+    Appends new books to the ratings, genre, plot and keyword search data.
+
+    The ratings and genre csv files get the new rows, the catalog store
+    the new books and embeddings, and the semantic neighbors graph is
+    extended with knn_graph.update_knn_graph. The keyword indexes are
+    refitted, as their vocabulary and idf weights depend on every book.
+
+    Parameters:
+        new_books: A pandas dataframe of new books with the columns of
+            complete_w_ratings.csv and an "embeddings" column.
+        ratings_path: The ratings data csv.
+        genre_path: The genre data csv.
+        store_dir: The directory of the catalog store.
+        graph_dir: The directory of the semantic neighbors graph.
+        index_dir: The directory of the keyword indexes.
+    Returns:
+        The number of books in the catalog after adding.
+    Exceptions:
+        ValueError if new_books has no embeddings column, a book with a
+        missing or all-zero embedding, or a book_id already in the
+        ratings data. Nothing is written then.
+    """
+    if "embeddings" not in new_books.columns:
+        raise ValueError("Your data must have an embeddings column")
+    # parse_embeddings fills missing embeddings with zeros; a zero vector
+    # would be stored as the book's plot and be nobody's neighbor
+    empty = ~catalog.parse_embeddings(new_books["embeddings"]).any(axis=1)
+    if empty.any():
+        raise ValueError("New books must have embeddings: "
+                         f"{new_books['book_id'][empty].tolist()}")
+    ratings = pd.read_csv(ratings_path)
+    known = new_books["book_id"].isin(ratings["book_id"])
+    if known.any() or new_books["book_id"].duplicated().any():
+        raise ValueError("New books must have new, distinct book ids: "
+                         f"{new_books['book_id'][known].tolist()}")
+    genres = pd.read_csv(genre_path)
+
+    old, new = catalog.append_to_catalog_store(new_books, store_dir)
+    distances = np.load(os.path.join(graph_dir, knn_graph.DISTANCES_FILE))
+    indices = np.load(os.path.join(graph_dir, knn_graph.INDICES_FILE))
+    distances, indices = knn_graph.update_knn_graph(old, distances,
+                                                    indices, new)
+    knn_graph.save_knn_graph(distances, indices, graph_dir)
+
+    pd.concat([ratings, new_books.reindex(columns=ratings.columns)],
+              ignore_index=True).to_csv(ratings_path, index=False)
+    pd.concat([genres, genre_rows(new_books, genres)],
+              ignore_index=True).to_csv(genre_path, index=False)
+    build_keyword_indexes(catalog.load_catalog_store(store_dir), index_dir)
+    return distances.shape[0]
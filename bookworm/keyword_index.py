@@ -0,0 +1,154 @@
+"""
+Module with pre-fitted keyword (TF-IDF) indexes for title and author search.
+
+query_to_index used to refit a TfidfVectorizer over the whole catalog, and
+transform the whole catalog twice, on every query. A KeywordIndex is fitted
+once, offline (see scripts/build_keyword_indexes.py), and saved to disk as:
+
+    data/keyword_index/<name>_vocab.npz - vocabulary terms and idf weights
+    data/keyword_index/<name>_docs.npz  - L2-normalized sparse document matrix
+
+A query then only costs transform([query]) plus one sparse dot product.
+
+CLASSES
+=======
+KeywordIndex(vectorizer, doc_matrix)
+    Pre-fitted TF-IDF index over the combined text of a set of columns.
+
+FUNCTIONS
+=========
+index_name(columns)
+    Returns the file name used for the index over the given columns.
+"""
+
+import os
+import numpy as np
+from scipy import sparse
+
+INDEX_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                         "data", "keyword_index")
+STOP_WORDS = "english"
+
+
+def index_name(columns):
+    """
+    Returns the file name used for the index over the given columns.
+
+    Parameters:
+        columns: A list of column names, e.g. ["book_title"].
+    Returns:
+        A string, the column names joined by "+".
+    """
+    return "+".join(columns)
+
+
+def _tfidf_vectorizer(**kwargs):
+    """
+    Returns a TfidfVectorizer with the index's stop words.
+
+    sklearn is slow to import, so it is imported here, when an index is
+    first fitted or loaded, rather than with this module.
+    """
+    # pylint: disable=import-outside-toplevel
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    return TfidfVectorizer(stop_words=STOP_WORDS, **kwargs)
+
+
+class KeywordIndex:
+    """
+    Pre-fitted TF-IDF index over the combined text of a set of columns.
+
+    Row i of the document matrix belongs to row i of the data the index
+    was fitted on.
+    """
+
+    def __init__(self, vectorizer, doc_matrix):
+        """
+        Parameters:
+            vectorizer: A fitted TfidfVectorizer.
+            doc_matrix: Sparse matrix of the L2-normalized TF-IDF vectors
+                of the documents, one row per book.
+        """
+        self.vectorizer = vectorizer
+        self.doc_matrix = sparse.csr_matrix(doc_matrix)
+
+    def __len__(self):
+        return self.doc_matrix.shape[0]
+
+    @classmethod
+    def fit(cls, texts):
+        """
+        Fits an index over the given documents.
+
+        Parameters:
+            texts: An iterable of strings, one per book.
+        Returns:
+            A KeywordIndex.
+        """
+        vectorizer = _tfidf_vectorizer()
+        doc_matrix = vectorizer.fit_transform(texts)
+        return cls(vectorizer, doc_matrix)
+
+    def scores(self, query):
+        """
+        Scores every document against the query.
+
+        Parameters:
+            query: A string.
+        Returns:
+            A 1d numpy array with the cosine similarity of the query to
+            each document.
+        """
+        query_vec = self.vectorizer.transform([query])
+        return (self.doc_matrix @ query_vec.T).toarray().ravel()
+
+    def scores_many(self, queries):
+        """
+        Scores every document against each of several queries.
+
+        Parameters:
+            queries: A list of strings.
+        Returns:
+            A sparse matrix with one row per query and one column per
+            document, holding cosine similarities.
+        """
+        query_matrix = self.vectorizer.transform(queries)
+        return query_matrix @ self.doc_matrix.T
+
+    def save(self, name, index_dir=INDEX_DIR):
+        """
+        Writes the index to disk.
+
+        Parameters:
+            name: The file name of the index (see index_name).
+            index_dir: The directory to write to. Created if needed.
+        """
+        os.makedirs(index_dir, exist_ok=True)
+        terms = self.vectorizer.get_feature_names_out()
+        np.savez(os.path.join(index_dir, f"{name}_vocab.npz"),
+                 terms=terms.astype(str), idf=self.vectorizer.idf_)
+        sparse.save_npz(os.path.join(index_dir, f"{name}_docs.npz"),
+                        self.doc_matrix)
+
+    @classmethod
+    def load(cls, name, index_dir=INDEX_DIR):
+        """
+        Reads an index written by save.
+
+        Parameters:
+            name: The file name of the index (see index_name).
+            index_dir: The directory the index was written to.
+        Returns:
+            A KeywordIndex.
+        Exceptions:
+            FileNotFoundError if the index has not been built.
+        """
+        with np.load(os.path.join(index_dir, f"{name}_vocab.npz")) as vocab:
+            terms = vocab["terms"]
+            idf = vocab["idf"]
+        vectorizer = _tfidf_vectorizer(
+            vocabulary={term: i for i, term in enumerate(terms)})
+        vectorizer.idf_ = idf
+        doc_matrix = sparse.load_npz(os.path.join(index_dir,
+                                                  f"{name}_docs.npz"))
+        return cls(vectorizer, doc_matrix)
@@ -0,0 +1,370 @@
+"""
+Module to build the semantic nearest-neighbors graph in row blocks.
+
+The graph stores, for each book, its closest books by cosine distance
+between summary embeddings (data/indices_updated.npy) and the distances
+themselves (data/distances_updated.npy). It used to be built by fitting
+sklearn's NearestNeighbors and querying every row at once, which needs
+memory for the full distance matrix and runs on one core.
+
+Here the normalized embeddings are processed one block of rows at a time:
+a matrix multiply gives the block's cosine distances to every book, and
+argpartition picks the closest n_neighbors. Blocks are spread over a
+process pool whose workers memory-map the matrix from disk, so peak memory
+is roughly one block of distances per worker.
+
+When books are added, update_knn_graph extends an existing graph instead of
+rebuilding it: only the new rows are compared against the catalog, and an
+existing book's neighbor list is patched only where a new book is closer
+than its current furthest neighbor. The cost grows with the number of new
+books times the catalog size, not with the catalog size squared.
+
+At search time, NeighborLookup serves neighbor lists deeper than the saved
+graph by ranking the catalog against the seed book on demand, keeping that
+ranking for recently used seeds.
+
+The saved arrays have the same layout, dtypes (float64 distances, int64
+indices) and ordering (closest first, the book itself included) as the
+NearestNeighbors output they replace.
+
+FUNCTIONS
+=========
+knn_block(matrix, start, stop, n_neighbors=N_NEIGHBORS)
+    Finds the nearest neighbors of rows start:stop of a normalized matrix.
+
+build_knn_graph(embeddings, n_neighbors=N_NEIGHBORS, block_size=BLOCK_SIZE,
+                n_jobs=None)
+    Builds the nearest-neighbors graph of a set of embeddings.
+
+update_knn_graph(embeddings, distances, indices, new_embeddings,
+                 block_size=BLOCK_SIZE)
+    Extends a graph with books appended after the existing ones.
+
+save_knn_graph(distances, indices, data_dir=DATA_DIR)
+    Writes the graph to distances_updated.npy and indices_updated.npy.
+
+CLASSES
+=======
+NeighborLookup(indices, embeddings_loader=None, max_seeds=MAX_SEEDS)
+    Serves neighbor lists of any depth from the graph or the embeddings.
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+DISTANCES_FILE = "distances_updated.npy"
+INDICES_FILE = "indices_updated.npy"
+N_NEIGHBORS = 21
+BLOCK_SIZE = 512
+MAX_SEEDS = 64
+
+# matrix memory-mapped by each pool worker (see _init_worker)
+_WORKER_STATE = {}
+
+
+def _normalize(embeddings):
+    """
+    Scales rows to unit length in float64; zero rows are left as zeros.
+    """
+    matrix = np.asarray(embeddings, dtype=np.float64)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return matrix / norms
+
+
+def knn_block(matrix, start, stop, n_neighbors=N_NEIGHBORS):
+    """
+    Finds the nearest neighbors of rows start:stop of a normalized matrix.
+
+    Parameters:
+        matrix: 2d numpy array of unit length rows.
+        start, stop: Int. The block of rows to find neighbors for.
+        n_neighbors: Int. Neighbors per row, the row itself included.
+    Returns:
+        A tuple (distances, indices) of arrays with one row per block row,
+        sorted closest first. Distances are cosine distances.
+    """
+    n_neighbors = min(n_neighbors, matrix.shape[0])
+    distances = 1.0 - matrix[start:stop] @ matrix.T
+    np.clip(distances, 0, 2, out=distances)
+    return _top_k(distances, np.arange(matrix.shape[0]), n_neighbors)
+
+
+def _init_worker(matrix_path):
+    """
+    Memory-maps the normalized matrix once per pool worker.
+    """
+    _WORKER_STATE["matrix"] = np.load(matrix_path, mmap_mode="r")
+
+
+def _worker_block(task):
+    """
+    Runs knn_block in a pool worker on the memory-mapped matrix.
+    """
+    start, stop, n_neighbors = task
+    return start, knn_block(_WORKER_STATE["matrix"], start, stop, n_neighbors)
+
+
+def build_knn_graph(embeddings, n_neighbors=N_NEIGHBORS,
+                    block_size=BLOCK_SIZE, n_jobs=None):
+    """
+    Builds the nearest-neighbors graph of a set of embeddings.
+
+    Parameters:
+        embeddings: 2d numpy array, one row per book. Need not be
+            normalized.
+        n_neighbors: Int. Neighbors per book, the book itself included.
+            Default is 21.
+        block_size: Int. Rows processed per matrix multiply.
+        n_jobs: Int. Number of worker processes. If None, one per CPU. With
+            1 the blocks are processed in this process.
+    Returns:
+        A tuple (distances, indices): float64 and int64 arrays of shape
+        (num_books, n_neighbors), closest first.
+    """
+    matrix = _normalize(embeddings)
+    num_books = matrix.shape[0]
+    n_neighbors = min(n_neighbors, num_books)
+    distances = np.empty((num_books, n_neighbors), dtype=np.float64)
+    indices = np.empty((num_books, n_neighbors), dtype=np.int64)
+    tasks = [(start, min(start + block_size, num_books), n_neighbors)
+             for start in range(0, num_books, block_size)]
+
+    n_jobs = os.cpu_count() if n_jobs is None else n_jobs
+    if n_jobs <= 1 or len(tasks) <= 1:
+        for start, stop, k in tasks:
+            distances[start:stop], indices[start:stop] = knn_block(
+                matrix, start, stop, k)
+        return distances, indices
+
+    _run_pool(matrix, tasks, (distances, indices), n_jobs)
+    return distances, indices
+
+
+def _run_pool(matrix, tasks, out, n_jobs):
+    """
+    Runs the blocks on a process pool, writing results into out.
+
+    The matrix is saved to a temporary .npy file that every worker
+    memory-maps, rather than being pickled to each of them.
+    """
+    distances, indices = out
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        matrix_path = os.path.join(tmp_dir, "normalized.npy")
+        np.save(matrix_path, matrix)
+        with ProcessPoolExecutor(max_workers=n_jobs,
+                                 initializer=_init_worker,
+                                 initargs=(matrix_path,)) as pool:
+            for start, (block_dist, block_ind) in pool.map(_worker_block,
+                                                           tasks):
+                stop = start + block_dist.shape[0]
+                distances[start:stop] = block_dist
+                indices[start:stop] = block_ind
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+def update_knn_graph(embeddings, distances, indices, new_embeddings,
+                     block_size=BLOCK_SIZE):
+    """
+    Extends a graph with books appended after the existing ones.
+
+    Each block of new rows is multiplied once against every book. That
+    gives the new rows' own neighbor lists, and also the distances from
+    every existing book to the new ones, which are merged into the
+    existing lists of the books they are closer to.
+
+    Parameters:
+        embeddings: 2d numpy array, the embeddings the graph was built on.
+        distances, indices: The existing graph, as from build_knn_graph.
+        new_embeddings: 2d numpy array, one row per added book. Added
+            books get row ids len(embeddings), len(embeddings) + 1, ...
+        block_size: Int. New rows processed per matrix multiply.
+    Returns:
+        A tuple (distances, indices) for all books, old then new.
+    """
+    num_old = len(embeddings)
+    matrix = _normalize(np.vstack([embeddings, new_embeddings]))
+    num_books = matrix.shape[0]
+    n_neighbors = distances.shape[1]
+    if n_neighbors >= num_old:
+        # the old graph was cut short because the catalog was smaller
+        n_neighbors = max(n_neighbors, min(N_NEIGHBORS, num_books))
+
+    dist, ind = _widen(distances, indices, num_books, n_neighbors)
+    for start in range(num_old, num_books, block_size):
+        stop = min(start + block_size, num_books)
+        block = 1.0 - matrix[start:stop] @ matrix.T
+        np.clip(block, 0, 2, out=block)
+        dist[start:stop], ind[start:stop] = _top_k(block,
+                                                   np.arange(num_books),
+                                                   n_neighbors)
+        _patch_rows(dist[:num_old], ind[:num_old], block[:, :num_old].T,
+                    np.arange(start, stop))
+    return dist, ind
+
+
+def _widen(distances, indices, num_books, n_neighbors):
+    """
+    Copies a graph into arrays for num_books rows, padding each row with
+    empty slots that any new book fills.
+    """
+    num_old, width = distances.shape
+    wide_dist = np.full((num_books, n_neighbors), np.inf)
+    wide_dist[:num_old, :width] = distances
+    wide_ind = np.full((num_books, n_neighbors), -1, dtype=np.int64)
+    wide_ind[:num_old, :width] = indices
+    return wide_dist, wide_ind
+
+
+def _top_k(dist, ids, k):
+    """
+    Returns the k smallest distances per row, and their ids, sorted.
+    """
+    rows = np.arange(dist.shape[0])[:, None]
+    nearest = np.argpartition(dist, k - 1, axis=1)[:, :k]
+    order = np.argsort(dist[rows, nearest], axis=1, kind="stable")
+    nearest = nearest[rows, order]
+    return dist[rows, nearest], np.asarray(ids)[nearest].astype(np.int64)
+
+
+def _patch_rows(distances, indices, cand_dist, cand_ids):
+    """
+    Merges candidate neighbors into the rows of a graph they improve.
+
+    Parameters:
+        distances, indices: The graph, modified in place.
+        cand_dist: Array of shape (num_rows, num_candidates).
+        cand_ids: Row ids of the candidates.
+    """
+    improved = np.flatnonzero((cand_dist < distances[:, -1:]).any(axis=1))
+    if improved.size == 0:
+        return
+    k = distances.shape[1]
+    merged_dist = np.hstack([distances[improved], cand_dist[improved]])
+    merged_ids = np.hstack([indices[improved],
+                            np.broadcast_to(cand_ids,
+                                            (improved.size, len(cand_ids)))])
+    rows = np.arange(improved.size)[:, None]
+    order = np.argsort(merged_dist, axis=1, kind="stable")[:, :k]
+    distances[improved] = merged_dist[rows, order]
+    indices[improved] = merged_ids[rows, order]
+
+
+def save_knn_graph(distances, indices, data_dir=DATA_DIR):
+    """
+    Writes the graph to distances_updated.npy and indices_updated.npy.
+
+    Parameters:
+        distances: float64 array from build_knn_graph.
+        indices: int64 array from build_knn_graph.
+        data_dir: The directory to write to.
+    """
+    np.save(os.path.join(data_dir, DISTANCES_FILE),
+            np.asarray(distances, dtype=np.float64))
+    np.save(os.path.join(data_dir, INDICES_FILE),
+            np.asarray(indices, dtype=np.int64))
+
+
+class NeighborLookup:
+    """
+    Serves neighbor lists of any depth from the graph or the embeddings.
+
+    A request is answered from the precomputed graph when the graph row
+    holds enough neighbors (after the optional filter). Otherwise every
+    book is ranked by cosine similarity to the seed, and that ranking is
+    kept for the max_seeds most recently used seeds, so later pages and
+    other filters for the same seed cost no matrix product. The ranking
+    matches the graph order, as the graph is built from the same
+    embeddings. Safe to share between threads.
+    """
+
+    def __init__(self, indices, embeddings_loader=None, max_seeds=MAX_SEEDS):
+        """
+        Parameters:
+            indices: The graph's indices array, one row per book, or a
+                callable returning it, called on first need.
+            embeddings_loader: Callable returning the normalized embeddings
+                matrix, called on first need. If None, requests are served
+                from the graph only and may come back short.
+            max_seeds: Int. Seeds whose full ranking is kept.
+        """
+        self._indices = indices
+        self.max_seeds = max_seeds
+        self.stats = {"graph": 0, "live": 0, "cached": 0}
+        self._embeddings_loader = embeddings_loader
+        self._rankings = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def indices(self):
+        """
+        The graph's indices array, loaded on first use if a loader was given.
+        """
+        if callable(self._indices):
+            with self._lock:
+                if callable(self._indices):
+                    self._indices = self._indices()
+        return self._indices
+
+    def neighbors(self, seed, num_books=10, offset=0, keep=None):
+        """
+        Returns the neighbors of a book, closest first, one page at a time.
+
+        Parameters:
+            seed: Int. Row of the book whose neighbors are wanted. The
+                book itself is its own closest neighbor.
+            num_books: Int. Page size.
+            offset: Int. Number of (passing) neighbors to skip.
+            keep: Optional boolean numpy array over all books; only books
+                marked True are returned.
+        Returns:
+            A numpy array of at most num_books row ids.
+        """
+        stop = offset + num_books
+        graph_row = self.indices[seed]
+        if keep is not None:
+            graph_row = graph_row[keep[graph_row]]
+        if len(graph_row) >= stop or self._embeddings_loader is None:
+            self.stats["graph"] += 1
+            return graph_row[offset:stop]
+
+        ranking = self._ranking(seed)
+        if keep is not None:
+            ranking = ranking[keep[ranking]]
+        return ranking[offset:stop]
+
+    def clear(self):
+        """
+        Drops the kept rankings, e.g. after the embeddings have changed.
+        """
+        with self._lock:
+            self._rankings.clear()
+
+    def _ranking(self, seed):
+        """
+        Returns every book ranked by cosine similarity to seed, cached.
+        """
+        with self._lock:
+            ranking = self._rankings.get(seed)
+            if ranking is not None:
+                self._rankings.move_to_end(seed)
+                self.stats["cached"] += 1
+                return ranking
+
+        embeddings = self._embeddings_loader()
+        similarities = np.asarray(embeddings @ embeddings[seed])
+        ranking = np.argsort(-similarities, kind="stable").astype(np.int64)
+        with self._lock:
+            self.stats["live"] += 1
+            self._rankings[seed] = ranking
+            while len(self._rankings) > self.max_seeds:
+                self._rankings.popitem(last=False)
+        return ranking
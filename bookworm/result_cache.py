@@ -0,0 +1,142 @@
+"""
+Module with a cache of search results for search_wrapper.
+
+Users of the app re-run the same search, or move the rating sliders around
+the same query, and every interaction used to run the whole search again.
+A ResultCache keeps recent results in memory:
+
+    - at most max_entries results, the least recently used dropped first
+    - each result for at most ttl seconds
+    - all results dropped when the catalog version changes, as they were
+      computed from data that has been reloaded
+
+Cached values are handed out as they were stored; search_wrapper stores
+the candidate lists before rating filters, so slider changes are served
+from the cache.
+
+CLASSES
+=======
+ResultCache(max_entries=MAX_ENTRIES, ttl=TTL, clock=time.monotonic)
+    Bounded least-recently-used cache with a time to live per entry.
+
+FUNCTIONS
+=========
+normalize_search_value(search_value)
+    Folds whitespace of a search value.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+MAX_ENTRIES = 512
+TTL = 600
+
+
+def normalize_search_value(search_value):
+    """
+    Folds whitespace of a search value.
+
+    Case is kept: author matching is case sensitive, so folding it would
+    change results.
+
+    Parameters:
+        search_value: A string.
+    Returns:
+        The value with runs of whitespace replaced by a single space and
+        no leading or trailing whitespace.
+    """
+    return " ".join(str(search_value).split())
+
+
+class ResultCache:
+    """
+    Bounded least-recently-used cache with a time to live per entry.
+
+    Counters of hits, misses, expired entries and invalidations are kept
+    in the stats dictionary. Safe to share between threads.
+    """
+
+    def __init__(self, max_entries=MAX_ENTRIES, ttl=TTL, clock=time.monotonic):
+        """
+        Parameters:
+            max_entries: Int. Results kept.
+            ttl: Seconds a result is served for after it is stored.
+            clock: Callable returning the time in seconds.
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stats = {"hits": 0, "misses": 0, "expired": 0,
+                      "invalidations": 0}
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, version=None):
+        """
+        Returns the result stored under key, or None.
+
+        Parameters:
+            key: A hashable key.
+            version: The current catalog version. If it differs from the
+                version results were stored for, all results are dropped.
+        Returns:
+            The stored result, or None on a miss.
+        """
+        with self._lock:
+            self._check_version(version)
+            entry = self._entries.get(key)
+            if entry is not None and self._clock() - entry[0] > self.ttl:
+                del self._entries[key]
+                self.stats["expired"] += 1
+                entry = None
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry[1]
+
+    def put(self, key, value, version=None):
+        """
+        Stores a result under key.
+
+        Parameters:
+            key: A hashable key.
+            value: The result.
+            version: The catalog version the result was computed from.
+        """
+        with self._lock:
+            self._check_version(version)
+            self._entries[key] = (self._clock(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def hit_rate(self):
+        """
+        Returns the share of lookups served from the cache, 0.0 if none.
+        """
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / lookups if lookups else 0.0
+
+    def clear(self):
+        """
+        Drops all results. The counters are kept.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def _check_version(self, version):
+        """
+        Drops all results if the catalog version has changed.
+        """
+        if version != self._version:
+            if self._entries:
+                self._entries.clear()
+                self.stats["invalidations"] += 1
+            self._version = version
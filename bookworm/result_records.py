@@ -0,0 +1,251 @@
+"""
+Module with a compact result type for the search functions.
+
+Every search used to return a slice of the catalog, copying all of its
+columns for the books found, the embeddings strings and summaries
+included, although the app shows four of them. ResultRecords holds a
+search result as book ids and scores instead, with the rows of the books
+found taken once from the catalog frames they came from. Only those rows
+are kept, so a cached result never holds on to a whole catalog frame:
+
+    - project(columns) materializes only the given columns
+    - to_frame() gives the dataframe the search functions return, for
+      callers that need every column
+
+CLASSES
+=======
+ResultRecords(frames, sources, rows, scores=None, score_name=None)
+    Search result as row positions into shared catalog frames.
+
+FUNCTIONS
+=========
+interleave_order(book_ids1, book_ids2)
+    Returns the order alternating two rankings, dropping repeated books.
+
+DISPLAY_COLUMNS
+    The columns the app shows for each book.
+"""
+
+import numpy as np
+import pandas as pd
+
+DISPLAY_COLUMNS = ["book_title", "author", "Book-Rating", "RatingCount"]
+
+
+def interleave_order(book_ids1, book_ids2):
+    """
+    Returns the order alternating two rankings, dropping repeated books.
+
+    Books are taken as first[0], second[0], first[1], ... and a book is
+    kept where it first appears.
+
+    Parameters:
+        book_ids1, book_ids2: Numpy arrays of the book ids of two
+            rankings.
+    Returns:
+        A numpy array of positions into the two rankings concatenated.
+    """
+    # position i of the first goes to slot 2i, position j of the second
+    # to slot 2j + 1
+    slots = np.concatenate([np.arange(len(book_ids1)) * 2,
+                            np.arange(len(book_ids2)) * 2 + 1])
+    order = np.argsort(slots, kind="stable")
+    book_ids = np.concatenate([book_ids1, book_ids2])[order]
+    return order[~pd.Index(book_ids).duplicated()]
+
+
+class ResultRecords:
+    """
+    Search result as row positions into shared catalog frames.
+
+    Each record is a book: the frame it came from (sources), its position
+    in that frame (rows), its book_id and its score. Each frame is cut
+    down to the rows records refer to when the records are built. Records
+    are never modified; take, head and interleave return new ones.
+    """
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, frames, sources, rows, scores=None, score_name=None):
+        """
+        Parameters:
+            frames: A tuple of dataframes, each with a "book_id" column.
+                Only the rows given are kept of each.
+            sources: Numpy array; for each record, the position of its
+                frame in frames.
+            rows: Numpy array; for each record, its row position in its
+                frame.
+            scores: Optional numpy array of a score per record, e.g. the
+                author match ratio. NaN where a record has none.
+            score_name: The column name of the scores in to_frame, e.g.
+                "ratio". If None, scores are not added as a column.
+        """
+        self.sources = np.asarray(sources, dtype=np.intp)
+        self.rows = np.asarray(rows, dtype=np.intp).copy()
+        self.frames = tuple(self._compact(frame, source)
+                            for source, frame in enumerate(frames))
+        self.scores = scores
+        self.score_name = score_name
+        self.book_ids = self.column("book_id")
+
+    @classmethod
+    def from_rows(cls, frame, rows, scores=None, score_name=None):
+        """
+        Returns the records of the given rows of one frame.
+
+        Parameters:
+            frame: A dataframe with a "book_id" column.
+            rows: Row positions in frame, best match first.
+            scores, score_name: As in ResultRecords.
+        Returns:
+            A ResultRecords.
+        """
+        rows = np.asarray(rows, dtype=np.intp)
+        return cls((frame,), np.zeros(len(rows), dtype=np.intp), rows,
+                   scores, score_name)
+
+    @classmethod
+    def from_frame(cls, frame):
+        """
+        Returns the records of every row of a frame, in order.
+        """
+        return cls.from_rows(frame, np.arange(frame.shape[0]))
+
+    def __len__(self):
+        return len(self.rows)
+
+    @property
+    def columns(self):
+        """
+        The columns of the frames, those of the first frame first.
+        """
+        columns = []
+        for frame in self.frames:
+            columns += [column for column in frame.columns
+                        if column not in columns]
+        return columns
+
+    def column(self, name):
+        """
+        Returns the values of a column of the frames, one per record.
+
+        Parameters:
+            name: A column of the frames.
+        Returns:
+            A numpy array.
+        """
+        if len(self.frames) == 1:
+            return self.frames[0][name].to_numpy()[self.rows]
+        by_source = pd.concat(
+            [self.frames[source][name].iloc[self.rows[self.sources == source]]
+             for source in range(len(self.frames))], ignore_index=True)
+        return by_source.to_numpy()[self._unsort()]
+
+    def take(self, positions):
+        """
+        Returns the records at the given positions, in that order.
+        """
+        positions = np.asarray(positions, dtype=np.intp)
+        scores = None if self.scores is None else self.scores[positions]
+        return ResultRecords(self.frames, self.sources[positions],
+                             self.rows[positions], scores, self.score_name)
+
+    def head(self, num_books):
+        """
+        Returns the first num_books records.
+        """
+        return self.take(np.arange(min(num_books, len(self))))
+
+    def interleave(self, other):
+        """
+        Alternates these records with other's, dropping repeated books.
+
+        Records are taken as self[0], other[0], self[1], ... and a book
+        (by book_id) is kept where it first appears, as in
+        search_wrapper.interleave_results.
+
+        Parameters:
+            other: A ResultRecords.
+        Returns:
+            A ResultRecords over the frames of both.
+        """
+        def all_scores(records):
+            if records.scores is None:
+                return np.full(len(records), np.nan)
+            return records.scores
+        scores = None
+        if self.scores is not None or other.scores is not None:
+            scores = np.concatenate([all_scores(self), all_scores(other)])
+        combined = ResultRecords(
+            self.frames + other.frames,
+            np.concatenate([self.sources, other.sources + len(self.frames)]),
+            np.concatenate([self.rows, other.rows]), scores,
+            self.score_name or other.score_name)
+        return combined.take(interleave_order(self.book_ids, other.book_ids))
+
+    def project(self, columns=None):
+        """
+        Materializes the given columns of the records.
+
+        Only those columns are copied. The scores can be asked for by
+        their score_name.
+
+        Parameters:
+            columns: A list of columns. Defaults to DISPLAY_COLUMNS.
+        Returns:
+            A dataframe with a row per record. Records from one frame keep
+            its index; records from several get a fresh index, as their
+            labels would clash.
+        """
+        if columns is None:
+            columns = DISPLAY_COLUMNS
+        if len(self.frames) == 1:
+            index = self.frames[0].index[self.rows]
+        else:
+            index = pd.RangeIndex(len(self))
+        projected = pd.DataFrame(index=index)
+        for column in columns:
+            if column == self.score_name:
+                projected[column] = self.scores
+            else:
+                projected[column] = self.column(column)
+        return projected
+
+    def to_frame(self):
+        """
+        Returns the records as the dataframe the search functions return.
+
+        Every column of the frames is copied, with the scores added under
+        score_name.
+        """
+        if len(self.frames) == 1:
+            frame = self.frames[0].iloc[self.rows]
+        else:
+            frame = pd.concat(
+                [self.frames[source].iloc[self.rows[self.sources == source]]
+                 for source in range(len(self.frames))], ignore_index=True)
+            frame = frame.iloc[self._unsort()].reset_index(drop=True)
+        if self.score_name is not None:
+            frame = frame.assign(**{self.score_name: self.scores})
+        return frame
+
+    def _compact(self, frame, source):
+        """
+        Returns the rows of frame the records of source refer to, and
+        points those records at their rows in it.
+        """
+        in_source = self.sources == source
+        kept, positions = np.unique(self.rows[in_source],
+                                    return_inverse=True)
+        if len(kept) == frame.shape[0]:
+            # every row is referred to, e.g. records already compacted
+            return frame
+        self.rows[in_source] = positions
+        return frame.take(kept)
+
+    def _unsort(self):
+        """
+        Returns the positions that put records grouped by source back in
+        record order.
+        """
+        return np.argsort(np.argsort(self.sources, kind="stable"),
+                          kind="stable")
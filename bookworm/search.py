@@ -20,58 +20,194 @@ fill_na(df)
 preprocess_text(text)
     Convert text to all lowercase.
 
-get_semantic_results(df, query, columns, num_books=10)
+normalize_key(text)
+    Folds case, punctuation and whitespace for exact matching.
+
+normalize_key_column(texts)
+    Vectorized normalize_key over a column.
+
+get_semantic_results(book_index, num_books=10, offset=0, keep=None,
+                     lookup=None)
     Extracts the indices of the closest books to given book_index.
 
-query_to_index(df, query, columns, vectorizer=None)
+parse_genre_column(genres)
+    Parses a column of genre dictionaries, once per distinct value.
+
+add_search_text(df)
+    Precomputes the lowercased text used by keyword search (run at ingest).
+
+combine_columns(df, columns)
+    Combines the lowercased text of the given columns for keyword search.
+
+has_search_text(df, columns)
+    Returns True if add_search_text has run for all given columns.
+
+build_exact_index(df, column, index=None)
+    Builds a dictionary from normalized values of column to row index.
+
+build_author_index(df)
+    Groups the rows of df by distinct author for fuzzy author search.
+
+build_genre_index(df)
+    Builds the leaderboard of each genre for genre search.
+
+parse_genre_query(query)
+    Splits a multi-genre query into a list of AND groups.
+
+genre_query_rows(genres, query)
+    Finds the books matching a multi-genre query.
+
+build_char_index(names)
+    Builds an inverted index of the characters of a list of names.
+
+fuzzy_candidates(chars, query, min_ratio=50)
+    Returns the names that can have fuzz.ratio with query > min_ratio.
+
+query_to_index(df, query, columns, vectorizer=None, index=None,
+               exact=None, spelling=None)
     Maps query to the closest book index via keyword search.
 
+no_match_error(column, suggestion=None)
+    Builds the error for a keyword query without a close match.
+
+queries_to_indices(df, queries, columns, index=None)
+    Maps many queries to their closest book indices at once.
+
+top_k_indices(scores, k, keep=None)
+    Returns the indices of the k highest scores, highest first.
+
+rating_mask(df, min_ave_rating=0.0, min_num_ratings=0, rows=None)
+    Marks the books that pass the rating filters.
+
+
+Resource Functions
+==================
+
+get_query_embeddings()
+    Returns the query embedding cache for plot search, creating the
+    voyageai client on first use.
+
+get_indices(version=None)
+    Returns the pre-processed semantic neighbor indices, loading them on
+    first use and again for a new catalog version.
+
 
 Search Mode Functions
 =====================
 
-semantic_search(df, query, columns, num_books=10):
+semantic_search(df, query, columns, num_books=10, index=None, exact=None,
+                embeddings=None, min_ave_rating=0.0, min_num_ratings=0,
+                offset=0, lookup=None, spelling=None, as_records=False):
     Search for the closest books via keyword + semantic search. 
 
-plot_semantic_search(df, query, num_books = 10):
+plot_semantic_search(df, query, num_books = 10, embeddings=None,
+                     min_ave_rating=0.0, min_num_ratings=0,
+                     as_records=False):
     Search for closest set of books via pure semantic search.
     
-author2_search(df, query, num_books=10):
+author2_search(df, query, num_books=10, authors=None, min_ave_rating=0.0,
+               min_num_ratings=0, spelling=None, as_records=False):
     Search for closest set of books via fuzzy match on author field.
 
-genre_search(data_frame, genre, num_books=10):
+genre_search(data_frame, genre, num_books=10, genres=None,
+             min_ave_rating=0.0, min_num_ratings=0, as_records=False):
     Search for books within a specified genre and return the top-rated books.
+
+Each search mode returns a dataframe slice of the books found or, with
+as_records=True, a result_records.ResultRecords of them, which copies no
+columns.
 """
 
+# pylint: disable=too-many-lines
 import os
+import re
 import ast
+import threading
+from collections import Counter
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import linear_kernel
-from sklearn.metrics.pairwise import cosine_similarity
-from thefuzz import fuzz
-from dotenv import load_dotenv
-import voyageai
+import pandas as pd
+from scipy import sparse
+try:
+    import catalog
+    import embedding_cache
+    import keyword_index
+    import knn_graph
+    import result_records
+except ImportError:
+    # pylint: disable=consider-using-from-import
+    import bookworm.catalog as catalog
+    import bookworm.embedding_cache as embedding_cache
+    import bookworm.keyword_index as keyword_index
+    import bookworm.knn_graph as knn_graph
+    import bookworm.result_records as result_records
+
+# columns add_search_text precomputes lowercased text for
+SEARCH_TEXT_COLUMNS = ["book_title", "author", "genre"]
+SEARCH_TEXT_PREFIX = "search_text_"
+
+# characters normalize_key folds to whitespace
+KEY_PUNCTUATION = r"[^\w\s]"
+
+# number of queries scored per sparse product in queries_to_indices
+QUERY_BLOCK_SIZE = 256
+
+# Resources are created on first use by the search mode that needs them,
+# so importing this module reads no environment variable or data file.
+# Tests may assign them directly.
+query_embeddings = None  # pylint: disable=invalid-name
+indices = None  # pylint: disable=invalid-name
+indices_version = None  # pylint: disable=invalid-name
+_RESOURCE_LOCK = threading.Lock()
+
+def get_query_embeddings():
+    """
+    Returns the query embedding cache for plot search.
 
-# load environment variables from .env file
-load_dotenv()
+    On first use, creates the voyageai client with API_KEY from the
+    environment (or a .env file), behind a cache kept in memory and on
+    disk (see embedding_cache).
 
-# load API for embeddings voyage
-api_key = os.environ['API_KEY']
+    Returns:
+        An embedding_cache.EmbeddingCache.
+    Exceptions:
+        KeyError if API_KEY is not set.
+    """
+    global query_embeddings  # pylint: disable=global-statement
+    with _RESOURCE_LOCK:
+        if query_embeddings is None:
+            # pylint: disable=import-outside-toplevel
+            from dotenv import load_dotenv
+            import voyageai
+            load_dotenv()
+            client = voyageai.Client(api_key=os.environ['API_KEY'])
+            query_embeddings = embedding_cache.EmbeddingCache(
+                client, db_path=embedding_cache.DB_PATH)
+    return query_embeddings
+
+def get_indices(version=None):
+    """
+    Returns the pre-processed semantic neighbor indices.
 
-vo = voyageai.Client(api_key=api_key)
+    Loaded on first use from indices_updated.npy in the package data
+    directory (see knn_graph.save_knn_graph).
 
-# load preprocessed distances/indices
-try:
-    distances = np.load('bookworm/data/distances_updated.npy')
-except FileNotFoundError:
-    distances = np.load('data/distances_updated.npy')
-try:
-    indices = np.load('bookworm/data/indices_updated.npy')
-except FileNotFoundError:
-    indices = np.load('data/indices_updated.npy')
+    Parameters:
+        version: Optional version of the catalog the graph is wanted for,
+            e.g. Catalog.version. If the graph was loaded for another
+            version, it is read again, as books may have been added since.
+    Returns:
+        A numpy array with one row of neighbor row ids per book.
+    """
+    global indices, indices_version  # pylint: disable=global-statement
+    with _RESOURCE_LOCK:
+        if indices is None or (version is not None
+                               and version != indices_version):
+            indices = np.load(os.path.join(knn_graph.DATA_DIR,
+                                           knn_graph.INDICES_FILE))
+            indices_version = version
+    return indices
 
-class HelperFunctions:
+class HelperFunctions:  # pylint: disable=too-many-public-methods
 
     """
     Helper Functions used by main search functions
@@ -128,7 +264,37 @@ class HelperFunctions:
         return text
 
     @staticmethod
-    def get_semantic_results(book_index, num_books=10):
+    def normalize_key(text):
+        """
+        Folds case, punctuation and whitespace for exact matching.
+
+        Parameters:
+            Text: A string
+        Returns
+            The lowercased string, with punctuation replaced by spaces and
+            runs of whitespace collapsed to single spaces.
+        """
+        text = re.sub(KEY_PUNCTUATION, ' ',
+                      HelperFunctions.preprocess_text(text))
+        return ' '.join(text.split())
+
+    @staticmethod
+    def normalize_key_column(texts):
+        """
+        Vectorized normalize_key over a column.
+
+        Parameters:
+            texts: A pandas Series.
+        Returns:
+            A pandas Series of normalized keys.
+        """
+        keys = texts.astype(str).str.lower()
+        keys = keys.str.replace(KEY_PUNCTUATION, ' ', regex=True)
+        return keys.str.split().str.join(' ')
+
+    @staticmethod
+    def get_semantic_results(book_index, num_books=10, offset=0, keep=None,
+                             lookup=None):
         """
         Extracts indices of the closest books to given book_index.
         
@@ -141,14 +307,310 @@ class HelperFunctions:
                         param that is the base of the search.
             num_books:  Int. The number of indices to extract.
                         Default is 10. 
+            offset:     Int. The number of closest books to skip, for
+                        later pages. Default is 0.
+            keep:       Optional boolean array over all books; only
+                        books marked True are extracted.
+            lookup:     Optional knn_graph.NeighborLookup. If given, it
+                        serves pages deeper than the pre-processed
+                        neighbors.
         Returns: 
-            A numpy array of length num_books
+            A numpy array of length num_books (or less if the neighbors
+            run out).
+        """
+        if lookup is not None:
+            return lookup.neighbors(book_index, num_books, offset, keep)
+        similar_books_indices = get_indices()[book_index]
+        if keep is not None:
+            similar_books_indices = similar_books_indices[
+                keep[similar_books_indices]]
+        return similar_books_indices[offset:offset + num_books]
+
+    @staticmethod
+    def parse_genre_column(genres):
+        """
+        Parses a column of genre dictionaries, once per distinct value.
+
+        Parameters:
+            genres: A pandas Series of genre dictionaries (as strings).
+        Returns:
+            A pandas Series with the result of parse_genres for each value.
+        """
+        codes, uniques = pd.factorize(genres)
+        # The extra last entry is what missing values (code -1) map to
+        parsed = [HelperFunctions.parse_genres(genre) for genre in uniques]
+        parsed.append(HelperFunctions.parse_genres(None))
+        return pd.Series(np.array(parsed, dtype=object)[codes],
+                         index=genres.index, dtype=object)
+
+    @staticmethod
+    def add_search_text(df):
+        """
+        Precomputes the lowercased text used by keyword search.
+
+        Meant to run once when the data is loaded. Fills missing values,
+        then adds a SEARCH_TEXT_PREFIX column for each of SEARCH_TEXT_COLUMNS
+        holding its lowercased text (for "genre", the parsed genres), so
+        combine_columns never has to parse or lowercase per query.
+
+        Parameters:
+            df: A pandas dataframe with fields author, book_title, genre
+                and summary.
+        Returns:
+            The same dataframe, with the search text columns added.
+        """
+        df = HelperFunctions.fill_na(df)
+        for col in SEARCH_TEXT_COLUMNS:
+            text = df[col]
+            if col == "genre":
+                text = HelperFunctions.parse_genre_column(text)
+            df[SEARCH_TEXT_PREFIX + col] = text.astype(str).str.lower()
+        return df
+
+    @staticmethod
+    def combine_columns(df, columns):
+        """
+        Combines the lowercased text of the given columns for keyword search.
+
+        Uses the columns precomputed by add_search_text where present.
+
+        Parameters:
+            df:         A pandas dataframe, each row representing a book.
+            columns:    The columns to combine.
+        Returns:
+            A pandas Series of strings, one per row of df.
+        """
+        combined = None
+        for col in columns:
+            if SEARCH_TEXT_PREFIX + col in df.columns:
+                text = df[SEARCH_TEXT_PREFIX + col]
+            else:
+                text = df[col].astype(str).str.lower()
+            combined = text if combined is None else combined + ' ' + text
+        return combined.str.strip().astype(object)
+
+    @staticmethod
+    def has_search_text(df, columns):
+        """
+        Returns True if add_search_text has run for all given columns.
+        """
+        return all(SEARCH_TEXT_PREFIX + col in df.columns for col in columns)
+
+    @staticmethod
+    def build_exact_index(df, column, index=None):
+        """
+        Builds a dictionary from normalized values of column to row index.
+
+        A lookup must pick the book keyword search would, so a key is left
+        out when its TF-IDF vector is empty (e.g. only stop words, as in
+        "It") or is shared with rows of another key (e.g. "Shrek" and
+        "Shrek 2", as single characters are not terms); such queries go to
+        keyword search. Where several rows share a key the last one is
+        kept, the same book keyword search picks among tied scores (see
+        query_to_index).
+
+        Parameters:
+            df:     A pandas dataframe, each row representing a book.
+            column: The column to index, e.g. "book_title".
+            index:  A pre-fitted keyword_index.KeywordIndex over column of
+                    df. If none supplied, one is fitted.
+        Returns:
+            A dict mapping normalize_key(value) to a row position in df.
+        """
+        keys = HelperFunctions.normalize_key_column(df[column])
+        if index is None:
+            index = keyword_index.KeywordIndex.fit(
+                HelperFunctions.combine_columns(df, [column]))
+        docs = index.doc_matrix.sorted_indices()
+        vectors = [docs.indices[start:end].tobytes() +
+                   docs.data[start:end].tobytes()
+                   for start, end in zip(docs.indptr[:-1], docs.indptr[1:])]
+        # the one key whose rows have each vector, None if several keys do
+        owners = {}
+        for key, vector in zip(keys, vectors):
+            owners[vector] = key if owners.get(vector, key) == key else None
+        return {key: row for row, (key, vector) in enumerate(zip(keys, vectors))
+                if key and vector and owners[vector] == key}
+
+    @staticmethod
+    def build_author_index(df):
+        """
+        Groups the rows of df by distinct author for fuzzy author search.
+
+        Parameters:
+            df: A pandas dataframe, each row representing a book.
+                Assumes df contains columns "author" and "Book-Rating".
+        Returns:
+            A dict with keys:
+                "authors": numpy array of the distinct author names.
+                "codes":   Position in "authors" of each row's author, -1
+                           where the author is missing.
+                "rows":    For each author, the row positions of their
+                           books sorted by Book-Rating, highest first.
+                "rank":    Position of each row in the ordering of all
+                           rows by Book-Rating, highest first.
+                "chars":   Character index of the author names, used to
+                           skip names that cannot match (see
+                           fuzzy_candidates).
+        """
+        codes, authors = pd.factorize(df["author"])
+        order = _rating_order(df)
+        rank = np.empty(len(df), dtype=np.intp)
+        rank[order] = np.arange(len(df))
+        rows = _group_rows(codes, len(authors), order)
+        return {"authors": np.asarray(authors, dtype=object), "codes": codes,
+                "rows": rows, "rank": rank,
+                "chars": HelperFunctions.build_char_index(authors)}
+
+    @staticmethod
+    def build_genre_index(df):
+        """
+        Builds the leaderboard of each genre for genre search.
+
+        Parameters:
+            df: A pandas dataframe with one row per book and genre.
+                Assumes df contains columns "generic_genre", "book_title",
+                "Book-Rating" and "RatingCount".
+        Returns:
+            A dict with keys:
+                "genres":  Dict from genre to the row positions of its
+                           books, one row per title (the first), sorted
+                           by Book-Rating, highest first.
+                "rating":  numpy array of the Book-Rating of each row.
+                "count":   numpy array of the RatingCount of each row.
+                "books":   Row position of the first row of each distinct
+                           title (the canonical books), in rating order.
+                "bitsets": Dict from genre to a packed bitset over the
+                           canonical books, bit i set if book i is in
+                           the genre (see genre_query_rows).
+        """
+        codes, genres = pd.factorize(df["generic_genre"])
+        first = ~df.duplicated(subset=["generic_genre", "book_title"])
+        order = _rating_order(df)
+        rows = _group_rows(codes, len(genres), order[first.to_numpy()[order]])
+
+        # canonical books: one per title, numbered in rating order
+        title_codes = pd.factorize(df["book_title"], use_na_sentinel=False)[0]
+        title_first = ~df["book_title"].duplicated().to_numpy()
+        books = order[title_first[order]]
+        book_of_title = np.empty(len(books), dtype=np.intp)
+        book_of_title[title_codes[books]] = np.arange(len(books))
+        bits = np.zeros((len(genres), len(books)), dtype=bool)
+        in_genre = codes >= 0
+        bits[codes[in_genre], book_of_title[title_codes[in_genre]]] = True
+        return {"genres": dict(zip(genres, rows)),
+                "rating": df["Book-Rating"].to_numpy(dtype=np.float64),
+                "count": df["RatingCount"].to_numpy(dtype=np.float64),
+                "books": books,
+                "bitsets": dict(zip(genres, np.packbits(bits, axis=1)))}
+
+    @staticmethod
+    def parse_genre_query(query):
+        """
+        Splits a multi-genre query into a list of AND groups.
+
+        "OR" binds looser than "AND", so "Fantasy AND Young Adult OR
+        Horror" is (Fantasy and Young Adult) or Horror. The operators
+        must be upper case and surrounded by spaces.
+
+        Parameters:
+            query: A string.
+        Returns:
+            A list of lists of genres; a book matches the query if it is
+            in every genre of at least one list.
+        """
+        return [[genre.strip() for genre in group.split(" AND ")]
+                for group in query.split(" OR ")]
+
+    @staticmethod
+    def genre_query_rows(genres, query):
+        """
+        Finds the books matching a multi-genre query.
+
+        The genre bitsets of each AND group are intersected, and the
+        groups' results are joined, all on packed bitsets.
+
+        Parameters:
+            genres: The genre index (see build_genre_index).
+            query:  A string, e.g. "Mystery OR Thriller".
+        Returns:
+            A numpy array of the row positions of the matching books,
+            sorted by Book-Rating, highest first.
         """
-        similar_books_indices = indices[book_index][:num_books]
-        return similar_books_indices
+        empty = np.zeros((len(genres["books"]) + 7) // 8, dtype=np.uint8)
+        matches = empty
+        for group in HelperFunctions.parse_genre_query(query):
+            bitsets = [genres["bitsets"].get(genre, empty) for genre in group]
+            matches = matches | np.bitwise_and.reduce(bitsets)
+        mask = np.unpackbits(matches, count=len(genres["books"]))
+        return genres["books"][mask.astype(bool)]
 
     @staticmethod
-    def query_to_index(df, query, columns, vectorizer=None):
+    def build_char_index(names):
+        """
+        Builds an inverted index of the characters of a list of names.
+
+        Parameters:
+            names: A sequence of strings.
+        Returns:
+            A dict with keys:
+                "vocab":   Dict from character to column number.
+                "counts":  Sparse (CSC) matrix of how many times each
+                           character occurs in each name.
+                "lengths": numpy array of the name lengths.
+        """
+        vocab = {}
+        rows, cols, data = [], [], []
+        for row, name in enumerate(names):
+            for char, count in Counter(name).items():
+                rows.append(row)
+                cols.append(vocab.setdefault(char, len(vocab)))
+                data.append(count)
+        counts = sparse.csc_matrix((data, (rows, cols)),
+                                   shape=(len(names), len(vocab)),
+                                   dtype=np.int64)
+        lengths = np.fromiter(map(len, names), dtype=np.int64,
+                              count=len(names))
+        return {"vocab": vocab, "counts": counts, "lengths": lengths}
+
+    @staticmethod
+    def fuzzy_candidates(chars, query, min_ratio=50):
+        """
+        Returns the names that can have fuzz.ratio with query > min_ratio.
+
+        fuzz.ratio is 100 * 2 * L / (len(name) + len(query)), rounded,
+        where L is the length of the longest common subsequence. L is at
+        most the number of characters the two strings share, counted with
+        multiplicity, which the character index gives for every name at
+        once. Names whose bound cannot exceed min_ratio are skipped, so
+        no name over min_ratio is ever missed.
+
+        Parameters:
+            chars:     The character index of the names
+                       (see build_char_index).
+            query:     A string.
+            min_ratio: Int. Names are kept if their ratio can be over it.
+        Returns:
+            A numpy array of candidate name positions, in order.
+        """
+        shared = np.zeros(chars["counts"].shape[0], dtype=np.int64)
+        counts = chars["counts"]
+        for char, query_count in Counter(query).items():
+            col = chars["vocab"].get(char)
+            if col is None:
+                continue
+            start, stop = counts.indptr[col], counts.indptr[col + 1]
+            shared[counts.indices[start:stop]] += np.minimum(
+                counts.data[start:stop], query_count)
+        # ratio rounds to over min_ratio only if it is at least min_ratio + .5
+        total = chars["lengths"] + len(query)
+        possible = (400 * shared >= (2 * min_ratio + 1) * total) | (total == 0)
+        return np.flatnonzero(possible)
+
+    # pylint: disable=too-many-arguments, too-many-locals
+    @staticmethod
+    def query_to_index(df, query, columns, vectorizer=None, index=None,
+                       exact=None, spelling=None):
         """ 
         Maps query to the closest book index via keyword search.
         
@@ -169,42 +631,221 @@ class HelperFunctions:
 
             vectorizer: Vectorizer to use to convert query for keyword search.
                         If none supplied TfidfVectorizer used. 
+
+            index:      A pre-fitted keyword_index.KeywordIndex over the
+                        same columns of df. If supplied, nothing is fitted
+                        and vectorizer is ignored.
+
+            exact:      Optional dictionary from build_exact_index over
+                        columns[0]. Queries equal to a key (after
+                        normalize_key) are resolved by lookup, without
+                        keyword search, to the book keyword search would
+                        pick.
+
+            spelling:   Optional spelling.SpellingIndex over columns[0].
+                        If the closest book is too far off to suggest,
+                        the error suggests a spelling correction instead.
         Returns: 
-            An np.int; the index of the closest book. 
+            An np.int; the index of the closest book. Among books tied
+            for the best score, the last in df.
         Exceptions:
             If no match (> .75 cosine similarity) raise ValueError.  
     """
 
-        df = HelperFunctions.fill_na(df)
-        df["genre"] = df['genre'].apply(HelperFunctions.parse_genres)
-        df['combined_text'] = ''
-        for index, row in df.iterrows():
-            combined_text = ''
-            for col in columns:
-                new_txt = HelperFunctions.preprocess_text(str(row[col]))
-                combined_text += new_txt + ' '
-            df.at[index, 'combined_text'] = combined_text.strip()
-
-        if vectorizer is None:
-            vectorizer = TfidfVectorizer(stop_words='english')
-            vectorizer.fit(df['combined_text'])
-        query_vec = vectorizer.transform([query])
-        cosine_similarities = linear_kernel(query_vec,
-                vectorizer.transform(df['combined_text'])).flatten()
-        most_relevant_index = cosine_similarities.argsort()[-1]
+        if exact is not None:
+            row = exact.get(HelperFunctions.normalize_key(query))
+            if row is not None:
+                return np.int64(row)
+
+        if index is not None:
+            cosine_similarities = index.scores(query)
+        else:
+            if not HelperFunctions.has_search_text(df, columns):
+                df = HelperFunctions.fill_na(df)
+                df["genre"] = HelperFunctions.parse_genre_column(df['genre'])
+            combined_text = HelperFunctions.combine_columns(df, columns)
+
+            # pylint: disable=import-outside-toplevel
+            from sklearn.feature_extraction.text import TfidfVectorizer
+            from sklearn.metrics.pairwise import linear_kernel
+            if vectorizer is None:
+                vectorizer = TfidfVectorizer(stop_words='english')
+                vectorizer.fit(combined_text)
+            query_vec = vectorizer.transform([query])
+            cosine_similarities = linear_kernel(query_vec,
+                    vectorizer.transform(combined_text)).flatten()
+        # a stable sort keeps tied books in row order, so the last is picked
+        most_relevant_index = cosine_similarities.argsort(kind="stable")[-1]
         best_distance = cosine_similarities[most_relevant_index]
         best_match = df.iloc[most_relevant_index][columns[0]]
         if best_distance < 0.75:
-            err_msg = f"Sorry, we can't find that {columns[0]} in our database."
             # Offer suggestion if the best match had .5 < distance < .75
-            if best_distance > 0.5:
-                err_msg += f" Did you perhaps mean {best_match}?"
-            err_msg += " You can also try searching by plot."
-            raise ValueError(err_msg)
+            suggestion = best_match if best_distance > 0.5 else None
+            if suggestion is None and spelling is not None:
+                suggestion = next(iter(spelling.suggest(query)), None)
+            raise HelperFunctions.no_match_error(columns[0], suggestion)
         return most_relevant_index
 
+    @staticmethod
+    def no_match_error(column, suggestion=None):
+        """
+        Builds the error for a keyword query without a close match.
+
+        Parameters:
+            column:     The column searched, e.g. "book_title".
+            suggestion: Optional value of column to suggest.
+        Returns:
+            A ValueError.
+        """
+        err_msg = f"Sorry, we can't find that {column} in our database."
+        if suggestion is not None:
+            err_msg += f" Did you perhaps mean {suggestion}?"
+        err_msg += " You can also try searching by plot."
+        return ValueError(err_msg)
+
+    @staticmethod
+    def queries_to_indices(df, queries, columns, index=None):
+        """
+        Maps many queries to their closest book indices at once.
+
+        Batch version of query_to_index: all queries are scored with one
+        sparse matrix product per block of QUERY_BLOCK_SIZE queries, and
+        misses are reported in the result instead of raised. Ties go to
+        the last best match, as in query_to_index.
+
+        Parameters:
+            df:         A pandas dataframe, each row representing a book.
+            queries:    A list of strings.
+            columns:    The columns to search over for the keyword search.
+            index:      A pre-fitted keyword_index.KeywordIndex over the
+                        same columns of df. If None, one is fitted once
+                        for the whole batch.
+        Returns:
+            A dataframe with one row per query, in order, and columns
+                "query", "best_index" (closest book, as in query_to_index),
+                "score" (its cosine similarity), "found" (score >= .75) and
+                "suggestion" (the closest book's columns[0] value if
+                .5 < score < .75, else None).
+        """
+        if index is None:
+            if not HelperFunctions.has_search_text(df, columns):
+                df = HelperFunctions.fill_na(df.copy())
+                df["genre"] = HelperFunctions.parse_genre_column(df['genre'])
+            index = keyword_index.KeywordIndex.fit(
+                HelperFunctions.combine_columns(df, columns))
+
+        queries = list(queries)
+        best_indices = np.zeros(len(queries), dtype=np.intp)
+        best_scores = np.zeros(len(queries))
+        num_docs = len(index)
+        for start in range(0, len(queries), QUERY_BLOCK_SIZE):
+            block = slice(start, start + QUERY_BLOCK_SIZE)
+            scores = index.scores_many(queries[block]).toarray()
+            # argmax of the reversed rows finds the last best match
+            best = num_docs - 1 - np.argmax(scores[:, ::-1], axis=1)
+            best_indices[block] = best
+            best_scores[block] = scores[np.arange(len(best)), best]
+
+        labels = df[columns[0]].to_numpy()[best_indices]
+        suggest = (best_scores > 0.5) & (best_scores < 0.75)
+        return pd.DataFrame({
+            "query": queries,
+            "best_index": best_indices,
+            "score": best_scores,
+            "found": best_scores >= 0.75,
+            "suggestion": pd.Series(np.where(suggest, labels, None),
+                                    dtype=object)})
+
+    @staticmethod
+    def top_k_indices(scores, k, keep=None):
+        """
+        Returns the indices of the k highest scores, highest first.
+
+        Uses a partial sort (argpartition), so only the k selected scores
+        are fully sorted.
 
-def semantic_search(df, query, columns, num_books=10):
+        Parameters:
+            scores: A 1d numpy array.
+            k:      Int. The number of indices to return.
+            keep:   Optional boolean array over scores (see rating_mask);
+                    only indices marked True are returned.
+        Returns:
+            A numpy array of at most k indices into scores.
+        """
+        if keep is not None:
+            passing = np.flatnonzero(keep)
+            return passing[HelperFunctions.top_k_indices(scores[passing], k)]
+        k = min(k, len(scores))
+        if k <= 0:
+            return np.array([], dtype=np.intp)
+        top = np.argpartition(-scores, k - 1)[:k]
+        return top[np.argsort(-scores[top], kind="stable")]
+
+    @staticmethod
+    def rating_mask(df, min_ave_rating=0.0, min_num_ratings=0, rows=None):
+        """
+        Marks the books that pass the rating filters.
+
+        Same rules as search_wrapper.filter_ratings: a filter of 0 is off,
+        otherwise Book-Rating must be over min_ave_rating and RatingCount
+        over min_num_ratings (missing values fail).
+
+        Parameters:
+            df:              A pandas dataframe, each row representing a
+                             book, with "Book-Rating" and "RatingCount".
+            min_ave_rating:  Float. The min average rating, 0.0 for none.
+            min_num_ratings: Int. The min number of ratings, 0 for none.
+            rows:            Optional row positions to check. If None,
+                             every row is checked.
+        Returns:
+            A boolean numpy array, one entry per row checked, or None if
+            both filters are off.
+        """
+        if min_ave_rating == 0.0 and min_num_ratings == 0:
+            return None
+        rows = slice(None) if rows is None else rows
+        keep = np.ones(df.shape[0], dtype=bool)[rows]
+        if min_ave_rating != 0.0:
+            keep &= df["Book-Rating"].to_numpy(dtype=np.float64)[rows] > \
+                min_ave_rating
+        if min_num_ratings != 0:
+            keep &= df["RatingCount"].to_numpy(dtype=np.float64)[rows] > \
+                min_num_ratings
+        return keep
+
+
+def _rating_order(df):
+    """
+    Returns the row positions of df sorted by Book-Rating, highest first.
+
+    Rows without a rating come last; ties keep their order in df.
+    """
+    return df["Book-Rating"].reset_index(drop=True).sort_values(
+        ascending=False, kind="stable", na_position="last").index.to_numpy()
+
+def _group_rows(codes, num_groups, order):
+    """
+    Splits the rows in order into one array per group, keeping the order.
+
+    Parameters:
+        codes: Group number of every row of the data, -1 for no group.
+        num_groups: Int. The number of groups.
+        order: Row positions to split.
+    Returns:
+        A list with one numpy array of row positions per group.
+    """
+    order_codes = codes[order]
+    # a stable sort by group keeps each group's rows in the given order
+    grouped = order[np.argsort(order_codes, kind="stable")]
+    counts = np.bincount(order_codes[order_codes >= 0], minlength=num_groups)
+    missing = np.count_nonzero(order_codes < 0)
+    return np.split(grouped[missing:], np.cumsum(counts)[:-1])
+
+
+# pylint: disable=too-many-arguments, too-many-locals
+def semantic_search(df, query, columns, num_books=10, index=None, exact=None,
+                    embeddings=None, min_ave_rating=0.0, min_num_ratings=0,
+                    offset=0, lookup=None, spelling=None, as_records=False):
     """ 
     Search for the closest books via keyword + embeddings search. 
     
@@ -212,6 +853,11 @@ def semantic_search(df, query, columns, num_books=10):
     retrieves the closest books based on pre-processed 
     semantic search distances. 
 
+    With rating filters, only books passing them are returned. If the
+    pre-processed neighbors run out before num_books (passing) books,
+    and embeddings or a lookup are given, the closest books are found
+    over the whole catalog instead.
+
     Parameters: 
         df:         A pandas dataframe, each row representing a book. 
                     Assumes df contains columns "book-title", "author",
@@ -223,19 +869,51 @@ def semantic_search(df, query, columns, num_books=10):
 
         num_books:  Int. The number of indices to extract. 
                     Defualt is 10.
+
+        index:      Optional pre-fitted keyword_index.KeywordIndex over
+                    the same columns of df (see query_to_index).
+
+        exact:      Optional exact-match dictionary over columns[0]
+                    (see query_to_index).
+
+        embeddings: Optional normalized embeddings matrix, row i belonging
+                    to row i of df (see catalog.load_normalized_embeddings).
+
+        min_ave_rating, min_num_ratings:
+                    Rating filters, as in search_wrapper.filter_ratings.
+                    0 turns a filter off.
+
+        offset:     Int. The number of closest books to skip, for later
+                    pages of results. Default is 0.
+
+        lookup:     Optional shared knn_graph.NeighborLookup over the
+                    same books, which caches deep rankings per book.
+                    Used instead of embeddings.
+
+        spelling:   Optional spelling.SpellingIndex over columns[0], for
+                    suggestions when query has no match (see
+                    query_to_index).
+
+        as_records: If True, return a result_records.ResultRecords
+                    instead of a dataframe.
     Returns: 
-        A numpy array of length num_books.
+        A dataframe of at most num_books books.
     """
 
-    book_index = HelperFunctions.query_to_index(df, query, columns)
-    semantic_indices = HelperFunctions.get_semantic_results(book_index,
-                                                            num_books)
-    semantic_indices = semantic_indices.tolist() if \
-        isinstance(semantic_indices, np.ndarray) else semantic_indices
-    results = df.loc[semantic_indices].head(num_books)
-    return results
-
-def plot_semantic_search(df, query, num_books = 10):
+    book_index = HelperFunctions.query_to_index(df, query, columns,
+                                                index=index, exact=exact,
+                                                spelling=spelling)
+    keep = HelperFunctions.rating_mask(df, min_ave_rating, min_num_ratings)
+    if lookup is None and embeddings is not None:
+        lookup = knn_graph.NeighborLookup(get_indices, lambda: embeddings)
+    semantic_indices = HelperFunctions.get_semantic_results(
+        book_index, num_books, offset=offset, keep=keep, lookup=lookup)
+    return _results(df, semantic_indices, as_records)
+
+# pylint: disable=too-many-arguments
+def plot_semantic_search(df, query, num_books = 10, embeddings=None,
+                         min_ave_rating=0.0, min_num_ratings=0,
+                         as_records=False):
     """
     Search for closest set of books via pure semantic search.
 
@@ -251,106 +929,213 @@ def plot_semantic_search(df, query, num_books = 10):
 
         num_books:  Int. The number of books to extract. 
                     Defualt is 10.
+
+        embeddings: Normalized float32 embeddings matrix, row i belonging
+                    to row i of df (see catalog.load_normalized_embeddings).
+                    If None, computed from the "embeddings" column of df.
+
+        min_ave_rating, min_num_ratings:
+                    Rating filters, as in search_wrapper.filter_ratings.
+                    Only passing books are ranked. 0 turns a filter off.
+
+        as_records: If True, return a result_records.ResultRecords, with
+                    the cosine similarities as scores, instead of a
+                    dataframe.
     Returns: 
         A dataframe containing the selected books. 
     """
     # computing embeddings for the query
-    query_embedding = vo.embed(query, model="voyage-lite-02-instruct",
-                               input_type="document").embeddings
+    query_embedding = get_query_embeddings().embed(query)
 
-    # Convert embeddings from string representation back to lists
-    # (and then to numpy arrays)
-    embeddings_matrix = np.array([ast.literal_eval(embedding) if
-            isinstance(embedding, str) else embedding for embedding
-            in df['embeddings']])
+    if embeddings is None:
+        embeddings = catalog.normalize_rows(
+            catalog.parse_embeddings(df['embeddings']))
 
-    # Compute cosine similarities between the query embedding
-    #and the book embeddings
-    similarities = cosine_similarity(query_embedding, embeddings_matrix)
+    # With unit length rows, cosine similarity is a single dot product
+    query_vector = catalog.normalize_rows([query_embedding])[0]
+    similarities = embeddings @ query_vector
 
-    # Get indices of the top N similar books
-    top_n_indices = np.argsort(similarities[0])[::-1][:num_books]
-    closest_books = df.iloc[top_n_indices]
+    # Get indices of the top N similar books that pass the filters
+    keep = HelperFunctions.rating_mask(df, min_ave_rating, min_num_ratings)
+    top_n_indices = HelperFunctions.top_k_indices(similarities, num_books,
+                                                  keep)
 
-    # Return the DataFrame containing the closest books
-    return closest_books
+    # Return the closest books
+    return _results(df, top_n_indices, as_records,
+                    scores=similarities[top_n_indices])
 
-def author2_search(df, query, num_books=10):
+# pylint: disable=too-many-arguments, too-many-locals
+def author2_search(df, query, num_books=10, authors=None,
+                   min_ave_rating=0.0, min_num_ratings=0, spelling=None,
+                   as_records=False):
 
     """
     Search for closest set of books via fuzzy match on author field.
 
+    Each distinct author name is scored once, however many books they
+    wrote, and only if it shares enough characters with the query to
+    possibly score over 50.
+
+    The scores are kept apart from df, which is never modified, and only
+    the selected rows are copied.
+
     Parameters: 
         df:     A pandas dataframe, each row representing a book. 
-                Assumes df contains column "author".
+                Assumes df contains columns "author" and "Book-Rating".
 
         query:  A string. Value to serach for. 
 
         num_books:  Int. The number of books to extract. 
                     Defualt is 10.
+
+        authors:    The author index of df (see build_author_index).
+                    If None, built from df.
+
+        min_ave_rating, min_num_ratings:
+                    Rating filters, as in search_wrapper.filter_ratings.
+                    Only passing books are selected. 0 turns a filter off.
+
+        spelling:   Optional spelling.SpellingIndex over the authors of
+                    df. If no author is close enough to suggest, the error
+                    suggests spelling corrections instead.
+
+        as_records: If True, return a result_records.ResultRecords, with
+                    the match ratios as scores, instead of a dataframe.
     Returns: 
-        A dataframe containing the selected books. 
+        A dataframe containing the selected books, highest Book-Rating
+        first, with the match ratio in column "ratio".
 
     Exceptions:
         If no match on author field >.75, raise ValueError.      
     """
-    #calculate match ratio
-    df['ratio'] = df.apply(lambda row: fuzz.ratio(row['author'], query), axis=1)
-    df_sorted = df.sort_values(by = "ratio",
-                               ascending = False).reset_index(drop=True)
-
-
-    # filter the database to only those rows with match > ratio
-    result = df_sorted[df_sorted["ratio"] > 75]
-    if result.empty:
-        # Offer suggestions if there are matches with 50 < ratio < 75
-        suggestions = []
-        for idx in range(3):
-            if df_sorted.iloc[idx]["ratio"] > 50:
-                auth = df_sorted.iloc[idx]["author"]
-                if not auth in suggestions:
-                    suggestions.append(auth)
-
-        err_msg = "That author does not appear in our database."
-        if not suggestions:
-            err_msg += " Perhaps you can try plot search."
-        else:
-            err_msg += " Perhaps you meant one of these authors: "
-            for suggestion in suggestions:
-                err_msg += f"{suggestion}, "
-                err_msg = err_msg[:-2] + "?"
-
-        raise ValueError(err_msg)
-
-    results_sorted = result.sort_values(by='Book-Rating', ascending=False)
-    results = results_sorted.head(num_books)
-    return results
+    if authors is None:
+        authors = HelperFunctions.build_author_index(df)
+    elif len(authors["codes"]) != df.shape[0]:
+        raise ValueError("The author index does not match the data")
+
+    # calculate match ratio, once per distinct author that can score over
+    # 50; the others stay at 0 as they can neither match nor be suggested
+    from thefuzz import fuzz  # pylint: disable=import-outside-toplevel
+    candidates = HelperFunctions.fuzzy_candidates(authors["chars"], query)
+    ratios = np.zeros(len(authors["authors"]), dtype=np.int64)
+    ratios[candidates] = [fuzz.ratio(author, query)
+                          for author in authors["authors"][candidates]]
+
+    # keep the books of authors with match > ratio
+    matched = np.flatnonzero(ratios > 75)
+    if matched.size == 0:
+        raise ValueError(_author_error(authors, ratios, query, spelling))
+
+    # select the best rated passing books of the matching authors
+    books = np.concatenate([authors["rows"][a] for a in matched])
+    keep = HelperFunctions.rating_mask(df, min_ave_rating, min_num_ratings,
+                                       rows=books)
+    if keep is not None:
+        books = books[keep]
+    book_ranks = authors["rank"][books]
+    if books.size > num_books > 0:
+        top = np.argpartition(book_ranks, num_books - 1)[:num_books]
+        books, book_ranks = books[top], book_ranks[top]
+    books = books[np.argsort(book_ranks)][:num_books]
+    return _results(df, books, as_records,
+                    scores=ratios[authors["codes"][books]], score_name="ratio")
+
+def _author_error(authors, ratios, query, spelling=None):
+    """
+    Builds the error message for an author search without a match.
 
-def genre_search(data_frame, genre, num_books=10):
+    Offers as suggestions the authors of the three best matching books,
+    if their match ratio is over 50, or else up to three spelling
+    corrections of query, if a spelling index is given.
+    """
+    suggestions = []
+    books_seen = 0
+    for author in np.argsort(-ratios, kind="stable"):
+        if books_seen >= 3:
+            break
+        books_seen += len(authors["rows"][author])
+        if ratios[author] > 50:
+            suggestions.append(authors["authors"][author])
+    if not suggestions and spelling is not None:
+        suggestions = spelling.suggest(query, 3)
+
+    err_msg = "That author does not appear in our database."
+    if not suggestions:
+        err_msg += " Perhaps you can try plot search."
+    else:
+        err_msg += " Perhaps you meant one of these authors: "
+        for suggestion in suggestions:
+            err_msg += f"{suggestion}, "
+            err_msg = err_msg[:-2] + "?"
+    return err_msg
+
+# pylint: disable=too-many-arguments
+def genre_search(data_frame, genre, num_books=10, genres=None,
+                 min_ave_rating=0.0, min_num_ratings=0, as_records=False):
     """
     Search for books within a specified genre and return the top-rated books.
 
-    This function filters a DataFrame for books that match the specified genre,
-    sorts these books by their rating,
-    and returns the specified number of top-rated books within this genre.
+    This function walks the genre's leaderboard, its books deduplicated
+    by title and sorted by rating (see build_genre_index), and returns
+    the specified number of top-rated books within this genre that pass
+    the rating filters. Genres can be combined with AND and OR, e.g.
+    "Fantasy AND Young Adult" (see genre_query_rows).
 
     Parameters:
     - data_frame (pandas.DataFrame): The DataFrame containing book data.
-    - genre (str): The genre to filter the books by.
+    - genre (str): The genre to filter the books by, or several joined
+        by AND / OR.
     - num_books (int, optional): The number of top-rated books to return. 
         Defaults to 10.
+    - genres (dict, optional): The genre index of data_frame. If None,
+        built from data_frame.
+    - min_ave_rating (float, optional): If not 0.0, only books with a
+        Book-Rating over it are returned, as in filter_ratings.
+    - min_num_ratings (int, optional): If not 0, only books with a
+        RatingCount over it are returned, as in filter_ratings.
+    - as_records (bool, optional): If True, return a
+        result_records.ResultRecords instead of a DataFrame.
 
     Returns:
     - pandas.DataFrame: A DataFrame containing the top-rated books within the 
         specified genre.
     """
-    # Filter books by the specified genre
-    filtered_books = data_frame[data_frame['generic_genre'] == genre]
-    filtered_books = filtered_books.drop_duplicates(subset = "book_title")
-
-    # Sort the filtered DataFrame by book rating in descending order
-    # and select the top `num_books`
-    top_rated_books =  filtered_books.sort_values(by='Book-Rating',
-                            ascending=False).head(num_books)
-
-    return top_rated_books
+    if genres is None:
+        genres = HelperFunctions.build_genre_index(data_frame)
+    elif len(genres["rating"]) != data_frame.shape[0]:
+        raise ValueError("The genre index does not match the data")
+
+    if " AND " in genre or " OR " in genre:
+        leaderboard = HelperFunctions.genre_query_rows(genres, genre)
+    else:
+        leaderboard = genres["genres"].get(genre,
+                                           np.array([], dtype=np.intp))
+    if min_ave_rating == 0.0 and min_num_ratings == 0:
+        return _results(data_frame, leaderboard[:num_books], as_records)
+
+    # walk the leaderboard a block at a time until enough books pass
+    selected = [leaderboard[:0]]
+    found = 0
+    step = max(num_books * 4, 64)
+    for start in range(0, len(leaderboard), step):
+        block = leaderboard[start:start + step]
+        keep = np.ones(len(block), dtype=bool)
+        if min_ave_rating != 0.0:
+            keep &= genres["rating"][block] > min_ave_rating
+        if min_num_ratings != 0:
+            keep &= genres["count"][block] > min_num_ratings
+        selected.append(block[keep])
+        found += selected[-1].size
+        if found >= num_books:
+            break
+    return _results(data_frame, np.concatenate(selected)[:num_books],
+                    as_records)
+
+def _results(df, rows, as_records, scores=None, score_name=None):
+    """
+    Returns the books at rows of df, as a ResultRecords if as_records,
+    else as the dataframe slice (see ResultRecords.to_frame).
+    """
+    records = result_records.ResultRecords.from_rows(df, rows, scores,
+                                                     score_name)
+    return records if as_records else records.to_frame()
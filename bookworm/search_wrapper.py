@@ -14,8 +14,8 @@ SEARCH ALGORYTHM HIGH-LEVEL SUMMARY
             based on pre-processed semantic search distances. Books returned
             sorted by distance.  
         - Error raised if no close match in database to user entered title
-        - Data used = "complete_w_embeddings.csv" as assembled by 
-            helper functions
+        - Data used = "complete_w_embeddings.csv" as loaded from the
+            binary catalog store
     - Step 2: Results from Semantic Search Filtered by user slider inputs
 
 (B)  For search mode Author1 ("Books similar to those by my favorite author")
@@ -29,15 +29,17 @@ SEARCH ALGORYTHM HIGH-LEVEL SUMMARY
             based on pre-processed semantic search distances. Books returned
             sorted by distance.  
         - Error raised if no close match in database to user entered title
-        - Data used = "complete_w_embeddings.csv" as assembled by 
-            helper functions.
+        - Data used = "complete_w_embeddings.csv" as loaded from the
+            binary catalog store.
+        - Steps 1 and 2 run concurrently on two threads.
     - Step 3: Combine results of Step 1 and Step 2, by alternating rows in df
+        and dropping repeated books (see interleave_results)
     - Step 4: Combined results from step 3 filtered by user slider inputs
 
 (C) For search mode Plot ("Books similar to my favorite plot")
     - Step1: Perform "plot_semantic_search" (pure semantic search) 
-        - Data used = "complete_w_embeddings.csv" as assembled by 
-            helper functions
+        - Data used = "complete_w_embeddings.csv" as loaded from the
+            binary catalog store
     - Step 2: Results from plot_semantic_search Filtered by user slider inputs
 
 (D) For search mode Author2 ("Most popular books by my favorite "author")
@@ -63,24 +65,103 @@ assemble_data(path1, path2, path3, path4)
 assemble_embeddings_data():
     Functions that assembles the data with embeddings
 
+load_embeddings_data():
+    Loads the data with embeddings from the binary catalog store.
+
+load_ratings_data():
+    Loads the data with ratings used for author matching.
+
+load_genre_data():
+    Loads the data with standardized genres.
+
+load_keyword_index(columns):
+    Loads the pre-fitted keyword index over the given columns, fitting it
+    if it has not been built.
+
+get_exact_index(column):
+    Returns the exact-match dictionary over a column of the catalog.
+
+get_author_index():
+    Returns the distinct-author index over the ratings data.
+
+get_genre_index():
+    Returns the per-genre leaderboards over the genre data.
+
+get_prefix_index(column):
+    Returns the autocomplete index over a column of the catalog.
+
+get_spelling_index(column):
+    Returns the spelling index over a column of the catalog, for "did you
+    mean" suggestions.
+
+get_neighbors():
+    Returns the neighbor lookup for Title and Author1 search; serves
+    neighbors beyond the pre-processed 21 and caches them per book.
+
+complete(search_mode, prefix, num_results=10):
+    Returns completions of a partly typed title or author.
+
+CATALOG
+    Process-wide catalog; loads each data set above once per process.
+
+RESULTS
+    Process-wide cache of search results (see search_wrapper); emptied when
+    the catalog is reloaded. RESULTS.stats and RESULTS.hit_rate() report
+    how often it is hit.
+
+SEARCH_MODES
+    The search modes select_search supports.
+
+COMPLETION_COLUMNS
+    The column completed for each search mode with completions.
+
+warm_up(search_modes=None)
+    Loads everything the given search modes need, ahead of their first
+    search.
+
+interleave_results(results1, results2):
+    Alternates the rows of two search results, dropping repeated books.
+
 filter_ratings(results, min_ave_ratings, min_num_rating):
     Filters serach results by user ratings prefrences. 
 
-select_search(search_mode, search_value, min_ave_rating, 
-                  min_num_ratings, num_book=10)
+select_search(search_mode, search_value, num_books=10, min_ave_rating=0.0,
+              min_num_ratings=0, as_frame=False)
     Selects and implements search based on user search mode.
 
 search_wrapper(search_mode, search_value, min_ave_rating, 
-                   min_num_ratings, num_books=10)
-    Searches and filters book databse based on given inputs. 
+                   min_num_ratings, num_books=10, as_frame=False)
+    Searches and filters book databse based on given inputs. Returns
+    compact result records (see result_records); as_frame=True returns a
+    dataframe instead.
+
+search_wrapper_batch(requests)
+    Runs many searches at once, for offline bulk recommendation runs.
+    Errors are returned per request instead of raised.
     
 """
 
+from concurrent.futures import ThreadPoolExecutor
 try:
     import search
+    import catalog
+    import keyword_index
+    import knn_graph
+    import result_cache
+    import autocomplete
+    import spelling
+    import result_records
 except ImportError:
     # pylint: disable=consider-using-from-import
     import bookworm.search as search
+    import bookworm.catalog as catalog
+    import bookworm.keyword_index as keyword_index
+    import bookworm.knn_graph as knn_graph
+    import bookworm.result_cache as result_cache
+    import bookworm.autocomplete as autocomplete
+    import bookworm.spelling as spelling
+    import bookworm.result_records as result_records
+import numpy as np
 import pandas as pd
 
 def assemble_data(path1, path2, path3, path4):
@@ -118,6 +199,216 @@ def assemble_embeddings_data():
     path4 = path_root + "_part_4.csv"
     return assemble_data(path1, path2, path3, path4)
 
+def load_embeddings_data():
+    """
+    Loads the data with embeddings from the binary catalog store.
+
+    Falls back to reassembling the csv parts if the store has not been
+    built (see scripts/build_catalog.py).
+    """
+    try:
+        return catalog.load_catalog_store()
+    except FileNotFoundError:
+        return assemble_embeddings_data()
+
+def load_ratings_data():
+    """
+    Loads the data with ratings used for author matching.
+    """
+    return pd.read_csv("data/complete_w_ratings.csv")
+
+def load_genre_data():
+    """
+    Loads the data with standardized genres.
+    """
+    try:
+        return pd.read_csv("bookworm/data/genre.csv")
+    except FileNotFoundError:
+        return pd.read_csv("data/genre.csv")
+
+def load_keyword_index(columns):
+    """
+    Loads the pre-fitted keyword index over the given columns.
+
+    If the index has not been built (see scripts/build_keyword_indexes.py),
+    it is fitted over the embeddings data instead, once per process,
+    rather than on every query.
+    """
+    name = keyword_index.index_name(columns)
+    try:
+        return keyword_index.KeywordIndex.load(name)
+    except FileNotFoundError:
+        return keyword_index.KeywordIndex.fit(
+            search.HelperFunctions.combine_columns(CATALOG.embeddings(),
+                                                   columns))
+
+def _load_search_ready_embeddings_data():
+    """
+    Loads the data with embeddings, prepared once for keyword search.
+
+    Missing values are filled and the lowercased search text is
+    precomputed, so query_to_index never modifies a view of the cached
+    data.
+    """
+    return search.HelperFunctions.add_search_text(load_embeddings_data())
+
+def get_exact_index(column):
+    """
+    Returns the exact-match dictionary over a column of the catalog.
+
+    Built from the embeddings data on first use, then shared.
+    """
+    return CATALOG.derived(
+        ("exact_index", column),
+        lambda: search.HelperFunctions.build_exact_index(
+            CATALOG.embeddings(), column, CATALOG.keyword_index([column])))
+
+def get_author_index():
+    """
+    Returns the distinct-author index over the ratings data.
+
+    Built from the ratings data on first use, then shared.
+    """
+    return CATALOG.derived(
+        "author_index",
+        lambda: search.HelperFunctions.build_author_index(CATALOG.ratings()))
+
+def get_genre_index():
+    """
+    Returns the per-genre leaderboards over the genre data.
+
+    Built from the genre data on first use, then shared.
+    """
+    return CATALOG.derived(
+        "genre_index",
+        lambda: search.HelperFunctions.build_genre_index(CATALOG.genre()))
+
+def get_neighbors():
+    """
+    Returns the neighbor lookup for Title and Author1 search.
+
+    Built once per catalog version, like the indexes above: after
+    CATALOG.clear() the kept rankings are dropped and the pre-processed
+    graph is read again (see search.get_indices).
+    """
+    return CATALOG.derived(
+        "neighbors",
+        lambda: knn_graph.NeighborLookup(
+            lambda: search.get_indices(CATALOG.version),
+            CATALOG.embedding_matrix))
+
+def get_prefix_index(column):
+    """
+    Returns the autocomplete index over a column of the catalog.
+
+    Titles are taken from the embeddings data, which title search runs
+    over, and authors from the ratings data. Built on first use, then
+    shared.
+    """
+    def build():
+        df = CATALOG.embeddings() if column == "book_title" \
+            else CATALOG.ratings()
+        return autocomplete.PrefixIndex.build(df[column], df["RatingCount"])
+    return CATALOG.derived(("prefix_index", column), build)
+
+def get_spelling_index(column):
+    """
+    Returns the spelling index over a column of the catalog, for "did you
+    mean" suggestions.
+
+    Drawn from the same data as get_prefix_index. Built on first use, then
+    shared.
+    """
+    def build():
+        df = CATALOG.embeddings() if column == "book_title" \
+            else CATALOG.ratings()
+        return spelling.SpellingIndex(df[column], df["RatingCount"])
+    return CATALOG.derived(("spelling_index", column), build)
+
+def complete(search_mode, prefix, num_results=autocomplete.MAX_RESULTS):
+    """
+    Returns completions of a partly typed search value.
+
+    Paramaters
+        search_mode: A string. Title, Author1 and Author2 values are
+            completed; other modes have no completions.
+        prefix: A string, the value typed so far.
+        num_results: The most completions returned.
+    Returns
+        A list of titles or authors starting with prefix (after
+        normalization), most rated first.
+    """
+    column = COMPLETION_COLUMNS.get(search_mode)
+    if column is None:
+        return []
+    return get_prefix_index(column).complete(prefix, num_results)
+
+CATALOG = catalog.Catalog(load_ratings_data,
+                          _load_search_ready_embeddings_data,
+                          load_genre_data,
+                          catalog.load_normalized_embeddings,
+                          load_keyword_index)
+
+RESULTS = result_cache.ResultCache()
+
+SEARCH_MODES = ["Title", "Author1", "Plot", "Author2", "Genre"]
+
+COMPLETION_COLUMNS = {"Title": "book_title", "Author1": "author",
+                      "Author2": "author"}
+
+def warm_up(search_modes=None):
+    """
+    Loads everything the given search modes need, ahead of their first
+    search.
+
+    Afterwards searches in those modes are served from memory (apart from
+    the voyageai call for Plot queries not in the embedding cache).
+
+    Paramaters
+        search_modes: A list of search modes, e.g. ["Title", "Genre"]. If
+            None, all of them.
+    """
+    search_modes = set(SEARCH_MODES if search_modes is None
+                       else search_modes)
+    if search_modes & {"Title", "Author1", "Plot"}:
+        CATALOG.embeddings()
+        CATALOG.embedding_matrix()
+    for search_mode, column in [("Title", "book_title"),
+                                ("Author1", "author")]:
+        if search_mode in search_modes:
+            CATALOG.keyword_index([column])
+            get_exact_index(column)
+            search.get_indices(CATALOG.version)
+    if search_modes & {"Author1", "Author2"}:
+        get_author_index()
+    for column in {COMPLETION_COLUMNS[search_mode]
+                   for search_mode in search_modes & set(COMPLETION_COLUMNS)}:
+        get_prefix_index(column)
+        get_spelling_index(column)
+    if "Plot" in search_modes:
+        search.get_query_embeddings()
+    if "Genre" in search_modes:
+        get_genre_index()
+
+def interleave_results(results1, results2):
+    """
+    Alternates the rows of two search results, dropping repeated books.
+
+    Rows are taken as results1[0], results2[0], results1[1], ... and a
+    book (by book_id) is kept where it first appears. The order is worked
+    out on row ids, and the frame is assembled once.
+
+    Parameters:
+        results1, results2: Dataframes of search results, each with a
+            "book_id" column.
+    Returns:
+        A dataframe with a fresh index.
+    """
+    order = result_records.interleave_order(results1["book_id"].to_numpy(),
+                                            results2["book_id"].to_numpy())
+    combined = pd.concat([results1, results2], ignore_index=True)
+    return combined.iloc[order].reset_index(drop=True)
+
 # Filter
 def filter_ratings(results, min_ave_ratings, min_num_rating):
 
@@ -129,12 +420,13 @@ def filter_ratings(results, min_ave_ratings, min_num_rating):
     min_num_ratings if min_num_ratings > 0. 
     
     Paramaters
-        Results: The search results to be filterd. Must be a df with 
-            columns "Book-Ratings" and "Rating Count".
+        Results: The search results to be filterd. Must be a df, or a
+            result_records.ResultRecords, with columns "Book-Ratings" and
+            "Rating Count".
         min_ave_ratings:  A float. The min ave ratings to filter
         min-num_ratings: An int.  The min number of ratings to filter on.
     Returns: 
-        A dataframe of filtered results
+        The filtered results, of the same type as results.
     """
 
     if not "Book-Rating" in results.columns:
@@ -142,6 +434,14 @@ def filter_ratings(results, min_ave_ratings, min_num_rating):
     if not "RatingCount" in results.columns:
         raise ValueError("Your data must have a RatingCount column")
 
+    if isinstance(results, result_records.ResultRecords):
+        keep = np.ones(len(results), dtype=bool)
+        if min_ave_ratings != 0.0:
+            keep &= results.column("Book-Rating") > min_ave_ratings
+        if min_num_rating != 0:
+            keep &= results.column("RatingCount") > min_num_rating
+        return results.take(np.flatnonzero(keep))
+
     if min_ave_ratings != 0.0:
         subset_df = results[results['Book-Rating'] > min_ave_ratings]
     else:
@@ -152,7 +452,9 @@ def filter_ratings(results, min_ave_ratings, min_num_rating):
         results_filtered = subset_df
     return results_filtered
 
-def select_search(search_mode, search_value, num_books=10):
+# pylint: disable=too-many-arguments
+def select_search(search_mode, search_value, num_books=10, min_ave_rating=0.0,
+                  min_num_ratings=0, as_frame=False):
     """
     Selects and implements search based on user search mode.
 
@@ -162,77 +464,358 @@ def select_search(search_mode, search_value, num_books=10):
         search_value: str
             The value to search for.
         num_books: int, optional
-            The number of books to return from the search, pre-filtering.
+            The number of books to return from the search.
+        min_ave_rating, min_num_ratings: optional
+            The rating filters (see filter_ratings). Each search applies
+            them while selecting books, so filtering does not leave it
+            short of books.
+        as_frame: bool, optional
+            If True, return a dataframe (see ResultRecords.to_frame).
 
     Returns:
-        pandas.DataFrame
-            A dataframe of search results.
+        result_records.ResultRecords
+            The search results, which copy no columns of the catalog.
     """
+    # the rating filters are applied inside each search, so every mode
+    # returns num_books results whenever enough books pass them
+    filters = {"min_ave_rating": min_ave_rating,
+               "min_num_ratings": min_num_ratings}
     if search_mode == "Author1":
 
-        df_r = pd.read_csv("data/complete_w_ratings.csv")
-        results1 = search.author2_search(df_r, search_value,
-                                        num_books=max(num_books * 2, 20))
-
-        df_e = assemble_embeddings_data()
-        results2 = search.semantic_search(df_e, search_value, ["author"],
-                                         num_books=max(num_books * 2, 20))
-
-       # Concatenate the dataframes by alternating rows
-        combined_df = pd.DataFrame()
-        for i in range(max(len(results1), len(results2))):
-            if i < results1.shape[0]:
-                combined_df = pd.concat([combined_df, results1.iloc[[i]]])
-            if i < results2.shape[0]:
-                combined_df = pd.concat([combined_df, results2.iloc[[i]]])
-        combined_df = combined_df.drop_duplicates(subset=['book_title'])
-        combined_df.reset_index(drop=True, inplace=True)
-        results = combined_df
+        # both halves over-fetch, as the same book can appear in both;
+        # they share no state, so they run side by side
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            future1 = pool.submit(
+                search.author2_search, CATALOG.ratings(), search_value,
+                num_books=max(num_books * 2, 20),
+                authors=get_author_index(),
+                spelling=get_spelling_index("author"), as_records=True,
+                **filters)
+            future2 = pool.submit(
+                search.semantic_search, CATALOG.embeddings(), search_value,
+                ["author"], num_books=max(num_books * 2, 20),
+                index=CATALOG.keyword_index(["author"]),
+                exact=get_exact_index("author"), lookup=get_neighbors(),
+                spelling=get_spelling_index("author"), as_records=True,
+                **filters)
+            results = future1.result().interleave(future2.result())
 
     elif search_mode == "Title":
-        df = assemble_embeddings_data()
+        df = CATALOG.embeddings()
+        index = CATALOG.keyword_index(["book_title"])
         results = search.semantic_search(df, search_value, ["book_title"],
-                                         num_books=max(num_books * 2, 20))
+                                         num_books=num_books,
+                                         index=index,
+                                         exact=get_exact_index("book_title"),
+                                         lookup=get_neighbors(),
+                                         spelling=get_spelling_index(
+                                             "book_title"),
+                                         as_records=True, **filters)
     elif search_mode == "Plot":
-        df = assemble_embeddings_data()
-        results = search.plot_semantic_search(df, search_value,
-                                              num_books=max(num_books * 2, 20))
+        df = CATALOG.embeddings()
+        results = search.plot_semantic_search(
+            df, search_value, num_books=num_books,
+            embeddings=CATALOG.embedding_matrix(), as_records=True,
+            **filters)
     elif search_mode == "Author2":
-        df = pd.read_csv("data/complete_w_ratings.csv")
+        df = CATALOG.ratings()
         results = search.author2_search(df, search_value,
-                                        num_books=max(num_books * 2, 20))
+                                        num_books=num_books,
+                                        authors=get_author_index(),
+                                        spelling=get_spelling_index("author"),
+                                        as_records=True, **filters)
 
     else: #search_mode == "Genre"
-        try:
-            genre_df = pd.read_csv("bookworm/data/genre.csv")
-        except FileNotFoundError:
-            genre_df = pd.read_csv("data/genre.csv")
+        genre_df = CATALOG.genre()
         results = search.genre_search(genre_df, search_value,
-                                      num_books=max(num_books * 2, 20))
+                                      num_books=num_books,
+                                      genres=get_genre_index(),
+                                      as_records=True, **filters)
 
-    return results
+    return results.to_frame() if as_frame else results
 
+# pylint: disable=too-many-arguments
 def search_wrapper(search_mode, search_value, min_ave_rating,
-                   min_num_ratings, num_books=10):
+                   min_num_ratings, num_books=10, as_frame=False):
     """
     Searches and filters based on given inputs. 
 
     Assembles data to search over; calls proper search function given user 
     preferred search mode; and filters results based on user filters.
 
+    Candidate lists, before rating filters, are cached in RESULTS by
+    search mode, search value (whitespace folded) and num_books, so
+    repeated searches and slider changes do not search again. Only if too
+    few cached candidates pass the filters is the search re-run with the
+    filters applied inside it (and that result cached too).
+
+    Results are result_records.ResultRecords, which keep only the rows
+    found, so a cached result holds a few rows rather than the catalog.
+
     Paramaters
         Search_mode: A string. 
         Search_value: A string. 
         min_ave_ratings: A float. The min ave ratings to filter
         min-num_ratings: An int.  The min number of ratings to filter on.
         num_books: # of books returned from the search, pre-filtering.
+        as_frame: If True, return a dataframe with every column (see
+            ResultRecords.to_frame) instead.
     Returns
-        A dataframe of filtered search results. 
+        A ResultRecords of filtered search results; see
+        ResultRecords.project for the columns to show.
     """
+    search_value = result_cache.normalize_search_value(search_value)
+    key = (search_mode, search_value, num_books)
 
     # search
-    results = select_search(search_mode, search_value, num_books)
+    results = _cached_search(key, max(num_books * 2, 20))
 
     #filter
     results_filtered = filter_ratings(results, min_ave_rating, min_num_ratings)
-    return results_filtered.head(num_books)
+    if len(results_filtered) < num_books and \
+            (min_ave_rating != 0.0 or min_num_ratings != 0):
+        results = _cached_search(key + (min_ave_rating, min_num_ratings),
+                                 num_books)
+        results_filtered = filter_ratings(results, min_ave_rating,
+                                          min_num_ratings)
+    results_filtered = results_filtered.head(num_books)
+    return results_filtered.to_frame() if as_frame else results_filtered
+
+def _cached_search(key, num_books):
+    """
+    Returns select_search results for a RESULTS key, searching on a miss.
+
+    The key is (search_mode, search_value, requested books) plus, for
+    filtered searches, (min_ave_rating, min_num_ratings).
+    """
+    results = RESULTS.get(key, CATALOG.version)
+    if results is None:
+        results = select_search(key[0], key[1], num_books, *key[3:])
+        RESULTS.put(key, results, CATALOG.version)
+    return results
+
+def search_wrapper_batch(requests):
+    """
+    Runs many searches at once, for offline bulk recommendation runs.
+
+    Requests are grouped by search mode and each group is resolved in
+    bulk:
+        - Plot: queries are embedded with one client call per chunk of
+          embedding_cache.BATCH_SIZE queries, then scored against the
+          catalog with one matrix product per block of
+          search.QUERY_BLOCK_SIZE queries.
+        - Title and Author1: queries are matched to books by exact lookup,
+          and the rest with one sparse keyword product per block (see
+          search.HelperFunctions.queries_to_indices).
+        - Author2 and Genre: each request is served from the prebuilt
+          indexes by select_search.
+    Rating masks are built once per distinct pair of filters. Filters are
+    applied inside each search, as in search_wrapper's filtered search;
+    RESULTS is not used.
+
+    Paramaters
+        requests: An iterable of requests, each a dictionary keyed by
+            search_wrapper's parameter names (search_mode and
+            search_value required), or a tuple in search_wrapper's
+            parameter order.
+    Returns
+        A list with one entry per request, in input order: a dataframe of
+        filtered search results, or the ValueError search_wrapper raises
+        for that request.
+    """
+    requests = [_batch_request(request) for request in requests]
+    groups = {}
+    for position, request in enumerate(requests):
+        groups.setdefault(request["search_mode"], []).append(position)
+
+    results = [None] * len(requests)
+    for search_mode, positions in groups.items():
+        group = [requests[position] for position in positions]
+        if search_mode == "Plot":
+            found = _batch_plot(group)
+        elif search_mode in ("Title", "Author1"):
+            found = _batch_semantic(search_mode, group)
+        else:
+            found = []
+            for request in group:
+                try:
+                    found.append(_trim(request, select_search(
+                        search_mode, request["search_value"],
+                        request["num_books"], *request["filters"],
+                        as_frame=True)))
+                except ValueError as error:
+                    found.append(error)
+        for position, result in zip(positions, found):
+            results[position] = result
+    return results
+
+def _batch_request(request):
+    """
+    Returns a request for search_wrapper_batch as a complete dictionary.
+
+    Missing filters and num_books take search_wrapper's defaults, the
+    search value is whitespace folded, and the two filters are also kept
+    together under "filters".
+    """
+    if not isinstance(request, dict):
+        request = dict(zip(["search_mode", "search_value", "min_ave_rating",
+                            "min_num_ratings", "num_books"], request))
+    request = dict({"min_ave_rating": 0.0, "min_num_ratings": 0,
+                    "num_books": 10}, **request)
+    request["search_value"] = result_cache.normalize_search_value(
+        request["search_value"])
+    request["filters"] = (request["min_ave_rating"],
+                          request["min_num_ratings"])
+    return request
+
+def _trim(request, results):
+    """
+    Filters the results of a batch request and keeps num_books of them.
+    """
+    results = filter_ratings(results, *request["filters"])
+    return results.head(request["num_books"])
+
+def _rating_masks(df, group):
+    """
+    Returns the rating mask of each distinct pair of filters in a group.
+    """
+    masks = {}
+    for request in group:
+        if request["filters"] not in masks:
+            masks[request["filters"]] = search.HelperFunctions.rating_mask(
+                df, *request["filters"])
+    return masks
+
+def _batch_plot(group):
+    """
+    Runs a group of Plot requests with few embedding calls.
+    """
+    df = CATALOG.embeddings()
+    embeddings = CATALOG.embedding_matrix()
+    masks = _rating_masks(df, group)
+    found, embedded, queries = _embed_plot_queries(group)
+
+    for start in range(0, len(embedded), search.QUERY_BLOCK_SIZE):
+        block = embedded[start:start + search.QUERY_BLOCK_SIZE]
+        # one column of cosine similarities per query
+        similarities = embeddings @ queries[start:start + len(block)].T
+        for column, position in enumerate(block):
+            request = group[position]
+            rows = search.HelperFunctions.top_k_indices(
+                similarities[:, column], request["num_books"],
+                masks[request["filters"]])
+            found[position] = _trim(request, df.iloc[rows])
+    return found
+
+def _embed_plot_queries(group):
+    """
+    Embeds the queries of a group of Plot requests.
+
+    Queries are embedded a chunk of the cache's batch_size at a time. If
+    the client fails on a chunk, each of its requests gets a ValueError
+    and the other chunks are still embedded.
+
+    Returns
+        A tuple (found, embedded, queries): a list with the ValueError of
+        each failed request and None for the others, the positions in
+        group of the embedded requests, and their normalized embeddings.
+    """
+    query_embeddings = search.get_query_embeddings()
+    found = [None] * len(group)
+    embedded, vectors = [], []
+    for start in range(0, len(group), query_embeddings.batch_size):
+        chunk = range(start, min(start + query_embeddings.batch_size,
+                                 len(group)))
+        try:
+            vectors.append(query_embeddings.embed_many(
+                [group[position]["search_value"] for position in chunk]))
+        # Use of a general exception to deal with broad API Errors.
+        except Exception as error:  # pylint: disable=broad-exception-caught
+            for position in chunk:
+                found[position] = ValueError(
+                    f"Could not embed the plot description: {error}")
+            continue
+        embedded.extend(chunk)
+    if not embedded:
+        return found, embedded, None
+    return found, embedded, catalog.normalize_rows(np.vstack(vectors))
+
+def _batch_semantic(search_mode, group):
+    """
+    Runs a group of Title or Author1 requests, matching queries in bulk.
+    """
+    column = "author" if search_mode == "Author1" else "book_title"
+    df = CATALOG.embeddings()
+    masks = _rating_masks(df, group)
+    rows = _batch_query_rows(df, [request["search_value"]
+                                  for request in group], column)
+
+    found = []
+    for request, row in zip(group, rows):
+        try:
+            found.append(_trim(request, _semantic_request(
+                search_mode, request, row, df, masks[request["filters"]])))
+        except ValueError as error:
+            found.append(error)
+    return found
+
+def _semantic_request(search_mode, request, row, df, keep):
+    """
+    Runs one Title or Author1 request from its matched book row.
+
+    Raises the ValueError of select_search: for Author1, the author
+    search's error comes first, as there.
+    """
+    if search_mode == "Title":
+        if isinstance(row, ValueError):
+            raise row
+        neighbors = search.HelperFunctions.get_semantic_results(
+            row, request["num_books"], keep=keep, lookup=get_neighbors())
+        return df.iloc[np.asarray(neighbors, dtype=np.intp)]
+
+    # Author1 over-fetches, as in select_search
+    num_books = max(request["num_books"] * 2, 20)
+    authored = search.author2_search(
+        CATALOG.ratings(), request["search_value"], num_books=num_books,
+        authors=get_author_index(), min_ave_rating=request["min_ave_rating"],
+        min_num_ratings=request["min_num_ratings"],
+        spelling=get_spelling_index("author"))
+    if isinstance(row, ValueError):
+        raise row
+    neighbors = search.HelperFunctions.get_semantic_results(
+        row, num_books, keep=keep, lookup=get_neighbors())
+    return interleave_results(authored,
+                              df.iloc[np.asarray(neighbors, dtype=np.intp)])
+
+def _batch_query_rows(df, queries, column):
+    """
+    Matches keyword queries to book rows in bulk, as query_to_index does.
+
+    Returns a list with, per query, the row of the closest book or the
+    ValueError query_to_index raises when there is no close match.
+    """
+    exact = get_exact_index(column)
+    rows = [exact.get(search.HelperFunctions.normalize_key(query))
+            for query in queries]
+    missing = [position for position, row in enumerate(rows) if row is None]
+    if missing:
+        matches = search.HelperFunctions.queries_to_indices(
+            df, [queries[position] for position in missing], [column],
+            index=CATALOG.keyword_index([column]))
+        for position, match in zip(missing, matches.itertuples(index=False)):
+            if match.found:
+                rows[position] = match.best_index
+            else:
+                rows[position] = search.HelperFunctions.no_match_error(
+                    column, _suggestion(queries[position], match, column))
+    return rows
+
+def _suggestion(query, match, column):
+    """
+    Returns the value to suggest for an unmatched query, as query_to_index
+    picks it: the closest book if close enough, else a spelling
+    correction, else None.
+    """
+    if match.score > 0.5:
+        return match.suggestion
+    return next(iter(get_spelling_index(column).suggest(query)), None)
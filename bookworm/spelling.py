@@ -0,0 +1,207 @@
+"""
+Module with spelling indexes for "did you mean" suggestions.
+
+When a title or author query misses, the search suggests the closest
+book or author it scored. A misspelled word matches no keyword and shares
+few characters in the right order, so misspelled queries often got no
+suggestion at all. A SpellingIndex corrects them with hash lookups only,
+in the manner of SymSpell (symmetric delete spelling correction):
+
+    - every word of every value is stored under each string obtained by
+      deleting up to MAX_EDIT_DISTANCE characters from its first
+      PREFIX_LENGTH characters
+    - a query word looks up the same deletes of itself; any word within
+      the edit distance shares one of them, so only the words found need
+      their true edit distance checked
+
+Each query word is replaced by its closest word (ties go to the word in
+most values), and the suggestion is the value holding all corrected
+words with the fewest other words, most rated first.
+
+Words are normalized like the exact-match keys of title search (see
+search.HelperFunctions.normalize_key).
+
+CLASSES
+=======
+SpellingIndex(values, weights)
+    Symmetric delete index over the words of a column of values.
+
+FUNCTIONS
+=========
+edit_distance(word1, word2, max_distance)
+    Returns the optimal string alignment distance of two words.
+
+deletes(word, max_distance)
+    Returns the strings made by deleting up to max_distance characters.
+"""
+
+from collections import defaultdict
+import numpy as np
+try:
+    import search
+    import autocomplete
+except ImportError:
+    # pylint: disable=consider-using-from-import
+    import bookworm.search as search
+    import bookworm.autocomplete as autocomplete
+
+# the most characters a word may be off by
+MAX_EDIT_DISTANCE = 2
+
+# characters of each word that deletes are made from
+PREFIX_LENGTH = 7
+
+
+def edit_distance(word1, word2, max_distance):
+    """
+    Returns the optimal string alignment distance of two words.
+
+    Insertions, deletions, substitutions and swaps of two adjacent
+    characters each count as one edit.
+
+    Parameters:
+        word1, word2: Strings.
+        max_distance: Int. Distances over it are not worked out.
+    Returns:
+        The distance, or max_distance + 1 if it is over max_distance.
+    """
+    if abs(len(word1) - len(word2)) > max_distance:
+        return max_distance + 1
+    # the rows of the two characters of word1 before the current one
+    previous = row = list(range(len(word2) + 1))
+    for i in range(1, len(word1) + 1):
+        before, previous, row = previous, row, [i] + [0] * len(word2)
+        for j in range(1, len(word2) + 1):
+            cost = word1[i - 1] != word2[j - 1]
+            row[j] = min(previous[j] + 1, row[j - 1] + 1,
+                         previous[j - 1] + cost)
+            if i > 1 and j > 1 and word1[i - 1] == word2[j - 2] \
+                    and word1[i - 2] == word2[j - 1]:
+                row[j] = min(row[j], before[j - 2] + 1)
+        if min(row) > max_distance:
+            return max_distance + 1
+    return min(row[-1], max_distance + 1)
+
+
+def deletes(word, max_distance):
+    """
+    Returns the strings made by deleting up to max_distance characters.
+
+    Parameters:
+        word: A string.
+        max_distance: Int.
+    Returns:
+        A set of strings, including word itself.
+    """
+    found = {word}
+    level = {word}
+    for _ in range(max_distance):
+        level = {variant[:i] + variant[i + 1:]
+                 for variant in level for i in range(len(variant))}
+        found |= level
+    return found
+
+
+def _max_distance(word):
+    """
+    Returns the edit distance allowed for a word: none up to 2
+    characters, 1 up to 4 and MAX_EDIT_DISTANCE after that.
+    """
+    return min(MAX_EDIT_DISTANCE, (len(word) - 1) // 2)
+
+
+class SpellingIndex:
+    """
+    Symmetric delete index over the words of a column of values.
+
+    Built once from a column of the catalog, then shared read-only, so it
+    is safe to use from several threads.
+    """
+
+    def __init__(self, values, weights):
+        """
+        Parameters:
+            values: A pandas series of strings, e.g. df["author"].
+            weights: A pandas series of weights, e.g. df["RatingCount"],
+                aligned with values. Values are grouped by key as in
+                autocomplete.group_values.
+        """
+        keys, self.labels, self.weights = autocomplete.group_values(values,
+                                                                    weights)
+        self.lengths = np.zeros(len(self.labels), dtype=np.int64)
+
+        # word -> values holding it; delete -> words it was made from
+        self.postings = defaultdict(list)
+        for value, key in enumerate(keys):
+            words = set(key.split())
+            self.lengths[value] = len(words)
+            for word in words:
+                self.postings[word].append(value)
+        self.postings = dict(self.postings)
+        self.deletes = defaultdict(list)
+        for word in self.postings:
+            for variant in deletes(word[:PREFIX_LENGTH], MAX_EDIT_DISTANCE):
+                self.deletes[variant].append(word)
+        self.deletes = dict(self.deletes)
+
+    def __len__(self):
+        return len(self.labels)
+
+    def correct(self, word):
+        """
+        Returns the closest indexed word to a normalized word.
+
+        Parameters:
+            word: A normalized word (see normalize_key).
+        Returns:
+            The word itself if indexed, else the closest word within its
+            allowed edit distance (ties go to the word in most values),
+            or None.
+        """
+        if word in self.postings:
+            return word
+        max_distance = _max_distance(word)
+        best, best_rank = None, None
+        seen = set()
+        for variant in deletes(word[:PREFIX_LENGTH], max_distance):
+            for candidate in self.deletes.get(variant, ()):
+                if candidate in seen:
+                    continue
+                seen.add(candidate)
+                distance = edit_distance(word, candidate, max_distance)
+                if distance > max_distance:
+                    continue
+                rank = (distance, -len(self.postings[candidate]), candidate)
+                if best_rank is None or rank < best_rank:
+                    best, best_rank = candidate, rank
+        return best
+
+    def suggest(self, query, num_results=1):
+        """
+        Returns the values a misspelled query most likely meant.
+
+        Parameters:
+            query: A string.
+            num_results: Int. The most suggestions returned.
+        Returns:
+            A list of values holding every word of the query that could be
+            corrected (words that could not are dropped), those with the
+            fewest other words first, then the most rated. Empty if no
+            word could be corrected.
+        """
+        words = set()
+        for word in search.HelperFunctions.normalize_key(query).split():
+            corrected = self.correct(word)
+            if corrected is not None:
+                words.add(corrected)
+        if not words:
+            return []
+
+        # intersect the postings, shortest first
+        postings = sorted((self.postings[word] for word in words), key=len)
+        values = set(postings[0])
+        for posting in postings[1:]:
+            values.intersection_update(posting)
+        values = np.fromiter(values, dtype=np.int64, count=len(values))
+        order = np.lexsort((-self.weights[values], self.lengths[values]))
+        return self.labels[values[order[:num_results]]].tolist()
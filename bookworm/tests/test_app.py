@@ -13,6 +13,8 @@ Test Cases:
     its behavior.
 - Test each UI element function individually by patching Streamlit functions
     and asserting their output.
+- Test the encoded images and the warm-up are shared across reruns.
+- Test completions are offered for partly typed titles and authors.
 
 Dependencies:
 - unittest: The built-in unit testing framework in Python.
@@ -25,6 +27,7 @@ Run this module to execute the unit tests for the Streamlit UI functions.
 
 """
 
+import base64
 import unittest
 from unittest.mock import patch
 
@@ -34,12 +37,14 @@ try:
     from app import (main, display_avg_ratings_slider,
                      display_num_ratings_slider, display_search_mode_ui,
                      display_search_value_ui, display_genre_dropdown,
-                     display_search_button)
+                     display_search_button, display_suggestions,
+                     encode_image, start_warm_up)
 except ImportError:
     from bookworm.app import (main, display_avg_ratings_slider,
                      display_num_ratings_slider, display_search_mode_ui,
                      display_search_value_ui, display_genre_dropdown,
-                     display_search_button)
+                     display_search_button, display_suggestions,
+                     encode_image, start_warm_up)
 
 
 class TestStreamlitUI(unittest.TestCase):
@@ -84,10 +89,30 @@ class TestStreamlitUI(unittest.TestCase):
 
     def test_display_search_value_ui(self):
         """Test display_search_value_ui function."""
-        with patch('streamlit.text_input') as mock_text_input:
+        with patch('streamlit.text_input') as mock_text_input, \
+                patch('app.complete') as mock_complete:
             mock_text_input.return_value = "The Great Gatsby"
+            mock_complete.return_value = []
             result = display_search_value_ui("Title")
             self.assertEqual(result, "The Great Gatsby")
+            mock_complete.assert_called_once_with("Title", "The Great Gatsby")
+
+    def test_display_suggestions(self):
+        """Test display_suggestions function."""
+        with patch('streamlit.selectbox') as mock_selectbox, \
+                patch('app.complete') as mock_complete:
+            mock_complete.return_value = ["Dune", "Dune Messiah"]
+            mock_selectbox.return_value = "Dune Messiah"
+            self.assertEqual(display_suggestions("Title", "dune m"),
+                             "Dune Messiah")
+            mock_selectbox.assert_called_once()
+            self.assertEqual(mock_selectbox.call_args[0][1],
+                             ["dune m", "Dune", "Dune Messiah"])
+
+            # nothing to suggest if the input is already a completion
+            mock_selectbox.reset_mock()
+            self.assertEqual(display_suggestions("Title", "dune"), "dune")
+            mock_selectbox.assert_not_called()
 
     def test_display_genre_dropdown(self):
         """Test display_genre_dropdown function."""
@@ -109,6 +134,24 @@ class TestStreamlitUI(unittest.TestCase):
             result = display_search_button()
             self.assertTrue(result)
 
+    def test_encode_image(self):
+        """Test encode_image reads each image once."""
+        encode_image.clear()
+        first = encode_image("images/butterfly.png")
+        with patch('builtins.open') as mock_open:
+            self.assertEqual(encode_image("images/butterfly.png"), first)
+            mock_open.assert_not_called()
+        self.assertEqual(base64.b64decode(first)[:4], b'\x89PNG')
+
+    def test_start_warm_up(self):
+        """Test start_warm_up warms the search data once."""
+        start_warm_up.clear()
+        with patch('app.warm_up') as mock_warm_up:
+            thread = start_warm_up()
+            thread.join()
+            self.assertIs(start_warm_up(), thread)
+            mock_warm_up.assert_called_once_with()
+
     # def test_execute_query(self):
     #     """Test execute_query function."""
     #     with patch('streamlit.write') as mock_write:
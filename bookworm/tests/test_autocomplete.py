@@ -0,0 +1,119 @@
+"""
+Module: test_autocomplete
+
+This module contains unit tests for the autocomplete module.
+
+Test Functions in TestPrefixIndex Class
+=======================================
+test_ranked_by_weight(self):
+    Confirm completions come most rated first, ties in key order.
+
+test_grouped_keys(self):
+    Confirm values with the same key are one weighted completion.
+
+test_normalized_prefix(self):
+    Confirm prefixes are normalized like the keys.
+
+test_missing_values(self):
+    Confirm missing values are skipped and missing weights count as 0.
+
+test_precomputed_ranges(self):
+    Confirm precomputed completions match a scan of every key.
+
+Dependencies:
+- unittest: The built-in unit testing framework in Python.
+- pandas: A library for data manipulation and analysis.
+- numpy: A library for numerical manipulation.
+
+Usage:
+Run this module to execute the unit tests for the autocomplete module.
+
+"""
+import unittest
+from unittest.mock import patch
+import numpy as np
+import pandas as pd
+try:
+    import autocomplete
+except ImportError:
+    from bookworm import autocomplete
+
+
+class TestPrefixIndex(unittest.TestCase):
+    """
+    Test cases for the prefix index
+    """
+
+    def setUp(self):
+        """
+        Builds an index over a few titles.
+        """
+        self.titles = pd.Series(["Dune", "Dune Messiah", "Children of Dune",
+                                 "Dune: House Atreides", "Dubliners",
+                                 "Emma"])
+        self.counts = pd.Series([50, 20, 30, 20, 5, 40])
+        self.index = autocomplete.PrefixIndex.build(self.titles, self.counts)
+
+    def test_ranked_by_weight(self):
+        """
+        Confirm completions come most rated first, ties in key order.
+        """
+        self.assertEqual(self.index.complete("du"),
+                         ["Dune", "Dune: House Atreides", "Dune Messiah",
+                          "Dubliners"])
+        self.assertEqual(self.index.complete("dune", num_results=2),
+                         ["Dune", "Dune: House Atreides"])
+        self.assertEqual(self.index.complete("x"), [])
+
+    def test_grouped_keys(self):
+        """
+        Confirm values with the same key are one weighted completion.
+        """
+        index = autocomplete.PrefixIndex.build(
+            pd.Series(["Emma", "EMMA", "Emma.", "Emily"]),
+            pd.Series([1, 5, 3, 8]))
+        self.assertEqual(len(index), 2)
+        # Emma weighs 1 + 5 + 3 and is shown as its most rated spelling
+        self.assertEqual(index.complete("em"), ["EMMA", "Emily"])
+
+    def test_normalized_prefix(self):
+        """
+        Confirm prefixes are normalized like the keys.
+        """
+        self.assertEqual(self.index.complete("  DUNE:  house"),
+                         ["Dune: House Atreides"])
+        self.assertEqual(self.index.complete(" ?! "), [])
+
+    def test_missing_values(self):
+        """
+        Confirm missing values are skipped and missing weights count as 0.
+        """
+        df = pd.read_csv("data/test_data/test_data.csv")
+        index = autocomplete.PrefixIndex.build(df["author"], df["RatingCount"])
+        self.assertEqual(len(index), df["author"].dropna().nunique())
+        self.assertEqual(index.complete("frank")[0], "Frank Herbert")
+
+    def test_precomputed_ranges(self):
+        """
+        Confirm precomputed completions match a scan of every key.
+        """
+        rng = np.random.default_rng(0)
+        words = ["a", "ab", "abc", "b", "ba"]
+        titles = pd.Series([" ".join(rng.choice(words, rng.integers(1, 4)))
+                            for _ in range(300)])
+        counts = pd.Series(rng.integers(0, 20, len(titles)))
+        with patch.object(autocomplete, "PRECOMPUTE_RANGE", 4):
+            index = autocomplete.PrefixIndex.build(titles, counts)
+        # pylint: disable=protected-access
+        self.assertGreater(len(index._precomputed), 0)
+        for prefix in {key[:length].strip() for key in index.keys
+                       for length in range(1, 6)}:
+            matching = [i for i, key in enumerate(index.keys)
+                        if key.startswith(prefix)]
+            expected = sorted(matching, key=lambda i: -index.weights[i])
+            self.assertEqual(index.complete(prefix),
+                             index.labels[expected[:10]].tolist())
+
+
+if __name__ == '__main__':
+    unittest.main()
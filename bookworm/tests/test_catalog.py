@@ -0,0 +1,312 @@
+"""
+Module: test_catalog
+
+This module contains unit tests for the catalog module.
+
+Test Functions in TestCatalogStore Class
+========================================
+test_parse_embeddings(self):
+    Confirm stringified embeddings are parsed into a float32 matrix.
+
+test_parse_embeddings_missing(self):
+    Confirm missing embeddings are filled with zeros.
+
+test_normalize_rows(self):
+    Confirm rows are scaled to unit length and zero rows are kept.
+
+test_build_requires_embeddings(self):
+    Confirm ValueError raised if data has no embeddings column.
+
+test_store_round_trip(self):
+    Confirm the store loads back the same books and embeddings.
+
+test_load_missing_store(self):
+    Confirm FileNotFoundError raised if the store was never built.
+
+test_normalized_store(self):
+    Confirm the normalized matrix is memory-mapped read-only.
+
+test_append_to_store(self):
+    Confirm appended books follow the existing ones in the store.
+
+Test Functions in TestCatalog Class
+===================================
+test_loads_once(self):
+    Confirm each dataset is loaded only on first request.
+
+test_views_do_not_leak(self):
+    Confirm columns added to a view never reach the cached data.
+
+test_views_share_data(self):
+    Confirm views share the cached arrays instead of copying them.
+
+test_alignment_error(self):
+    Confirm ValueError raised if book ids do not line up.
+
+test_clear(self):
+    Confirm clear drops loaded datasets and bumps the version.
+
+test_embedding_matrix_fallback(self):
+    Confirm the matrix is computed from the embeddings data if not stored.
+
+test_embedding_matrix_mismatch(self):
+    Confirm ValueError raised if the matrix does not match the data.
+
+test_keyword_index(self):
+    Confirm keyword indexes are loaded once and missing ones give None.
+
+Dependencies:
+- unittest: The built-in unit testing framework in Python.
+- pandas: A library for data manipulation and analysis.
+- numpy: A library for numerical manipulation.
+
+Usage:
+Run this module to execute the unit tests for the catalog module.
+
+"""
+import ast
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+import numpy as np
+import pandas as pd
+try:
+    import catalog
+except ImportError:
+    from bookworm import catalog
+
+
+class TestCatalogStore(unittest.TestCase):
+    """
+    Test cases for building and loading the binary catalog store
+    """
+
+    def setUp(self):
+        """
+        Creates and loads testing data.
+        """
+        f_embed = "data/test_data/test_data_w_embeddings.csv"
+        self.test_dat_e = pd.read_csv(f_embed)
+        self.tmp_dir = tempfile.mkdtemp()
+        self.store_dir = os.path.join(self.tmp_dir, "catalog")
+
+    def tearDown(self):
+        """
+        Removes the temporary store.
+        """
+        shutil.rmtree(self.tmp_dir)
+
+    def test_parse_embeddings(self):
+        """
+        Confirm stringified embeddings are parsed into a float32 matrix.
+        """
+        matrix = catalog.parse_embeddings(self.test_dat_e["embeddings"])
+        expected = ast.literal_eval(self.test_dat_e["embeddings"][3])
+        self.assertEqual(matrix.dtype, np.float32)
+        self.assertEqual(matrix.shape, (11, len(expected)))
+        np.testing.assert_allclose(matrix[3], expected, rtol=1e-6)
+
+    def test_parse_embeddings_missing(self):
+        """
+        Confirm missing embeddings are filled with zeros.
+        """
+        series = pd.Series(["[1.0, 2.0]", None, [3.0, 4.0]])
+        matrix = catalog.parse_embeddings(series)
+        expected = np.array([[1, 2], [0, 0], [3, 4]], dtype=np.float32)
+        np.testing.assert_array_equal(matrix, expected)
+
+    def test_normalize_rows(self):
+        """
+        Confirm rows are scaled to unit length and zero rows are kept.
+        """
+        matrix = catalog.normalize_rows([[3.0, 4.0], [0.0, 0.0]])
+        expected = np.array([[0.6, 0.8], [0.0, 0.0]], dtype=np.float32)
+        np.testing.assert_allclose(matrix, expected)
+        self.assertEqual(matrix.dtype, np.float32)
+
+    def test_build_requires_embeddings(self):
+        """
+        Confirm ValueError raised if data has no embeddings column.
+        """
+        df = self.test_dat_e.drop(columns=["embeddings"])
+        with self.assertRaisesRegex(ValueError, "embeddings column"):
+            catalog.build_catalog_store(df, self.store_dir)
+
+    def test_store_round_trip(self):
+        """
+        Confirm the store loads back the same books and embeddings.
+        """
+        matrix = catalog.build_catalog_store(self.test_dat_e, self.store_dir)
+        loaded = catalog.load_catalog_store(self.store_dir)
+
+        self.assertEqual(list(loaded.columns), list(self.test_dat_e.columns))
+        pd.testing.assert_series_equal(loaded["book_title"],
+                                       self.test_dat_e["book_title"])
+        np.testing.assert_array_equal(np.stack(loaded["embeddings"]), matrix)
+
+    def test_load_missing_store(self):
+        """
+        Confirm FileNotFoundError raised if the store was never built.
+        """
+        with self.assertRaises(FileNotFoundError):
+            catalog.load_catalog_store(self.store_dir)
+
+    def test_normalized_store(self):
+        """
+        Confirm the normalized matrix is memory-mapped read-only.
+        """
+        matrix = catalog.build_catalog_store(self.test_dat_e, self.store_dir)
+        normalized = catalog.load_normalized_embeddings(self.store_dir)
+        self.assertIsInstance(normalized, np.memmap)
+        self.assertFalse(normalized.flags.writeable)
+        np.testing.assert_allclose(normalized, catalog.normalize_rows(matrix))
+        np.testing.assert_allclose(np.linalg.norm(normalized, axis=1), 1,
+                                   rtol=1e-5)
+
+    def test_append_to_store(self):
+        """
+        Confirm appended books follow the existing ones in the store.
+        """
+        catalog.build_catalog_store(self.test_dat_e[:8], self.store_dir)
+        old, new = catalog.append_to_catalog_store(self.test_dat_e[8:],
+                                                   self.store_dir)
+        self.assertEqual((old.shape[0], new.shape[0]), (8, 3))
+        loaded = catalog.load_catalog_store(self.store_dir)
+        self.assertEqual(loaded["book_title"].tolist(),
+                         self.test_dat_e["book_title"].tolist())
+        np.testing.assert_array_equal(
+            np.stack(loaded["embeddings"]),
+            catalog.parse_embeddings(self.test_dat_e["embeddings"]))
+        self.assertEqual(catalog.load_normalized_embeddings(
+            self.store_dir).shape[0], 11)
+
+
+class TestCatalog(unittest.TestCase):
+    """
+    Test cases for the process-wide Catalog
+    """
+
+    def setUp(self):
+        """
+        Creates a catalog over the test data with mock loaders.
+        """
+        self.test_dat_r = pd.read_csv("data/test_data/test_data.csv")
+        self.test_dat_g = pd.read_csv("data/test_data/test_genre.csv")
+        self.loaders = [mock.Mock(return_value=self.test_dat_r),
+                        mock.Mock(return_value=self.test_dat_r),
+                        mock.Mock(return_value=self.test_dat_g)]
+        self.catalog = catalog.Catalog(*self.loaders)
+
+    def test_loads_once(self):
+        """
+        Confirm each dataset is loaded only on first request.
+        """
+        for _ in range(3):
+            self.catalog.ratings()
+            self.catalog.embeddings()
+        self.assertEqual(self.loaders[0].call_count, 1)
+        self.assertEqual(self.loaders[1].call_count, 1)
+        self.loaders[2].assert_not_called()
+        self.assertFalse(self.catalog.is_loaded("genre"))
+
+    def test_views_do_not_leak(self):
+        """
+        Confirm columns added to a view never reach the cached data.
+        """
+        view = self.catalog.ratings()
+        view["ratio"] = 0
+        view["author"] = "Replaced"
+        fresh = self.catalog.ratings()
+        self.assertNotIn("ratio", fresh.columns)
+        self.assertEqual(fresh["author"][0], "K. W. Jeter")
+
+    def test_views_share_data(self):
+        """
+        Confirm views share the cached arrays instead of copying them.
+        """
+        first = self.catalog.ratings()
+        second = self.catalog.ratings()
+        self.assertIsNot(first, second)
+        for column in ["book_id", "Book-Rating"]:
+            self.assertTrue(np.shares_memory(first[column].to_numpy(),
+                                             second[column].to_numpy()))
+
+    def test_alignment_error(self):
+        """
+        Confirm ValueError raised if book ids do not line up.
+        """
+        unknown = self.test_dat_r.assign(book_id=-1)
+        bad_catalog = catalog.Catalog(lambda: self.test_dat_r,
+                                      lambda: unknown,
+                                      lambda: self.test_dat_g)
+        bad_catalog.embeddings()
+        with self.assertRaisesRegex(ValueError, "inconsistent"):
+            bad_catalog.ratings()
+
+    def test_clear(self):
+        """
+        Confirm clear drops loaded datasets and bumps the version.
+        """
+        self.catalog.genre()
+        self.assertEqual(self.catalog.version, 0)
+        self.catalog.clear()
+        self.assertFalse(self.catalog.is_loaded("genre"))
+        self.assertEqual(self.catalog.version, 1)
+        self.catalog.genre()
+        self.assertEqual(self.loaders[2].call_count, 2)
+
+    def test_embedding_matrix_fallback(self):
+        """
+        Confirm the matrix is computed from the embeddings data if not stored.
+        """
+        test_dat_e = pd.read_csv("data/test_data/test_data_w_embeddings.csv")
+        missing = mock.Mock(side_effect=FileNotFoundError)
+        embed_catalog = catalog.Catalog(lambda: self.test_dat_r,
+                                        lambda: test_dat_e,
+                                        lambda: self.test_dat_g,
+                                        missing)
+        matrix = embed_catalog.embedding_matrix()
+        self.assertEqual(matrix.shape[0], test_dat_e.shape[0])
+        self.assertFalse(matrix.flags.writeable)
+        self.assertIs(embed_catalog.embedding_matrix(), matrix)
+        missing.assert_called_once()
+
+    def test_embedding_matrix_mismatch(self):
+        """
+        Confirm ValueError raised if the matrix does not match the data.
+        """
+        embed_catalog = catalog.Catalog(lambda: self.test_dat_r,
+                                        lambda: self.test_dat_r,
+                                        lambda: self.test_dat_g,
+                                        lambda: np.zeros((3, 4)))
+        embed_catalog.embeddings()
+        with self.assertRaisesRegex(ValueError, "inconsistent"):
+            embed_catalog.embedding_matrix()
+
+    def test_keyword_index(self):
+        """
+        Confirm keyword indexes are loaded once and missing ones give None.
+        """
+        index = mock.Mock()
+        index.__len__ = mock.Mock(return_value=self.test_dat_r.shape[0])
+
+        def load_index(columns):
+            if columns != ["book_title"]:
+                raise FileNotFoundError(columns)
+            return index
+
+        index_loader = mock.Mock(side_effect=load_index)
+        index_catalog = catalog.Catalog(lambda: self.test_dat_r,
+                                        lambda: self.test_dat_r,
+                                        lambda: self.test_dat_g,
+                                        index_loader=index_loader)
+        self.assertIs(index_catalog.keyword_index(["book_title"]), index)
+        self.assertIs(index_catalog.keyword_index(["book_title"]), index)
+        self.assertIsNone(index_catalog.keyword_index(["author"]))
+        self.assertEqual(index_loader.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
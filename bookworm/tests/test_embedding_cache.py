@@ -0,0 +1,224 @@
+"""
+Module: test_embedding_cache
+
+This module contains unit tests for the embedding_cache module.
+
+Test Functions in TestEmbeddingCache Class
+==========================================
+test_normalize_query(self):
+    Confirm case and whitespace are folded.
+
+test_memory_hits(self):
+    Confirm repeated queries are served from memory, and the client gets
+    the query as typed.
+
+test_lru_eviction(self):
+    Confirm the least recently used query is evicted first.
+
+test_disk_persists(self):
+    Confirm a new cache on the same file is served from disk.
+
+test_disk_limit(self):
+    Confirm the sqlite file keeps only the most recently used vectors.
+
+test_model_in_key(self):
+    Confirm vectors are not shared between models.
+
+test_embed_many(self):
+    Confirm a batch sends only its distinct misses, in one call.
+
+test_embed_many_chunks(self):
+    Confirm misses are sent in chunks, and chunks before a failure kept.
+
+Dependencies:
+- unittest: The built-in unit testing framework in Python.
+- numpy: A library for numerical manipulation.
+
+Usage:
+Run this module to execute the unit tests for the embedding_cache module.
+
+"""
+import os
+import shutil
+import tempfile
+import unittest
+from types import SimpleNamespace
+import numpy as np
+try:
+    import embedding_cache
+except ImportError:
+    from bookworm import embedding_cache
+
+
+class StubClient:  # pylint: disable=too-few-public-methods
+    """
+    Local stand-in for the voyageai client, with deterministic embeddings.
+    """
+
+    def __init__(self):
+        self.calls = []
+
+    def embed(self, texts, model, input_type):
+        """
+        Returns one vector per text derived from its characters.
+        """
+        self.calls.append((tuple(texts), model, input_type))
+        return SimpleNamespace(embeddings=[
+            [float(len(text)), float(sum(map(ord, text))), 1.0]
+            for text in texts])
+
+
+class TestEmbeddingCache(unittest.TestCase):
+    """
+    Test cases for the query embedding cache
+    """
+
+    def setUp(self):
+        """
+        Creates a stub client and a temporary sqlite path.
+        """
+        self.client = StubClient()
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmp_dir, "cache", "queries.sqlite")
+
+    def tearDown(self):
+        """
+        Removes the temporary sqlite file.
+        """
+        shutil.rmtree(self.tmp_dir)
+
+    def test_normalize_query(self):
+        """
+        Confirm case and whitespace are folded.
+        """
+        self.assertEqual(
+            embedding_cache.normalize_query("  A Boy\tWizard  at School "),
+            "a boy wizard at school")
+
+    def test_memory_hits(self):
+        """
+        Confirm repeated queries are served from memory, and the client gets
+        the query as typed.
+        """
+        cache = embedding_cache.EmbeddingCache(self.client)
+        first = cache.embed("A boy wizard")
+        second = cache.embed("a  boy wizard")
+        self.assertIs(first, second)
+        self.assertEqual(first.dtype, np.float32)
+        self.assertFalse(first.flags.writeable)
+        self.assertEqual(self.client.calls,
+                         [(("A boy wizard",), embedding_cache.MODEL,
+                           embedding_cache.INPUT_TYPE)])
+        self.assertEqual(cache.stats,
+                         {"hits": 1, "disk_hits": 0, "misses": 1})
+
+    def test_lru_eviction(self):
+        """
+        Confirm the least recently used query is evicted first.
+        """
+        cache = embedding_cache.EmbeddingCache(self.client, max_entries=2)
+        cache.embed("dune")
+        cache.embed("emma")
+        cache.embed("dune")
+        cache.embed("ulysses")
+        self.assertEqual(len(cache), 2)
+        cache.embed("dune")
+        cache.embed("emma")
+        self.assertEqual(cache.stats,
+                         {"hits": 2, "disk_hits": 0, "misses": 4})
+
+    def test_disk_persists(self):
+        """
+        Confirm a new cache on the same file is served from disk.
+        """
+        cache = embedding_cache.EmbeddingCache(self.client,
+                                               db_path=self.db_path)
+        expected = cache.embed("dune")
+        cache.close()
+
+        reopened = embedding_cache.EmbeddingCache(self.client,
+                                                  db_path=self.db_path)
+        np.testing.assert_array_equal(reopened.embed("DUNE"), expected)
+        reopened.embed("dune")
+        reopened.close()
+        self.assertEqual(len(self.client.calls), 1)
+        self.assertEqual(reopened.stats,
+                         {"hits": 1, "disk_hits": 1, "misses": 0})
+
+    def test_disk_limit(self):
+        """
+        Confirm the sqlite file keeps only the most recently used vectors.
+        """
+        cache = embedding_cache.EmbeddingCache(self.client, max_entries=1,
+                                               db_path=self.db_path,
+                                               max_disk_entries=2)
+        for query in ["dune", "emma", "ulysses"]:
+            cache.embed(query)
+        cache.clear()
+        cache.embed("emma")
+        cache.embed("ulysses")
+        cache.embed("dune")
+        cache.close()
+        self.assertEqual(cache.stats,
+                         {"hits": 0, "disk_hits": 2, "misses": 1})
+
+    def test_model_in_key(self):
+        """
+        Confirm vectors are not shared between models.
+        """
+        cache = embedding_cache.EmbeddingCache(self.client,
+                                               db_path=self.db_path)
+        cache.embed("dune")
+        cache.close()
+        other = embedding_cache.EmbeddingCache(self.client, model="other",
+                                               db_path=self.db_path)
+        other.embed("dune")
+        other.close()
+        self.assertEqual([call[1] for call in self.client.calls],
+                         [embedding_cache.MODEL, "other"])
+
+    def test_embed_many(self):
+        """
+        Confirm a batch sends only its distinct misses, in one call.
+        """
+        cache = embedding_cache.EmbeddingCache(self.client)
+        single = cache.embed("dune")
+        vectors = cache.embed_many(["Emma", "dune", "emma ", "ulysses"])
+        self.assertEqual(vectors.shape, (4, 3))
+        self.assertEqual(vectors.dtype, np.float32)
+        np.testing.assert_array_equal(vectors[1], single)
+        np.testing.assert_array_equal(vectors[0], vectors[2])
+        np.testing.assert_array_equal(vectors[3], cache.embed("ulysses"))
+        self.assertEqual([call[0] for call in self.client.calls],
+                         [("dune",), ("Emma", "ulysses")])
+        self.assertEqual(cache.stats,
+                         {"hits": 2, "disk_hits": 0, "misses": 3})
+
+
+    def test_embed_many_chunks(self):
+        """
+        Confirm misses are sent in chunks, and chunks before a failure kept.
+        """
+        cache = embedding_cache.EmbeddingCache(self.client, batch_size=2)
+        cache.embed_many(["a", "b", "c", "d", "e"])
+        self.assertEqual([call[0] for call in self.client.calls],
+                         [("a", "b"), ("c", "d"), ("e",)])
+
+        embed = self.client.embed
+
+        def fail_on_h(texts, **kwargs):
+            if "h" in texts:
+                raise RuntimeError("API down")
+            return embed(texts, **kwargs)
+
+        self.client.embed = fail_on_h
+        with self.assertRaisesRegex(RuntimeError, "API down"):
+            cache.embed_many(["f", "g", "h"])
+        self.assertEqual(cache.stats["misses"], 7)
+        num_calls = len(self.client.calls)
+        cache.embed_many(["f", "g"])
+        self.assertEqual(len(self.client.calls), num_calls)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+"""
+Module: test_import_time
+
+This module contains import-time tests for the search and search_wrapper
+modules. Each import runs in a fresh interpreter, from a directory other
+than the repository, without API_KEY set. Import time is compared with
+that of the modules' own dependencies, measured in the same interpreter,
+so the check does not depend on the speed of the machine.
+
+Test Functions in TestImportTime Class
+======================================
+test_search_import(self):
+    Confirm bookworm.search imports cheaply and loads nothing.
+
+test_search_wrapper_import(self):
+    Confirm bookworm.search_wrapper imports cheaply and loads nothing.
+
+Dependencies:
+- unittest: The built-in unit testing framework in Python.
+- subprocess: Runs each import in a fresh interpreter.
+
+Usage:
+Run this module to execute the import-time tests.
+
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))))
+
+# modules every search mode needs, imported first as the baseline
+BASELINE_MODULES = ["numpy", "pandas", "scipy.sparse"]
+
+# an import, after its baseline, may take at most this many times as
+# long as the baseline: generous for the modules' own code, which takes
+# a small fraction of it, but not for sklearn or voyageai
+IMPORT_BUDGET = 1.0
+
+# modules only the search modes that need them may import
+LAZY_MODULES = ["sklearn", "thefuzz", "voyageai", "dotenv"]
+
+REPORT = """
+import importlib, json, sys, time
+start = time.perf_counter()
+for name in {baseline}:
+    importlib.import_module(name)
+baseline = time.perf_counter() - start
+start = time.perf_counter()
+import bookworm.search as search
+import {module}
+print(json.dumps({{"baseline": baseline,
+                  "seconds": time.perf_counter() - start,
+                  "modules": sorted(sys.modules),
+                  "loaded": [search.indices is not None,
+                             search.query_embeddings is not None]}}))
+"""
+
+
+def import_report(module):
+    """
+    Imports a module in a fresh interpreter and reports what it cost.
+
+    Parameters:
+        module: The dotted module name.
+    Returns:
+        A dictionary with the "baseline" seconds of importing
+        BASELINE_MODULES, the import's "seconds" after them, the names of all
+        imported "modules", and whether the neighbor indices and query
+        embeddings of bookworm.search were "loaded".
+    """
+    env = {name: value for name, value in os.environ.items()
+           if name != "API_KEY"}
+    env["PYTHONPATH"] = ROOT
+    with tempfile.TemporaryDirectory() as cwd:
+        run = subprocess.run([sys.executable, "-c",
+                              REPORT.format(module=module,
+                                            baseline=BASELINE_MODULES)],
+                             cwd=cwd, env=env, capture_output=True,
+                             text=True, check=True)
+    return json.loads(run.stdout)
+
+
+class TestImportTime(unittest.TestCase):
+    """
+    Test cases for the cost of importing the search modules
+    """
+
+    def check_import(self, module):
+        """
+        Checks an import is within budget and loads no lazy resource.
+        """
+        report = import_report(module)
+        self.assertLess(report["seconds"],
+                        IMPORT_BUDGET * report["baseline"])
+        self.assertEqual(report["loaded"], [False, False])
+        for name in LAZY_MODULES:
+            self.assertNotIn(name, report["modules"])
+
+    def test_search_import(self):
+        """
+        Confirm bookworm.search imports cheaply and loads nothing.
+        """
+        self.check_import("bookworm.search")
+
+    def test_search_wrapper_import(self):
+        """
+        Confirm bookworm.search_wrapper imports cheaply and loads nothing.
+        """
+        self.check_import("bookworm.search_wrapper")
+
+
+if __name__ == '__main__':
+    unittest.main()
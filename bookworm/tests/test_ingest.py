@@ -0,0 +1,175 @@
+"""
+Module: test_ingest
+
+This module contains unit tests for the ingest module.
+
+Test Functions in TestAddBooks Class
+====================================
+test_catalog_after_add_books(self):
+    Confirm a Catalog over the updated data loads and sees the new books.
+
+test_genre_rows(self):
+    Confirm new books get a genre row per raw genre, mapped to its generic
+    genre.
+
+test_known_book_ids(self):
+    Confirm ValueError raised, and nothing written, for known book ids.
+
+test_missing_embeddings(self):
+    Confirm ValueError raised, and nothing written, for books with a
+    missing or all-zero embedding.
+
+Dependencies:
+- unittest: The built-in unit testing framework in Python.
+- pandas: A library for data manipulation and analysis.
+- numpy: A library for numerical manipulation.
+
+Usage:
+Run this module to execute the unit tests for the ingest module.
+
+"""
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+try:
+    import catalog
+    import ingest
+    import keyword_index
+    import knn_graph
+except ImportError:
+    from bookworm import catalog
+    from bookworm import ingest
+    from bookworm import keyword_index
+    from bookworm import knn_graph
+
+NUM_OLD = 8
+
+
+class TestAddBooks(unittest.TestCase):
+    """
+    Test cases for adding books to every search dataset
+    """
+
+    def setUp(self):
+        """
+        Writes consistent data for the first books of the test data to a
+        temporary directory; the other books are the ones to add.
+        """
+        embedded = pd.read_csv("data/test_data/test_data_w_embeddings.csv")
+        ratings = pd.read_csv("data/test_data/test_data.csv")
+        genres = pd.read_csv("data/test_data/test_genre.csv")
+        old_ids = embedded["book_id"][:NUM_OLD]
+        self.new_books = embedded[NUM_OLD:].drop(columns=["Unnamed: 0"])
+
+        self.tmp_dir = tempfile.mkdtemp()
+        self.paths = {
+            "ratings_path": os.path.join(self.tmp_dir, "ratings.csv"),
+            "genre_path": os.path.join(self.tmp_dir, "genre.csv"),
+            "store_dir": os.path.join(self.tmp_dir, "catalog"),
+            "graph_dir": self.tmp_dir,
+            "index_dir": os.path.join(self.tmp_dir, "keyword_index")}
+        ratings[ratings["book_id"].isin(old_ids)].to_csv(
+            self.paths["ratings_path"], index=False)
+        genres[genres["book_id"].isin(old_ids)].to_csv(
+            self.paths["genre_path"], index=False)
+        matrix = catalog.build_catalog_store(embedded[:NUM_OLD],
+                                             self.paths["store_dir"])
+        knn_graph.save_knn_graph(
+            *knn_graph.build_knn_graph(matrix, n_neighbors=4, n_jobs=1),
+            self.tmp_dir)
+
+    def tearDown(self):
+        """
+        Removes the temporary data.
+        """
+        shutil.rmtree(self.tmp_dir)
+
+    def test_catalog_after_add_books(self):
+        """
+        Confirm a Catalog over the updated data loads and sees the new books.
+        """
+        num_books = ingest.add_books(self.new_books, **self.paths)
+        self.assertEqual(num_books, NUM_OLD + self.new_books.shape[0])
+
+        def load_index(columns):
+            return keyword_index.KeywordIndex.load(
+                keyword_index.index_name(columns), self.paths["index_dir"])
+
+        updated = catalog.Catalog(
+            lambda: pd.read_csv(self.paths["ratings_path"]),
+            lambda: catalog.load_catalog_store(self.paths["store_dir"]),
+            lambda: pd.read_csv(self.paths["genre_path"]),
+            lambda: catalog.load_normalized_embeddings(
+                self.paths["store_dir"]),
+            load_index)
+        for data in [updated.ratings(), updated.embeddings()]:
+            self.assertEqual(data["book_id"].tolist()[NUM_OLD:],
+                             self.new_books["book_id"].tolist())
+        self.assertTrue(set(self.new_books["book_id"]) &
+                        set(updated.genre()["book_id"]))
+        self.assertEqual(updated.embedding_matrix().shape[0], num_books)
+        for columns in ingest.KEYWORD_COLUMNS:
+            self.assertEqual(len(updated.keyword_index(columns)), num_books)
+        indices = np.load(os.path.join(self.tmp_dir, knn_graph.INDICES_FILE))
+        self.assertEqual(indices.shape, (num_books, 4))
+
+    def test_genre_rows(self):
+        """
+        Confirm new books get a genre row per raw genre, mapped to its generic
+        genre.
+        """
+        genres = pd.DataFrame({
+            "book_id": [1, 1],
+            "genre": ["Speculative fiction", "Fiction"],
+            "generic_genre": ["Science Fiction", "Fiction"]})
+        new_books = pd.DataFrame({
+            "book_id": [2, 3],
+            "genre": ['{"/m/1": "Speculative fiction", "/m/2": "Satire"}',
+                      np.nan]})
+        rows = ingest.genre_rows(new_books, genres)
+        self.assertEqual(rows.columns.tolist(), genres.columns.tolist())
+        self.assertEqual(rows["book_id"].tolist(), [2, 2])
+        self.assertEqual(rows["genre"].tolist(),
+                         ["Speculative fiction", "Satire"])
+        self.assertEqual(rows["generic_genre"].tolist(),
+                         ["Science Fiction", ingest.OTHER_GENRE])
+
+    def test_known_book_ids(self):
+        """
+        Confirm ValueError raised, and nothing written, for known book ids.
+        """
+        ratings = pd.read_csv(self.paths["ratings_path"])
+        known = self.new_books.assign(book_id=ratings["book_id"][0])
+        with self.assertRaisesRegex(ValueError, "book ids"):
+            ingest.add_books(known, **self.paths)
+        pd.testing.assert_frame_equal(
+            pd.read_csv(self.paths["ratings_path"]), ratings)
+        self.assertEqual(
+            catalog.load_catalog_store(self.paths["store_dir"]).shape[0],
+            NUM_OLD)
+
+    def test_missing_embeddings(self):
+        """
+        Confirm ValueError raised, and nothing written, for books with a
+        missing or all-zero embedding.
+        """
+        ratings = pd.read_csv(self.paths["ratings_path"])
+        dim = catalog.parse_embeddings(self.new_books["embeddings"]).shape[1]
+        for embedding in [None, str([0.0] * dim)]:
+            new_books = self.new_books.copy()
+            new_books.iloc[0, new_books.columns.get_loc("embeddings")] = \
+                embedding
+            with self.assertRaisesRegex(ValueError, "embeddings"):
+                ingest.add_books(new_books, **self.paths)
+        pd.testing.assert_frame_equal(
+            pd.read_csv(self.paths["ratings_path"]), ratings)
+        self.assertEqual(
+            catalog.load_catalog_store(self.paths["store_dir"]).shape[0],
+            NUM_OLD)
+
+
+if __name__ == '__main__':
+    unittest.main()
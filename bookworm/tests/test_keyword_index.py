@@ -0,0 +1,105 @@
+"""
+Module: test_keyword_index
+
+This module contains unit tests for the keyword_index module.
+
+Test Functions in TestKeywordIndex Class
+========================================
+test_index_name(self):
+    Confirm index names join the column names.
+
+test_scores_match_refit(self):
+    Confirm index scores match a TfidfVectorizer fitted per query.
+
+test_save_load_round_trip(self):
+    Confirm a saved index loads back with identical scores.
+
+test_load_missing(self):
+    Confirm FileNotFoundError raised if the index was never built.
+
+Dependencies:
+- unittest: The built-in unit testing framework in Python.
+- pandas: A library for data manipulation and analysis.
+- numpy: A library for numerical manipulation.
+- sklearn: Used as the reference TF-IDF implementation.
+
+Usage:
+Run this module to execute the unit tests for the keyword_index module.
+
+"""
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics.pairwise import linear_kernel
+try:
+    import keyword_index
+except ImportError:
+    from bookworm import keyword_index
+
+
+class TestKeywordIndex(unittest.TestCase):
+    """
+    Test cases for the KeywordIndex class
+    """
+
+    def setUp(self):
+        """
+        Creates and loads testing data.
+        """
+        df = pd.read_csv("data/test_data/test_data_w_embeddings.csv")
+        self.texts = df["book_title"].str.lower()
+        self.queries = ["Book of Job", "dune", "the city of ladies", "gribnif"]
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """
+        Removes the temporary index directory.
+        """
+        shutil.rmtree(self.tmp_dir)
+
+    def test_index_name(self):
+        """
+        Confirm index names join the column names.
+        """
+        self.assertEqual(keyword_index.index_name(["book_title"]),
+                         "book_title")
+        self.assertEqual(keyword_index.index_name(["author", "genre"]),
+                         "author+genre")
+
+    def test_scores_match_refit(self):
+        """
+        Confirm index scores match a TfidfVectorizer fitted per query.
+        """
+        index = keyword_index.KeywordIndex.fit(self.texts)
+        vectorizer = TfidfVectorizer(stop_words='english').fit(self.texts)
+        for query in self.queries:
+            expected = linear_kernel(vectorizer.transform([query]),
+                                     vectorizer.transform(self.texts))
+            np.testing.assert_allclose(index.scores(query),
+                                       expected.flatten())
+
+    def test_save_load_round_trip(self):
+        """
+        Confirm a saved index loads back with identical scores.
+        """
+        index = keyword_index.KeywordIndex.fit(self.texts)
+        index.save("book_title", self.tmp_dir)
+        loaded = keyword_index.KeywordIndex.load("book_title", self.tmp_dir)
+        self.assertEqual(len(loaded), len(self.texts))
+        for query in self.queries:
+            np.testing.assert_allclose(loaded.scores(query),
+                                       index.scores(query))
+
+    def test_load_missing(self):
+        """
+        Confirm FileNotFoundError raised if the index was never built.
+        """
+        with self.assertRaises(FileNotFoundError):
+            keyword_index.KeywordIndex.load("author", self.tmp_dir)
+
+
+if __name__ == '__main__':
+    unittest.main()
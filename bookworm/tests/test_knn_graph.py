@@ -0,0 +1,239 @@
+"""
+Module: test_knn_graph
+
+This module contains unit tests for the knn_graph module.
+
+Test Functions in TestKnnGraph Class
+====================================
+test_matches_nearest_neighbors(self):
+    Confirm the graph matches the sklearn NearestNeighbors test graph.
+
+test_blocks_and_pool(self):
+    Confirm block size and worker processes do not change the graph.
+
+test_save_format(self):
+    Confirm saved arrays have the file names, dtypes and shapes expected.
+
+test_update_matches_rebuild(self):
+    Confirm adding books incrementally gives the same graph as rebuilding.
+
+test_update_small_graph(self):
+    Confirm a graph shorter than n_neighbors is extended to full length.
+
+Test Functions in TestNeighborLookup Class
+==========================================
+test_graph_tier(self):
+    Confirm pages within the graph are served without the embeddings.
+
+test_deep_pages(self):
+    Confirm pages past the graph follow the full cosine ranking.
+
+test_filtered_pages(self):
+    Confirm filtered pages skip books that do not pass.
+
+test_seed_cache(self):
+    Confirm rankings are kept for the most recently used seeds only.
+
+test_lazy_graph(self):
+    Confirm a graph loader is called once, on the first request.
+
+Dependencies:
+- unittest: The built-in unit testing framework in Python.
+- pandas: A library for data manipulation and analysis.
+- numpy: A library for numerical manipulation.
+
+Usage:
+Run this module to execute the unit tests for the knn_graph module.
+
+"""
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+try:
+    import catalog
+    import knn_graph
+except ImportError:
+    from bookworm import catalog
+    from bookworm import knn_graph
+
+
+class TestKnnGraph(unittest.TestCase):
+    """
+    Test cases for the blocked nearest-neighbors graph builder
+    """
+
+    def setUp(self):
+        """
+        Creates and loads testing data.
+
+        indices_test.npy and distances_test.npy were made by
+        sklearn's NearestNeighbors (semantic_scores_test_data.py).
+        """
+        df = pd.read_csv("data/test_data/test_data_w_embeddings.csv")
+        self.embeddings = catalog.parse_embeddings(df["embeddings"])
+        self.expected_ind = np.load("data/test_data/indices_test.npy")
+        self.expected_dist = np.load("data/test_data/distances_test.npy")
+
+    def test_matches_nearest_neighbors(self):
+        """
+        Confirm the graph matches the sklearn NearestNeighbors test graph.
+        """
+        distances, indices = knn_graph.build_knn_graph(self.embeddings,
+                                                       n_jobs=1)
+        np.testing.assert_array_equal(indices, self.expected_ind)
+        np.testing.assert_allclose(distances, self.expected_dist, atol=1e-6)
+
+    def test_blocks_and_pool(self):
+        """
+        Confirm block size and worker processes do not change the graph.
+        """
+        expected = knn_graph.build_knn_graph(self.embeddings, n_neighbors=5,
+                                             n_jobs=1)
+        for n_jobs in [1, 2]:
+            results = knn_graph.build_knn_graph(self.embeddings, n_neighbors=5,
+                                                block_size=3, n_jobs=n_jobs)
+            np.testing.assert_array_equal(results[1], expected[1])
+            np.testing.assert_allclose(results[0], expected[0], atol=1e-12)
+
+    def test_save_format(self):
+        """
+        Confirm saved arrays have the file names, dtypes and shapes expected.
+        """
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            distances, indices = knn_graph.build_knn_graph(self.embeddings,
+                                                           n_jobs=1)
+            knn_graph.save_knn_graph(distances, indices, tmp_dir)
+            saved_dist = np.load(os.path.join(tmp_dir,
+                                              "distances_updated.npy"))
+            saved_ind = np.load(os.path.join(tmp_dir, "indices_updated.npy"))
+        finally:
+            shutil.rmtree(tmp_dir)
+        self.assertEqual(saved_dist.dtype, self.expected_dist.dtype)
+        self.assertEqual(saved_ind.dtype, self.expected_ind.dtype)
+        self.assertEqual(saved_ind.shape, self.expected_ind.shape)
+
+    def test_update_matches_rebuild(self):
+        """
+        Confirm adding books incrementally gives the same graph as rebuilding.
+        """
+        expected_dist, expected_ind = knn_graph.build_knn_graph(
+            self.embeddings, n_neighbors=4, n_jobs=1)
+        old = self.embeddings[:7]
+        distances, indices = knn_graph.build_knn_graph(old, n_neighbors=4,
+                                                       n_jobs=1)
+        for block_size in [1, 512]:
+            results = knn_graph.update_knn_graph(old, distances, indices,
+                                                 self.embeddings[7:],
+                                                 block_size=block_size)
+            np.testing.assert_array_equal(results[1], expected_ind)
+            np.testing.assert_allclose(results[0], expected_dist, atol=1e-12)
+        # some existing rows must actually have been patched
+        self.assertFalse(np.array_equal(indices, expected_ind[:7]))
+
+    def test_update_small_graph(self):
+        """
+        Confirm a graph shorter than n_neighbors is extended to full length.
+        """
+        old = self.embeddings[:3]
+        distances, indices = knn_graph.build_knn_graph(old, n_jobs=1)
+        self.assertEqual(indices.shape, (3, 3))
+        results = knn_graph.update_knn_graph(old, distances, indices,
+                                             self.embeddings[3:])
+        np.testing.assert_array_equal(results[1], self.expected_ind)
+
+
+class TestNeighborLookup(unittest.TestCase):
+    """
+    Test cases for neighbor lookups deeper than the graph
+    """
+
+    def setUp(self):
+        """
+        Builds a 4 neighbor graph over the test embeddings.
+        """
+        df = pd.read_csv("data/test_data/test_data_w_embeddings.csv")
+        self.matrix = catalog.normalize_rows(
+            catalog.parse_embeddings(df["embeddings"]))
+        _, self.graph = knn_graph.build_knn_graph(self.matrix, n_neighbors=4)
+        self.loads = []
+        self.lookup = knn_graph.NeighborLookup(self.graph, self._load,
+                                               max_seeds=2)
+
+    def _load(self):
+        """
+        Returns the matrix, recording the call.
+        """
+        self.loads.append(1)
+        return self.matrix
+
+    def _ranking(self, seed):
+        """
+        Returns every book ranked by cosine similarity to seed.
+        """
+        return np.argsort(-(self.matrix @ self.matrix[seed]), kind="stable")
+
+    def test_graph_tier(self):
+        """
+        Confirm pages within the graph are served without the embeddings.
+        """
+        np.testing.assert_array_equal(self.lookup.neighbors(3, 2, offset=1),
+                                      self.graph[3][1:3])
+        self.assertEqual(self.loads, [])
+        self.assertEqual(self.lookup.stats["graph"], 1)
+
+    def test_deep_pages(self):
+        """
+        Confirm pages past the graph follow the full cosine ranking.
+        """
+        pages = [self.lookup.neighbors(5, 3, offset=offset)
+                 for offset in range(0, 12, 3)]
+        np.testing.assert_array_equal(np.concatenate(pages),
+                                      self._ranking(5))
+        np.testing.assert_array_equal(self._ranking(5)[:4], self.graph[5])
+        self.assertEqual(len(self.loads), 1)
+        self.assertEqual(self.lookup.stats["cached"], 2)
+
+    def test_filtered_pages(self):
+        """
+        Confirm filtered pages skip books that do not pass.
+        """
+        keep = np.arange(11) % 2 == 0
+        expected = [row for row in self._ranking(2) if keep[row]]
+        np.testing.assert_array_equal(
+            self.lookup.neighbors(2, 4, offset=1, keep=keep), expected[1:5])
+        graph_only = knn_graph.NeighborLookup(self.graph)
+        self.assertLessEqual(len(graph_only.neighbors(2, 4, keep=keep)), 4)
+
+    def test_seed_cache(self):
+        """
+        Confirm rankings are kept for the most recently used seeds only.
+        """
+        for seed in [0, 1, 0, 2, 0, 1]:
+            self.lookup.neighbors(seed, 10)
+        self.assertEqual(self.lookup.stats["live"], 4)
+        self.assertEqual(self.lookup.stats["cached"], 2)
+        self.lookup.clear()
+        self.lookup.neighbors(0, 10)
+        self.assertEqual(self.lookup.stats["live"], 5)
+
+    def test_lazy_graph(self):
+        """
+        Confirm a graph loader is called once, on the first request.
+        """
+        graph_loads = []
+        lookup = knn_graph.NeighborLookup(
+            lambda: graph_loads.append(1) or self.graph)
+        self.assertEqual(graph_loads, [])
+        lookup.neighbors(3, 2)
+        np.testing.assert_array_equal(lookup.neighbors(4, 2),
+                                      self.graph[4][:2])
+        self.assertIs(lookup.indices, self.graph)
+        self.assertEqual(graph_loads, [1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+"""
+Module: test_result_cache
+
+This module contains unit tests for the result_cache module.
+
+Test Functions in TestResultCache Class
+=======================================
+test_normalize_search_value(self):
+    Confirm whitespace is folded and case kept.
+
+test_hits_and_misses(self):
+    Confirm stored results are served and counted.
+
+test_lru_eviction(self):
+    Confirm the least recently used result is dropped first.
+
+test_ttl(self):
+    Confirm results expire ttl seconds after they are stored.
+
+test_version_change(self):
+    Confirm a new catalog version drops all results.
+
+Dependencies:
+- unittest: The built-in unit testing framework in Python.
+
+Usage:
+Run this module to execute the unit tests for the result_cache module.
+
+"""
+import unittest
+try:
+    import result_cache
+except ImportError:
+    from bookworm import result_cache
+
+
+class TestResultCache(unittest.TestCase):
+    """
+    Test cases for the search result cache
+    """
+
+    def setUp(self):
+        """
+        Creates a cache with a clock the tests move by hand.
+        """
+        self.now = [0.0]
+        self.cache = result_cache.ResultCache(max_entries=2, ttl=10,
+                                              clock=lambda: self.now[0])
+
+    def test_normalize_search_value(self):
+        """
+        Confirm whitespace is folded and case kept.
+        """
+        self.assertEqual(
+            result_cache.normalize_search_value("  Frank \t Herbert "),
+            "Frank Herbert")
+
+    def test_hits_and_misses(self):
+        """
+        Confirm stored results are served and counted.
+        """
+        self.assertIsNone(self.cache.get("dune"))
+        self.cache.put("dune", [1, 2])
+        self.assertEqual(self.cache.get("dune"), [1, 2])
+        self.assertEqual(self.cache.stats["hits"], 1)
+        self.assertEqual(self.cache.stats["misses"], 1)
+        self.assertEqual(self.cache.hit_rate(), 0.5)
+
+    def test_lru_eviction(self):
+        """
+        Confirm the least recently used result is dropped first.
+        """
+        self.cache.put("dune", 1)
+        self.cache.put("emma", 2)
+        self.cache.get("dune")
+        self.cache.put("ulysses", 3)
+        self.assertEqual(len(self.cache), 2)
+        self.assertIsNone(self.cache.get("emma"))
+        self.assertEqual(self.cache.get("dune"), 1)
+
+    def test_ttl(self):
+        """
+        Confirm results expire ttl seconds after they are stored.
+        """
+        self.cache.put("dune", 1)
+        self.now[0] = 10.0
+        self.assertEqual(self.cache.get("dune"), 1)
+        self.now[0] = 10.5
+        self.assertIsNone(self.cache.get("dune"))
+        self.assertEqual(self.cache.stats["expired"], 1)
+        self.assertEqual(len(self.cache), 0)
+
+    def test_version_change(self):
+        """
+        Confirm a new catalog version drops all results.
+        """
+        self.cache.put("dune", 1, version=0)
+        self.assertEqual(self.cache.get("dune", version=0), 1)
+        self.assertIsNone(self.cache.get("dune", version=1))
+        self.assertEqual(self.cache.stats["invalidations"], 1)
+        self.cache.put("dune", 2, version=1)
+        self.assertEqual(self.cache.get("dune", version=1), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+"""
+Module: test_result_records
+
+This module contains unit tests for the result_records module.
+
+Test Functions in TestResultRecords Class
+=========================================
+test_to_frame(self):
+    Confirm records of one frame give the slice the search functions return.
+
+test_project(self):
+    Confirm only the requested columns are materialized.
+
+test_take_and_head(self):
+    Confirm records are selected by position.
+
+test_compact(self):
+    Confirm records keep only the rows they refer to.
+
+test_interleave(self):
+    Confirm interleaved records match interleaving the dataframes.
+
+test_interleave_order(self):
+    Confirm the two rankings alternate, dropping repeated books.
+
+Dependencies:
+- unittest: The built-in unit testing framework in Python.
+- pandas: A library for data manipulation and analysis.
+- numpy: A library for numerical manipulation.
+
+Usage:
+Run this module to execute the unit tests for the result_records module.
+
+"""
+import unittest
+import numpy as np
+import pandas as pd
+try:
+    import result_records
+    import search_wrapper
+except ImportError:
+    from bookworm import result_records
+    from bookworm import search_wrapper
+
+
+class TestResultRecords(unittest.TestCase):
+    """
+    Test cases for the compact search results
+    """
+
+    def setUp(self):
+        """
+        Loads the test data and records of a few of its books.
+        """
+        self.ratings = pd.read_csv("data/test_data/test_data.csv")
+        self.embedded = pd.read_csv(
+            "data/test_data/test_data_w_embeddings.csv")
+        self.rows = [8, 2, 5]
+        self.ratios = np.array([90, 80, 85])
+        self.records = result_records.ResultRecords.from_rows(
+            self.ratings, self.rows, self.ratios, "ratio")
+
+    def test_to_frame(self):
+        """
+        Confirm records of one frame give the slice the search functions return.
+        """
+        pd.testing.assert_frame_equal(
+            self.records.to_frame(),
+            self.ratings.iloc[self.rows].assign(ratio=self.ratios))
+        records = result_records.ResultRecords.from_frame(self.embedded)
+        pd.testing.assert_frame_equal(records.to_frame(), self.embedded)
+        self.assertEqual(records.book_ids.tolist(),
+                         self.embedded["book_id"].tolist())
+
+    def test_project(self):
+        """
+        Confirm only the requested columns are materialized.
+        """
+        projected = self.records.project()
+        self.assertEqual(projected.columns.tolist(),
+                         result_records.DISPLAY_COLUMNS)
+        pd.testing.assert_frame_equal(
+            projected,
+            self.ratings.iloc[self.rows][result_records.DISPLAY_COLUMNS])
+        projected = self.records.project(["book_id", "ratio"])
+        self.assertEqual(projected["ratio"].tolist(), self.ratios.tolist())
+
+    def test_take_and_head(self):
+        """
+        Confirm records are selected by position.
+        """
+        taken = self.records.take([2, 0])
+        self.assertEqual(taken.book_ids.tolist(),
+                         self.ratings["book_id"][[5, 8]].tolist())
+        self.assertEqual(taken.scores.tolist(), [85, 90])
+        self.assertEqual(len(self.records.head(2)), 2)
+        self.assertEqual(len(self.records.head(10)), 3)
+        self.assertEqual(len(self.records.take([])), 0)
+
+    def test_compact(self):
+        """
+        Confirm records keep only the rows they refer to.
+        """
+        self.assertEqual(self.records.frames[0].shape,
+                         (3, self.ratings.shape[1]))
+        self.assertEqual(self.records.frames[0].index.tolist(), [2, 5, 8])
+        self.assertEqual(self.records.take([0]).frames[0].shape[0], 1)
+        similar = result_records.ResultRecords.from_rows(self.embedded,
+                                                         [3, 8, 8])
+        self.assertEqual(similar.frames[0].shape[0], 2)
+        # book 8 of similar repeats the first record's book and is dropped
+        combined = self.records.head(1).interleave(similar)
+        self.assertEqual([frame.shape[0] for frame in combined.frames],
+                         [1, 1])
+
+    def test_interleave(self):
+        """
+        Confirm interleaved records match interleaving the dataframes.
+        """
+        similar = result_records.ResultRecords.from_rows(self.embedded,
+                                                         [3, 8, 6, 0])
+        combined = self.records.interleave(similar)
+        expected = search_wrapper.interleave_results(
+            self.records.to_frame(), similar.to_frame())
+        self.assertEqual(combined.book_ids.tolist(),
+                         expected["book_id"].tolist())
+        frame = combined.to_frame()
+        self.assertEqual(frame.index.tolist(), list(range(len(combined))))
+        for column in ["book_id", "book_title", "Book-Rating", "ratio"]:
+            pd.testing.assert_series_equal(frame[column], expected[column])
+        pd.testing.assert_frame_equal(
+            combined.project(),
+            expected[result_records.DISPLAY_COLUMNS])
+
+    def test_interleave_order(self):
+        """
+        Confirm the two rankings alternate, dropping repeated books.
+        """
+        order = result_records.interleave_order(np.array([5, 6, 7]),
+                                                np.array([6, 5, 9, 10]))
+        self.assertEqual(order.tolist(), [0, 3, 2, 5, 6])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -23,6 +23,15 @@ test_fill_na(self):
 test_get_semantic_results(self):
     Confirm that function extracts proper indices.
 
+test_parse_genre_column(self):
+    Confirm column parsing matches parse_genres on every value.
+
+test_combine_columns(self):
+    Confirm combined text matches lowercasing and joining row by row.
+
+test_add_search_text(self):
+    Confirm precomputed search text gives the same query matches.
+
 test_query_to_index_smoke(self):
     Confirm query_to_index function returns an np integer.
 
@@ -35,6 +44,37 @@ test_query_exact(self):
 def test_query_to_index_nomatch(self):
     Confirm error raised if no matching author or title.
 
+test_query_to_index_with_index(self):
+    Confirm a pre-fitted index gives the same matches as fitting per query.
+
+test_query_to_index_spelling(self):
+    Confirm misspelled queries without a close book get a correction.
+
+test_normalize_key(self):
+    Confirm case, punctuation and whitespace are folded.
+
+test_query_to_index_exact_hits(self):
+    Confirm exact-match lookups agree with keyword search on hits.
+
+test_queries_to_indices(self):
+    Confirm batch matches and suggestions agree with query_to_index.
+
+test_duplicate_titles(self):
+    Confirm every lookup resolves a duplicated title to its last row.
+
+test_exact_index_tfidf_parity(self):
+    Confirm exact lookups agree with keyword search where TF-IDF vectors
+    collide or are empty.
+
+test_top_k_indices(self):
+    Confirm top_k_indices returns the highest scores, highest first.
+
+test_build_author_index(self):
+    Confirm each distinct author maps to their rows, best rated first.
+
+test_fuzzy_candidates_recall(self):
+    Confirm candidates include every name scoring over 50 by brute force.
+
 Test Functions in TestSearch Class
 ======================================    
 
@@ -44,6 +84,9 @@ test_semantic_search(self):
 test_plot_semantic(self):
     Test plot_semantic_search against expected result.
 
+test_plot_semantic_matrix(self):
+    Confirm plot search over a normalized matrix ranks by cosine similarity.
+
 test_author2_search_exact(self):
     Confirm author2_search returs books by that author only; exact match.
 
@@ -53,30 +96,81 @@ test_author2_search_close(self):
 test_author2_search_nomatch(self):
     Confirm error raised if no matching author.
 
+test_author2_search_matches_scan(self):
+    Confirm the author index gives the same books as scoring every row.
+
+test_author2_search_suggestions(self):
+    Confirm close authors are suggested when nothing matches.
+
+test_author2_search_no_side_effects(self):
+    Confirm the searched dataframe is left unchanged.
+
 test_genre_one_shot(self):
     Confirm genre search returns expected result.   
 
+test_genre_search_matches_scan(self):
+    Confirm leaderboards give the same books as filtering and sorting.
+
+test_genre_search_filters(self):
+    Confirm rating filters are applied while walking the leaderboard.
+
+test_parse_genre_query(self):
+    Confirm OR splits before AND in multi-genre queries.
+
+test_genre_search_multi(self):
+    Confirm AND / OR genre queries match set operations on the data.
+
+test_as_records(self):
+    Confirm result records stand for the dataframes the searches return.
+
+Test Functions in TestRatingFilters Class
+=========================================
+test_rating_mask(self):
+    Confirm the mask follows the rules of filter_ratings.
+
+test_semantic_search_filters(self):
+    Confirm filtered keyword + semantic search returns num_books books.
+
+test_plot_semantic_filters(self):
+    Confirm filtered plot search ranks only the passing books.
+
+test_author2_search_filters(self):
+    Confirm filtered author search keeps the best rated passing books.
+
 Dependencies:
 - unittest: The built-in unit testing framework in Python.
 - pandas: A library for data manipulation and analysis.
 - numpy: A library for numerical manipulation.
+- thefuzz: A library for fuzzy string matching.
 
 Usage:
 Run this module to execute the unit tests for the search module. 
 
 """
+import ast
 import unittest
-from unittest.mock import patch
+from unittest.mock import patch, Mock
 import pandas as pd
 import numpy as np
+from thefuzz import fuzz
 try:
     import search
+    import catalog
+    import embedding_cache
+    import keyword_index
+    import knn_graph
+    import spelling
     from search import HelperFunctions
 except ImportError:
     from bookworm import search
+    from bookworm import catalog
+    from bookworm import embedding_cache
+    from bookworm import keyword_index
+    from bookworm import knn_graph
+    from bookworm import spelling
     from bookworm.search import HelperFunctions
 
-class TestHelperFunctions(unittest.TestCase):
+class TestHelperFunctions(unittest.TestCase):  # pylint: disable=too-many-public-methods
     """
     Test cases for the Helper Functions in Search Module
     """
@@ -161,6 +255,47 @@ class TestHelperFunctions(unittest.TestCase):
         expected = np.array([11478, 7476, 10642])
         self.assertEqual(results.all(), expected.all())
 
+    def test_parse_genre_column(self):
+        """
+        Confirm column parsing matches parse_genres on every value.
+        """
+        genres = pd.concat([self.test_dat_e["genre"],
+                            pd.Series([None, "", self.test_dat_e["genre"][0]])],
+                           ignore_index=True)
+        results = HelperFunctions.parse_genre_column(genres)
+        expected = [HelperFunctions.parse_genres(g) for g in genres]
+        self.assertEqual(results.tolist(), expected)
+
+    def test_combine_columns(self):
+        """
+        Confirm combined text matches lowercasing and joining row by row.
+        """
+        df = self.test_dat_filled
+        columns = ["book_title", "author", "book_id"]
+        results = HelperFunctions.combine_columns(df, columns)
+        for idx, row in df.iterrows():
+            expected = ' '.join(HelperFunctions.preprocess_text(str(row[col]))
+                                for col in columns).strip()
+            self.assertEqual(results[idx], expected)
+
+    def test_add_search_text(self):
+        """
+        Confirm precomputed search text gives the same query matches.
+        """
+        prepared = HelperFunctions.add_search_text(self.test_dat_e.copy())
+        self.assertEqual(prepared["search_text_genre"][0],
+                         "science fiction, speculative fiction")
+        for col in ["book_title", "author", "genre"]:
+            for idx in [0, 8]:
+                query = self.test_dat_e[col][idx]
+                expected = HelperFunctions.query_to_index(
+                    self.test_dat_e.copy(), query, [col])
+                with patch.object(HelperFunctions, "fill_na") as mock_fill:
+                    result = HelperFunctions.query_to_index(prepared, query,
+                                                            [col])
+                    mock_fill.assert_not_called()
+                self.assertEqual(result, expected)
+
     def test_query_to_index_smoke(self):
         """ 
         Confirm query_to_index function returns an np integer.
@@ -208,6 +343,203 @@ class TestHelperFunctions(unittest.TestCase):
                 HelperFunctions.query_to_index(self.test_dat_e,
                                                query, [col])
 
+    def test_query_to_index_with_index(self):
+        """
+        Confirm a pre-fitted index gives the same matches as fitting per query.
+        """
+        filled = HelperFunctions.fill_na(self.test_dat_e.copy())
+        for col in ["book_title", "author"]:
+            texts = HelperFunctions.combine_columns(filled, [col])
+            index = keyword_index.KeywordIndex.fit(texts)
+            for idx in [0, 3, 10]:
+                query = filled[col][idx]
+                expected = HelperFunctions.query_to_index(
+                    self.test_dat_e.copy(), query, [col])
+                result = HelperFunctions.query_to_index(filled, query, [col],
+                                                        index=index)
+                self.assertEqual(result, expected)
+            with self.assertRaises(ValueError):
+                HelperFunctions.query_to_index(filled, "gribnif blah",
+                                               [col], index=index)
+
+    def test_query_to_index_spelling(self):
+        """
+        Confirm misspelled queries without a close book get a correction.
+        """
+        titles = spelling.SpellingIndex(self.test_dat_e["book_title"],
+                                        self.test_dat_e["RatingCount"])
+        for query, expected in [("Moonflete", "Moonfleet"),
+                                ("Chapterhuose Dnue", "Chapterhouse Dune")]:
+            with self.assertRaises(ValueError) as context:
+                HelperFunctions.query_to_index(self.test_dat_e.copy(), query,
+                                               ["book_title"])
+            self.assertNotIn("Did you", str(context.exception))
+            with self.assertRaisesRegex(ValueError,
+                                        f"Did you perhaps mean {expected}?"):
+                HelperFunctions.query_to_index(self.test_dat_e.copy(), query,
+                                               ["book_title"],
+                                               spelling=titles)
+
+    def test_normalize_key(self):
+        """
+        Confirm case, punctuation and whitespace are folded.
+        """
+        for text in ["J. R. R. Tolkien", "j.r.r.  tolkien ", "J R R TOLKIEN"]:
+            self.assertEqual(HelperFunctions.normalize_key(text),
+                             "j r r tolkien")
+        keys = HelperFunctions.normalize_key_column(self.test_dat_e["author"])
+        expected = [HelperFunctions.normalize_key(a)
+                    for a in self.test_dat_e["author"]]
+        self.assertEqual(keys.tolist(), expected)
+
+    def test_query_to_index_exact_hits(self):
+        """
+        Confirm exact-match lookups agree with keyword search on hits.
+
+        Hits skip keyword search entirely; misses still fall through to it.
+        """
+        df = self.test_dat_filled
+        exact = HelperFunctions.build_exact_index(df, "book_title")
+        for idx in [0, 3, 8, 10]:
+            query = "  " + df["book_title"][idx].upper() + "!"
+            expected = HelperFunctions.query_to_index(df.copy(),
+                            df["book_title"][idx], ["book_title"])
+            with patch.object(HelperFunctions, "fill_na") as mock_fill:
+                result = HelperFunctions.query_to_index(df, query,
+                                                        ["book_title"],
+                                                        exact=exact)
+                mock_fill.assert_not_called()
+            self.assertEqual(result, expected)
+            self.assertIsInstance(result, np.int64)
+        result = HelperFunctions.query_to_index(df.copy(), "Dune Chapterhouse",
+                                                ["book_title"], exact=exact)
+        self.assertEqual(result, 3)
+
+    def test_queries_to_indices(self):
+        """
+        Confirm batch matches and suggestions agree with query_to_index.
+        """
+        queries = ["Book of Job", "moonfleet", "The Book of Ladies",
+                   "gribnif blah blah blah", "Dune Chapterhouse", "Giles",
+                   "Leaf"]
+        for index in [None, keyword_index.KeywordIndex.fit(
+                HelperFunctions.combine_columns(self.test_dat_filled,
+                                                ["book_title"]))]:
+            results = HelperFunctions.queries_to_indices(
+                self.test_dat_e, queries, ["book_title"], index=index)
+            self.assertEqual(results["query"].tolist(), queries)
+            for _, row in results.iterrows():
+                try:
+                    expected = HelperFunctions.query_to_index(
+                        self.test_dat_e.copy(), row["query"], ["book_title"])
+                    self.assertTrue(row["found"])
+                    self.assertEqual(row["best_index"], expected)
+                    self.assertIsNone(row["suggestion"])
+                except ValueError as err:
+                    self.assertFalse(row["found"])
+                    if row["suggestion"] is None:
+                        self.assertNotIn("Did you", str(err))
+                    else:
+                        self.assertIn(row["suggestion"], str(err))
+
+    def test_duplicate_titles(self):
+        """
+        Confirm every lookup resolves a duplicated title to its last row.
+        """
+        df = self.test_dat_filled
+        # shuffled copies, which numpy's default (unstable) sort would
+        # not resolve to the last copy
+        df = pd.concat([df] * 6, ignore_index=True).sample(
+            frac=1, random_state=1).reset_index(drop=True)
+        title = self.test_dat_e["book_title"][3]
+        last = np.flatnonzero(df["book_title"] == title)[-1]
+        exact = HelperFunctions.build_exact_index(df, "book_title")
+        self.assertEqual(exact[HelperFunctions.normalize_key(title)], last)
+        self.assertEqual(HelperFunctions.query_to_index(
+            df.copy(), title, ["book_title"]), last)
+        results = HelperFunctions.queries_to_indices(df, [title] * 2,
+                                                     ["book_title"])
+        self.assertEqual(results["best_index"].tolist(), [last, last])
+
+    def test_exact_index_tfidf_parity(self):
+        """
+        Confirm exact lookups agree with keyword search where TF-IDF vectors
+        collide or are empty.
+
+        "2" is not a term, so "Shrek" and "Shrek 2" tie and keyword search
+        picks the last; "It" is a stop word, so it matches nothing.
+        """
+        df = HelperFunctions.add_search_text(pd.DataFrame({
+            "book_title": ["Shrek", "Shrek 2", "It"],
+            "author": ["William Steig", "William Steig", "Stephen King"],
+            "genre": [np.nan] * 3, "summary": [np.nan] * 3}))
+        exact = HelperFunctions.build_exact_index(df, "book_title")
+        self.assertEqual(exact, {})
+        for query in ["Shrek", "shrek!"]:
+            self.assertEqual(HelperFunctions.query_to_index(
+                df, query, ["book_title"], exact=exact), 1)
+        with self.assertRaisesRegex(ValueError, "can't find"):
+            HelperFunctions.query_to_index(df, "It", ["book_title"],
+                                           exact=exact)
+
+    def test_top_k_indices(self):
+        """
+        Confirm top_k_indices returns the highest scores, highest first.
+        """
+        scores = np.array([0.1, 0.9, 0.3, 0.7, 0.5])
+        results = HelperFunctions.top_k_indices(scores, 3)
+        np.testing.assert_array_equal(results, [1, 3, 4])
+        self.assertEqual(len(HelperFunctions.top_k_indices(scores, 10)), 5)
+        self.assertEqual(len(HelperFunctions.top_k_indices(scores, 0)), 0)
+
+    def test_build_author_index(self):
+        """
+        Confirm each distinct author maps to their rows, best rated first.
+        """
+        authors = HelperFunctions.build_author_index(self.test_dat_r)
+        self.assertEqual(len(authors["authors"]),
+                         self.test_dat_r["author"].nunique())
+        herbert = list(authors["authors"]).index("Frank Herbert")
+        np.testing.assert_array_equal(authors["rows"][herbert], [3, 5])
+        self.assertEqual(sum(map(len, authors["rows"])),
+                         self.test_dat_r["author"].notna().sum())
+        self.assertEqual(authors["codes"][1], -1)
+        self.assertEqual(authors["rank"][1], 0)
+
+
+    def test_fuzzy_candidates_recall(self):
+        """
+        Confirm candidates include every name scoring over 50 by brute force.
+
+        Names are the test authors plus variants with characters dropped,
+        repeated, swapped in case and shuffled, so many land near 50.
+        """
+        rng = np.random.default_rng(0)
+        base = self.test_dat_r["author"].dropna().unique().tolist()
+        base += ["Ursula K. Le Guin", "Octavia E. Butler", "Jo Walton"]
+        names = list(base)
+        for name in base:
+            for _ in range(30):
+                chars = list(name)
+                rng.shuffle(chars[rng.integers(len(chars)):])
+                keep = rng.random(len(chars)) > 0.3
+                variant = "".join(c.swapcase() if rng.random() < 0.1 else c
+                                  for c in np.array(chars)[keep])
+                names.append(variant * int(rng.integers(1, 3)))
+        names = list(dict.fromkeys(names))
+        chars = HelperFunctions.build_char_index(names)
+
+        pruned = 0
+        for query in base + ["JRR Tolkien", "Frankie Hubbard", "a", "",
+                             "Le Guin, Ursula"]:
+            brute = {i for i, name in enumerate(names)
+                     if fuzz.ratio(name, query) > 50}
+            candidates = HelperFunctions.fuzzy_candidates(chars, query)
+            self.assertTrue(brute.issubset(candidates.tolist()), query)
+            pruned += len(names) - len(candidates)
+        self.assertGreater(pruned, 0)
+
+
 class TestSearch(unittest.TestCase):
 
     """
@@ -260,6 +592,33 @@ class TestSearch(unittest.TestCase):
         expected = self.test_dat_e.iloc[7]["book_id"] # 7=idx for Leaf by Niggle
         self.assertEqual(results, expected)
 
+    def test_plot_semantic_matrix(self):
+        """
+        Confirm plot search over a normalized matrix ranks by cosine similarity.
+
+        The query embedding is stubbed with the embedding of "Leaf by
+        Niggle" (row 7), so that book must come first, and the order must
+        match a brute-force ranking by cosine similarity.
+        """
+        df = self.test_dat_e
+        raw = np.array([ast.literal_eval(emb) for emb in df["embeddings"]])
+        query_embedding = [raw[7].tolist()]
+        cosine = raw @ raw[7] / (np.linalg.norm(raw, axis=1) *
+                                 np.linalg.norm(raw[7]))
+        expected = df.iloc[np.argsort(-cosine)[:5]]["book_id"].tolist()
+
+        matrix = catalog.normalize_rows(raw)
+        client = Mock()
+        client.embed.return_value = Mock(embeddings=query_embedding)
+        # a memory-only cache, so the stub never reaches the sqlite file
+        with patch.object(search, "query_embeddings",
+                          embedding_cache.EmbeddingCache(client)):
+            for embeddings in [None, matrix]:
+                books = search.plot_semantic_search(df, "A man paints a tree.",
+                                                    num_books=5,
+                                                    embeddings=embeddings)
+                self.assertEqual(books["book_id"].tolist(), expected)
+
     def test_author2_search_exact(self):
         """ 
         Confirm author2_search returs books by that author only; exact match.
@@ -299,6 +658,55 @@ class TestSearch(unittest.TestCase):
         with self.assertRaises(ValueError):
             search.author2_search(self.test_dat_r, query, num_books=10)
 
+    def test_author2_search_matches_scan(self):
+        """
+        Confirm the author index gives the same books as scoring every row.
+
+        The reference scores every row with fuzz.ratio and keeps rows over
+        75, best rated first. Extra books are added so authors have several
+        books with different ratings.
+        """
+        df = pd.concat([self.test_dat_r] * 3, ignore_index=True)
+        df["Book-Rating"] = np.arange(df.shape[0]) % 7
+        authors = HelperFunctions.build_author_index(df)
+        for query in ["Frank Herbert", "JRR Tolkien", "K W Jeter",
+                      "carl von clausewitz"]:
+            ratio = df["author"].map(lambda author, q=query:
+                                     fuzz.ratio(author, q))
+            expected = df[ratio > 75].sort_values(
+                by="Book-Rating", ascending=False, kind="stable").head(5)
+            books = search.author2_search(df, query, num_books=5,
+                                          authors=authors)
+            self.assertEqual(books.index.tolist(), expected.index.tolist())
+            self.assertTrue((books["ratio"] > 75).all())
+
+    def test_author2_search_suggestions(self):
+        """
+        Confirm close authors are suggested when nothing matches.
+        """
+        with self.assertRaises(ValueError) as context:
+            search.author2_search(self.test_dat_r, "Frankie Hubbard")
+        self.assertEqual(str(context.exception),
+                         "That author does not appear in our database. "
+                         "Perhaps you meant one of these authors: "
+                         "Frank Herbert?")
+        other_df = self.test_dat_r.copy()
+        authors = HelperFunctions.build_author_index(self.test_dat_r[:5])
+        with self.assertRaisesRegex(ValueError, "does not match"):
+            search.author2_search(other_df, "Frank Herbert", authors=authors)
+
+    def test_author2_search_no_side_effects(self):
+        """
+        Confirm the searched dataframe is left unchanged.
+        """
+        df = self.test_dat_r
+        before = df.copy()
+        books = search.author2_search(df, "Frank Herbert", num_books=1)
+        pd.testing.assert_frame_equal(df, before)
+        self.assertEqual(books.shape[0], 1)
+        self.assertEqual(books["book_id"].iloc[0], df["book_id"][3])
+        self.assertEqual(books["ratio"].iloc[0], 100)
+
     def test_genre_one_shot(self):
         """ 
         Confirm genre search returns expected result.
@@ -312,5 +720,214 @@ class TestSearch(unittest.TestCase):
         expected = "The Queen of the Damned"
         self.assertEqual(results,expected)
 
+    def _genre_data(self):
+        """
+        Returns the genre test data with renamed copies of every book,
+        so genres have more books with a spread of ratings.
+        """
+        copies = [self.test_data_g.assign(
+            book_title=self.test_data_g["book_title"] + f" {i}")
+                  for i in range(4)]
+        df = pd.concat([self.test_data_g] + copies, ignore_index=True)
+        df["Book-Rating"] = np.where(np.arange(df.shape[0]) % 5 == 0,
+                                     np.nan, np.arange(df.shape[0]) % 9)
+        df["RatingCount"] = np.arange(df.shape[0]) % 13
+        return df
+
+    def test_genre_search_matches_scan(self):
+        """
+        Confirm leaderboards give the same books as filtering and sorting.
+        """
+        df = self._genre_data()
+        genres = HelperFunctions.build_genre_index(df)
+        for genre in df["generic_genre"].dropna().unique():
+            expected = df[df["generic_genre"] == genre].drop_duplicates(
+                subset="book_title").sort_values(
+                    by="Book-Rating", ascending=False, kind="stable").head(7)
+            books = search.genre_search(df, genre, num_books=7,
+                                        genres=genres)
+            self.assertEqual(books.index.tolist(), expected.index.tolist())
+        self.assertTrue(search.genre_search(df, "Not a genre",
+                                            genres=genres).empty)
+
+    def test_genre_search_filters(self):
+        """
+        Confirm rating filters are applied while walking the leaderboard.
+        """
+        df = self._genre_data()
+        genres = HelperFunctions.build_genre_index(df)
+        for min_rating, min_count in [(4.0, 0), (0.0, 6), (2.0, 3)]:
+            unfiltered = search.genre_search(df, "Science Fiction",
+                                             num_books=df.shape[0],
+                                             genres=genres)
+            keep = pd.Series(True, index=unfiltered.index)
+            if min_rating:
+                keep &= unfiltered["Book-Rating"] > min_rating
+            if min_count:
+                keep &= unfiltered["RatingCount"] > min_count
+            expected = unfiltered[keep].head(3)
+            books = search.genre_search(df, "Science Fiction", num_books=3,
+                                        genres=genres,
+                                        min_ave_rating=min_rating,
+                                        min_num_ratings=min_count)
+            self.assertEqual(books.index.tolist(), expected.index.tolist())
+            self.assertEqual(books.shape[0], 3)
+
+    def test_parse_genre_query(self):
+        """
+        Confirm OR splits before AND in multi-genre queries.
+        """
+        results = HelperFunctions.parse_genre_query(
+            "Fantasy AND Young Adult OR Horror")
+        self.assertEqual(results, [["Fantasy", "Young Adult"], ["Horror"]])
+        self.assertEqual(HelperFunctions.parse_genre_query("Science Fiction"),
+                         [["Science Fiction"]])
+
+    def test_genre_search_multi(self):
+        """
+        Confirm AND / OR genre queries match set operations on the data.
+        """
+        df = self._genre_data()
+        genres = HelperFunctions.build_genre_index(df)
+        titles = df.groupby("generic_genre")["book_title"].apply(set)
+        fiction, science = titles["Fiction"], titles["Science Fiction"]
+        cases = {"Fiction AND Science Fiction": fiction & science,
+                 "Fiction OR Science Fiction": fiction | science,
+                 "Fiction AND Nope OR Science Fiction": science,
+                 "Fiction AND Nope": set()}
+        for query, expected in cases.items():
+            books = search.genre_search(df, query, num_books=df.shape[0],
+                                        genres=genres)
+            self.assertEqual(set(books["book_title"]), expected, query)
+            self.assertEqual(books["book_title"].nunique(), books.shape[0])
+            ratings = books["Book-Rating"].dropna().tolist()
+            self.assertEqual(ratings, sorted(ratings, reverse=True))
+            self.assertEqual(books["Book-Rating"].isna().tolist(),
+                             sorted(books["Book-Rating"].isna().tolist()))
+
+    def test_as_records(self):
+        """
+        Confirm result records stand for the dataframes the searches return.
+        """
+        for search_function, df, query in [
+                (search.author2_search, self.test_dat_r, "Frank Herbert"),
+                (search.genre_search, self.test_data_g, "Fantasy"),
+                (search.genre_search, self.test_data_g, "Fantasy OR Horror")]:
+            records = search_function(df, query, num_books=3, as_records=True)
+            pd.testing.assert_frame_equal(records.to_frame(),
+                                          search_function(df, query,
+                                                          num_books=3))
+        records = search.author2_search(self.test_dat_r, "Frank Herbert",
+                                        as_records=True)
+        self.assertEqual(records.score_name, "ratio")
+        self.assertTrue((records.scores == 100).all())
+
+        df = self.test_dat_e
+        raw = np.array([ast.literal_eval(emb) for emb in df["embeddings"]])
+        client = Mock()
+        client.embed.return_value = Mock(embeddings=[raw[7].tolist()])
+        # a memory-only cache, so the stub never reaches the sqlite file
+        with patch.object(search, "query_embeddings",
+                          embedding_cache.EmbeddingCache(client)):
+            records = search.plot_semantic_search(df, "A man paints a tree.",
+                                                  num_books=3,
+                                                  as_records=True)
+            pd.testing.assert_frame_equal(
+                records.to_frame(),
+                search.plot_semantic_search(df, "A man paints a tree.",
+                                            num_books=3))
+        # the closest book is the one whose embedding was the query's
+        self.assertEqual(records.book_ids[0], df["book_id"][7])
+        self.assertAlmostEqual(records.scores[0], 1.0, places=5)
+
+class TestRatingFilters(unittest.TestCase):
+    """
+    Test cases for rating filters applied inside the search modes
+    """
+
+    def setUp(self):
+        """
+        Loads the testing data and gives every book a rating and count.
+        """
+        f_embed = "data/test_data/test_data_w_embeddings.csv"
+        self.test_dat_e = pd.read_csv(f_embed)
+        self.test_dat_e["Book-Rating"] = [9, 3, np.nan, 7, 8, 2, 6, 1, 5, 4,
+                                          10]
+        self.test_dat_e["RatingCount"] = [5, 50, 5, 50, 50, 5, 50, 50, 50, 5,
+                                          50]
+        raw = np.array([ast.literal_eval(emb)
+                        for emb in self.test_dat_e["embeddings"]])
+        self.matrix = catalog.normalize_rows(raw)
+        self.cosine = self.matrix @ self.matrix.T
+
+    def test_rating_mask(self):
+        """
+        Confirm the mask follows the rules of filter_ratings.
+        """
+        df = self.test_dat_e
+        self.assertIsNone(HelperFunctions.rating_mask(df, 0.0, 0))
+        expected = (df["Book-Rating"] > 4) & (df["RatingCount"] > 10)
+        np.testing.assert_array_equal(
+            HelperFunctions.rating_mask(df, 4.0, 10), expected)
+        np.testing.assert_array_equal(
+            HelperFunctions.rating_mask(df, 4.0, 0, rows=[2, 0, 1]),
+            [False, True, False])
+
+    def test_semantic_search_filters(self):
+        """
+        Confirm filtered keyword + semantic search returns num_books books.
+
+        The neighbors graph is cut to 4 per book, so the passing books
+        must also be found beyond it, ranked by cosine similarity.
+        """
+        df = self.test_dat_e
+        _, graph = knn_graph.build_knn_graph(self.matrix, n_neighbors=4)
+        exact = HelperFunctions.build_exact_index(df, "book_title")
+        passing = np.flatnonzero(HelperFunctions.rating_mask(df, 4.0, 10))
+        expected = passing[np.argsort(-self.cosine[7][passing],
+                                      kind="stable")][:4]
+        with patch.object(search, "indices", graph):
+            books = search.semantic_search(df, df["book_title"][7],
+                                           ["book_title"], num_books=4,
+                                           exact=exact, embeddings=self.matrix,
+                                           min_ave_rating=4.0,
+                                           min_num_ratings=10)
+        self.assertEqual(books.index.tolist(), expected.tolist())
+
+    def test_plot_semantic_filters(self):
+        """
+        Confirm filtered plot search ranks only the passing books.
+        """
+        df = self.test_dat_e
+        client = Mock()
+        client.embed.return_value = Mock(embeddings=[self.matrix[7].tolist()])
+        passing = np.flatnonzero(HelperFunctions.rating_mask(df, 0.0, 10))
+        expected = passing[np.argsort(-self.cosine[7][passing],
+                                      kind="stable")][:5]
+        with patch.object(search, "query_embeddings",
+                          embedding_cache.EmbeddingCache(client)):
+            books = search.plot_semantic_search(df, "A man paints a tree.",
+                                                num_books=5,
+                                                embeddings=self.matrix,
+                                                min_num_ratings=10)
+        self.assertEqual(books.index.tolist(), expected.tolist())
+
+    def test_author2_search_filters(self):
+        """
+        Confirm filtered author search keeps the best rated passing books.
+        """
+        df = pd.concat([self.test_dat_e] * 3, ignore_index=True)
+        df["Book-Rating"] = np.arange(df.shape[0]) % 10
+        books = search.author2_search(df, "Frank Herbert", num_books=3,
+                                      min_ave_rating=3.0)
+        herbert = df[(df["author"] == "Frank Herbert") &
+                     (df["Book-Rating"] > 3)]
+        expected = herbert.sort_values("Book-Rating", ascending=False,
+                                       kind="stable").head(3)
+        self.assertEqual(books.index.tolist(), expected.index.tolist())
+        self.assertTrue(search.author2_search(df, "Frank Herbert",
+                                              min_ave_rating=99.0).empty)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -5,8 +5,10 @@ Module: test_search_wrapper
 This module contains unit tests for the search and filter functions
 implemented in the search_warpper.py module. 
 
-The tests are organized into four Test Classes each corresponding to the
+The tests are organized into ten Test Classes each corresponding to the
 functions in search modules to be tested. 
+CatalogTestCase holds no tests; it swaps in a catalog built from the test
+data for the classes derived from it.
 
 Tests in Class TestFilter
 ==========================
@@ -26,6 +28,9 @@ test_filter_missing_col1(self):
 test_filter_missing_col2(self):
         Confirm ValueError raised if no RatingCount colum.
 
+test_filter_records(self):
+    Confirm result records are filtered like the dataframes they stand for.
+
 
 Tests in Class TestSelectSearch
 ===============================
@@ -44,6 +49,14 @@ test_select_search_author2(self, mock_author2_search):
 test_select_search_genre(self, mock_plot_genre_search):
     Confirm correct search function called for search_mode Genre
 
+Tests in Class TestInterleave
+=============================
+test_interleave_alternates(self):
+    Confirm rows alternate between the two results, longer one last.
+
+test_interleave_drops_repeats(self):
+    Confirm a book is kept only where it first appears.
+
 Tests in Class TestAssembleData
 ===============================
 test_assemble_data_correct_shape(self):
@@ -56,6 +69,52 @@ Tests in Class TestSearchWrapper
 ===============================
 def test_wrapper_calls_filter(self, mock_select_search):
     Smoke test for search_wrapper
+
+test_wrapper_caches_candidates(self, mock_select_search):
+    Confirm repeated searches and slider changes reuse cached results.
+
+test_wrapper_refetches_when_filtered_short(self, mock_select_search):
+    Confirm a filtered search runs again if too few candidates pass.
+
+Tests in Class TestSearchWrapperBatch
+=====================================
+test_batch_matches_single_searches(self):
+    Confirm each batch result matches the single search, in input order.
+
+test_batch_embeds_once(self):
+    Confirm all Plot queries of a batch are embedded with one call.
+
+test_batch_returns_errors(self):
+    Confirm failing requests come back as ValueErrors among the results.
+
+test_batch_embed_errors(self):
+    Confirm a failed embedding chunk fails only its own Plot requests.
+
+test_keyword_index_fallback(self):
+    Confirm a keyword index that was not built is fitted once instead.
+
+Tests in Class TestWarmUp
+=========================
+test_warm_up(self):
+    Confirm warm_up loads what each search mode needs, and only that.
+
+Tests in Class TestComplete
+===========================
+test_complete(self):
+    Confirm titles and authors are completed from the catalog.
+
+Tests in Class TestSearchWrapperRecords
+=======================================
+test_wrapper_returns_records(self):
+    Confirm search_wrapper returns records standing for the search results.
+
+Tests in Class TestNeighbors
+============================
+test_neighbors_follow_catalog(self):
+    Confirm CATALOG.clear() drops the lookup and reloads the graph.
+
+test_indices_reload(self):
+    Confirm search.get_indices reads the graph again for a new version.
         
 
 
@@ -70,13 +129,22 @@ Run this module to execute the unit tests for the search_wrapper modules.
 
 """
 
+import ast
 import unittest
 from unittest import mock
+import numpy as np
 import pandas as pd
 try:
     import search_wrapper
+    import search
+    import catalog
+    import embedding_cache
+    import knn_graph
+    import result_records
 except ImportError:
     from search import search_wrapper
+    from bookworm import search, catalog, embedding_cache, knn_graph
+    from bookworm import result_records
 
 class TestFilter(unittest.TestCase):
     """Test cases for the filter_ratings function"""
@@ -145,6 +213,18 @@ class TestFilter(unittest.TestCase):
                     "Your data must have a RatingCount column"):
             search_wrapper.filter_ratings(test_dat, 0,0)
 
+    def test_filter_records(self):
+        """
+        Confirm result records are filtered like the dataframes they stand for.
+        """
+        records = result_records.ResultRecords.from_rows(self.test_dat_e,
+                                                         [8, 2, 5, 0, 9])
+        for filters in [(0.0, 0), (6, 0), (0, 6), (6, 6)]:
+            filtered = search_wrapper.filter_ratings(records, *filters)
+            pd.testing.assert_frame_equal(
+                filtered.to_frame(),
+                search_wrapper.filter_ratings(records.to_frame(), *filters))
+
 class TestSelectSearch(unittest.TestCase):
     """Test cases for the select search function"""
 
@@ -155,13 +235,16 @@ class TestSelectSearch(unittest.TestCase):
         with mock.patch("search.author2_search") as mock_auth2:
             with mock.patch("search.semantic_search") as mock_semantic_search:
                 mock_ret_auth2 = pd.DataFrame([[0,0], [2,200]])
-                mock_ret_auth2.columns = ["book_number", "book_title"]
+                mock_ret_auth2.columns = ["book_id", "book_title"]
                 mock_ret_semantic = pd.DataFrame([[1,100], [3,300]])
-                mock_ret_semantic.columns = ["book_number", "book_title"]
-                mock_auth2.return_value = mock_ret_auth2
-                mock_semantic_search.return_value = mock_ret_semantic
+                mock_ret_semantic.columns = ["book_id", "book_title"]
+                mock_auth2.return_value = \
+                    result_records.ResultRecords.from_frame(mock_ret_auth2)
+                mock_semantic_search.return_value = \
+                    result_records.ResultRecords.from_frame(mock_ret_semantic)
                 results = search_wrapper.select_search("Author1",
-                                                       "J. R. Tolkien")
+                                                       "J. R. Tolkien",
+                                                       as_frame=True)
 
                 # expect the resulting dataframe to have four rows
                 self.assertEqual(results.shape[0], 4)
@@ -210,6 +293,35 @@ class TestSelectSearch(unittest.TestCase):
                                                "J. R. Tolkien")
         self.assertEqual(results, "Genre search performed")
 
+class TestInterleave(unittest.TestCase):
+    """Test cases for the interleave_results function"""
+
+    def test_interleave_alternates(self):
+        """
+        Confirm rows alternate between the two results, longer one last.
+        """
+        results1 = pd.DataFrame({"book_id": [1, 3], "ratio": [90, 80]},
+                                index=[7, 8])
+        results2 = pd.DataFrame({"book_id": [2, 4, 6, 8]})
+        results = search_wrapper.interleave_results(results1, results2)
+        self.assertEqual(results["book_id"].tolist(), [1, 2, 3, 4, 6, 8])
+        self.assertEqual(results.index.tolist(), list(range(6)))
+        self.assertEqual(results["ratio"].isna().tolist(),
+                         [False, True, False, True, True, True])
+
+    def test_interleave_drops_repeats(self):
+        """
+        Confirm a book is kept only where it first appears.
+        """
+        results1 = pd.DataFrame({"book_id": [5, 6, 7],
+                                 "book_title": ["A", "B", "C"]})
+        results2 = pd.DataFrame({"book_id": [6, 5, 9],
+                                 "book_title": ["B", "A", "D"]})
+        results = search_wrapper.interleave_results(results1, results2)
+        self.assertEqual(results["book_id"].tolist(), [5, 6, 7, 9])
+        empty = search_wrapper.interleave_results(results1[:0], results2)
+        self.assertEqual(empty["book_id"].tolist(), [6, 5, 9])
+
 class TestAssembleData(unittest.TestCase):
     """Test cases for the assemble_data function"""
 
@@ -248,6 +360,12 @@ class TestSearchWrapper(unittest.TestCase):
     """
     Test cases for the search_wrapper function
     """
+    def setUp(self):
+        """
+        Empties the result cache, so every test searches afresh.
+        """
+        search_wrapper.RESULTS.clear()
+
     @mock.patch("search_wrapper.select_search")
     def test_wrapper_calls_filter(self, mock_select_search):
         """
@@ -256,14 +374,322 @@ class TestSearchWrapper(unittest.TestCase):
         f = "data/test_data/test_data.csv"
         test_dat = pd.read_csv(f)
         # Assume the search function returns the original data
-        mock_select_search.return_value = test_dat
+        mock_select_search.return_value = \
+            result_records.ResultRecords.from_frame(test_dat)
         # call search wrapper
-        results = search_wrapper.search_wrapper("Title", "Goofy", 6, 0)
+        results = search_wrapper.search_wrapper("Title", "Goofy", 6, 0,
+                                                as_frame=True)
         # results should be the original test_dat (no filters)
         # call filter function on test and min-ratings, 6
         # expected result is 2 entries
         self.assertEqual(results.shape[0], 2)
 
+    @mock.patch("search_wrapper.select_search")
+    def test_wrapper_caches_candidates(self, mock_select_search):
+        """
+        Confirm repeated searches and slider changes reuse cached results.
+        """
+        test_dat = pd.read_csv("data/test_data/test_data.csv")
+        mock_select_search.return_value = \
+            result_records.ResultRecords.from_frame(test_dat)
+        # a catalog of its own to clear, leaving the process-wide one alone
+        test_catalog = catalog.Catalog(lambda: test_dat, lambda: test_dat,
+                                       lambda: None)
+        with mock.patch.object(search_wrapper, "CATALOG", test_catalog):
+            first = search_wrapper.search_wrapper("Title", " Dune ", 0.0, 0, 2)
+            again = search_wrapper.search_wrapper("Title", "Dune", 0.0, 0, 2)
+            pd.testing.assert_frame_equal(first.to_frame(), again.to_frame())
+            filtered = search_wrapper.search_wrapper("Title", "Dune", 6, 0, 2)
+            self.assertEqual(len(filtered), 2)
+            mock_select_search.assert_called_once_with("Title", "Dune", 20)
+
+            test_catalog.clear()
+            search_wrapper.search_wrapper("Title", "Dune", 0.0, 0, 2)
+            self.assertEqual(mock_select_search.call_count, 2)
+
+    @mock.patch("search_wrapper.select_search")
+    def test_wrapper_refetches_when_filtered_short(self, mock_select_search):
+        """
+        Confirm a filtered search runs again if too few candidates pass.
+        """
+        test_dat = pd.read_csv("data/test_data/test_data.csv")
+        mock_select_search.return_value = \
+            result_records.ResultRecords.from_frame(test_dat)
+        search_wrapper.search_wrapper("Title", "Dune", 6, 0, 5)
+        search_wrapper.search_wrapper("Title", "Dune", 6, 0, 5)
+        self.assertEqual(mock_select_search.call_args_list,
+                         [mock.call("Title", "Dune", 20),
+                          mock.call("Title", "Dune", 5, 6, 0)])
+
+
+class CatalogTestCase(unittest.TestCase):
+    """
+    Base of the test cases run over a catalog built from the test data
+    """
+    def setUp(self):
+        """
+        Swaps in a catalog, neighbor lookup and query embeddings built
+        from the test data.
+        """
+        ratings = pd.read_csv("data/test_data/test_data.csv")
+        embedded = pd.read_csv("data/test_data/test_data_w_embeddings.csv")
+        self.raw = np.array([ast.literal_eval(emb)
+                             for emb in embedded["embeddings"]])
+        self.matrix = catalog.normalize_rows(self.raw)
+        self.lookup = knn_graph.NeighborLookup(
+            np.argsort(-(self.matrix @ self.matrix.T), axis=1)[:, :4],
+            lambda: self.matrix)
+        self.client = mock.Mock()
+        # each query embeds like the book whose title it names
+        titles = embedded["book_title"].str.lower().tolist()
+        self.client.embed.side_effect = lambda texts, **kwargs: mock.Mock(
+            embeddings=[
+                self.raw[titles.index(embedding_cache.normalize_query(text))]
+                .tolist() for text in texts])
+        embedded = search.HelperFunctions.add_search_text(embedded)
+        test_catalog = catalog.Catalog(lambda: ratings, lambda: embedded,
+                                       lambda: None,
+                                       lambda: self.matrix)
+        self.df = test_catalog.embeddings()
+        self.patches = [
+            mock.patch.object(search_wrapper, "CATALOG", test_catalog),
+            mock.patch.object(search_wrapper, "get_neighbors",
+                              return_value=self.lookup),
+            # a memory-only cache, so the stubs never reach the sqlite file
+            mock.patch.object(search, "query_embeddings",
+                              embedding_cache.EmbeddingCache(self.client))]
+        for patch in self.patches:
+            patch.start()
+
+    def tearDown(self):
+        """
+        Restores the process-wide catalog and caches.
+        """
+        for patch in self.patches:
+            patch.stop()
+
+
+class TestSearchWrapperBatch(CatalogTestCase):
+    """
+    Test cases for the search_wrapper_batch function, over the test data
+    """
+
+    def test_batch_matches_single_searches(self):
+        """
+        Confirm each batch result matches the single search, in input order.
+        """
+        results = search_wrapper.search_wrapper_batch([
+            ("Plot", "Leaf by Niggle", 0.0, 0, 3),
+            {"search_mode": "Title", "search_value": "Chapterhouse  Dune",
+             "num_books": 4},
+            {"search_mode": "Author2", "search_value": "Frank Herbert",
+             "min_num_ratings": 1},
+            ("Plot", "moonfleet", 0.0, 1, 2)])
+
+        for result, query, min_num_ratings, num_books in [
+                (results[0], "Leaf by Niggle", 0, 3),
+                (results[3], "moonfleet", 1, 2)]:
+            expected = search.plot_semantic_search(
+                self.df, query, num_books=num_books, embeddings=self.matrix,
+                min_num_ratings=min_num_ratings)
+            pd.testing.assert_frame_equal(result, expected)
+        pd.testing.assert_frame_equal(results[1], search.semantic_search(
+            self.df, "Chapterhouse Dune", ["book_title"], num_books=4,
+            lookup=self.lookup))
+        self.assertEqual(results[0]["book_title"].iloc[0], "Leaf by Niggle")
+        self.assertEqual(results[1]["book_title"].iloc[0], "Chapterhouse Dune")
+        self.assertEqual(results[2]["book_title"].tolist(),
+                         ["Chapterhouse Dune", "God Emperor of Dune"])
+
+    def test_batch_embeds_once(self):
+        """
+        Confirm all Plot queries of a batch are embedded with one call.
+        """
+        search_wrapper.search_wrapper_batch([
+            ("Plot", "Leaf by Niggle"), ("Plot", "On War"),
+            ("Plot", "leaf  by niggle")])
+        self.client.embed.assert_called_once()
+        self.assertEqual(self.client.embed.call_args[0][0],
+                         ["Leaf by Niggle", "On War"])
+
+    def test_batch_returns_errors(self):
+        """
+        Confirm failing requests come back as ValueErrors among the results.
+        """
+        results = search_wrapper.search_wrapper_batch([
+            ("Title", "qwxz vbnm"), ("Title", "Leviticus", 0.0, 0, 2),
+            ("Author1", "Zzyzx Qwerty")])
+        self.assertIsInstance(results[0], ValueError)
+        self.assertIn("Sorry, we can't find that book_title", str(results[0]))
+        self.assertEqual(results[1]["book_title"].iloc[0], "Leviticus")
+        self.assertIsInstance(results[2], ValueError)
+        self.assertIn("That author does not appear", str(results[2]))
+
+    def test_batch_embed_errors(self):
+        """
+        Confirm a failed embedding chunk fails only its own Plot requests.
+        """
+        embed = self.client.embed.side_effect
+
+        def fail_on_war(texts, **kwargs):
+            if "On War" in texts:
+                raise RuntimeError("API down")
+            return embed(texts, **kwargs)
+
+        self.client.embed.side_effect = fail_on_war
+        chunked = embedding_cache.EmbeddingCache(self.client, batch_size=2)
+        with mock.patch.object(search, "query_embeddings", chunked):
+            results = search_wrapper.search_wrapper_batch([
+                ("Plot", "Leaf by Niggle"), ("Plot", "On War"),
+                ("Plot", "Moonfleet", 0.0, 0, 2)])
+        self.assertEqual([call[0][0] for call in
+                          self.client.embed.call_args_list],
+                         [["Leaf by Niggle", "On War"], ["Moonfleet"]])
+        for error in results[:2]:
+            self.assertIsInstance(error, ValueError)
+            self.assertIn("API down", str(error))
+        self.assertEqual(results[2]["book_title"].iloc[0], "Moonfleet")
+
+    def test_keyword_index_fallback(self):
+        """
+        Confirm a keyword index that was not built is fitted once instead.
+        """
+        with mock.patch.object(search_wrapper.keyword_index.KeywordIndex,
+                               "load", side_effect=FileNotFoundError):
+            index = search_wrapper.load_keyword_index(["book_title"])
+        self.assertEqual(len(index), self.df.shape[0])
+        self.assertEqual(np.argmax(index.scores("leviticus")), 6)
+
+class TestWarmUp(CatalogTestCase):
+    """
+    Test cases for the warm_up function
+    """
+
+    def test_warm_up(self):
+        """
+        Confirm warm_up loads what each search mode needs, and only that.
+        """
+        loaded = search_wrapper.CATALOG
+        test_catalog = catalog.Catalog(loaded.ratings, loaded.embeddings,
+                                       loaded.genre, lambda: self.matrix)
+        with mock.patch.object(search_wrapper, "CATALOG", test_catalog), \
+                mock.patch.object(search, "get_indices") as mock_indices:
+            search_wrapper.warm_up(["Author2"])
+            self.assertTrue(test_catalog.is_loaded("ratings"))
+            self.assertFalse(test_catalog.is_loaded("embeddings"))
+            mock_indices.assert_not_called()
+            search_wrapper.warm_up(["Title"])
+            self.assertTrue(test_catalog.is_loaded("embeddings"))
+            mock_indices.assert_called_once_with(test_catalog.version)
+        self.client.embed.assert_not_called()
+
+
+class TestComplete(CatalogTestCase):
+    """
+    Test cases for the complete function
+    """
+
+    def test_complete(self):
+        """
+        Confirm titles and authors are completed from the catalog.
+        """
+        self.assertEqual(search_wrapper.complete("Title", "god emp"),
+                         ["God Emperor of Dune"])
+        self.assertEqual(search_wrapper.complete("Author2", "frank h")[0],
+                         "Frank Herbert")
+        self.assertEqual(search_wrapper.complete("Plot", "frank h"), [])
+
+
+class TestSearchWrapperRecords(CatalogTestCase):
+    """
+    Test cases for the records search_wrapper returns, over the test data
+    """
+    def setUp(self):
+        """
+        Swaps in the test catalog and empties the result cache.
+        """
+        super().setUp()
+        search_wrapper.RESULTS.clear()
+
+    def tearDown(self):
+        """
+        Restores the process-wide catalog and drops the results cached
+        over the test catalog.
+        """
+        super().tearDown()
+        search_wrapper.RESULTS.clear()
+
+    def test_wrapper_returns_records(self):
+        """
+        Confirm search_wrapper returns records standing for the search results.
+        """
+        records = search_wrapper.search_wrapper("Title", "Chapterhouse Dune",
+                                                0.0, 0, 3)
+        self.assertIsInstance(records, result_records.ResultRecords)
+        expected = search.semantic_search(self.df, "Chapterhouse Dune",
+                                          ["book_title"], num_books=20,
+                                          lookup=self.lookup).head(3)
+        pd.testing.assert_frame_equal(records.to_frame(), expected)
+        pd.testing.assert_frame_equal(
+            records.project(),
+            expected[result_records.DISPLAY_COLUMNS])
+        # records keep the rows found, not the whole catalog, and so do
+        # the candidates cached for them
+        self.assertEqual(records.frames[0].shape, (3, self.df.shape[1]))
+        cached = search_wrapper.RESULTS.get(
+            ("Title", "Chapterhouse Dune", 3), search_wrapper.CATALOG.version)
+        self.assertLessEqual(cached.frames[0].shape[0], len(cached))
+
+        frame = search_wrapper.search_wrapper("Author1", "Frank Herbert",
+                                              0.0, 0, 4, as_frame=True)
+        authored = search.author2_search(
+            search_wrapper.CATALOG.ratings(), "Frank Herbert", num_books=20)
+        similar = search.semantic_search(self.df, "Frank Herbert", ["author"],
+                                         num_books=20, lookup=self.lookup)
+        expected = search_wrapper.interleave_results(authored, similar)
+        self.assertEqual(frame["book_id"].tolist(),
+                         expected["book_id"].head(4).tolist())
+        self.assertEqual(frame["ratio"].tolist()[:1],
+                         expected["ratio"].tolist()[:1])
+
+
+class TestNeighbors(unittest.TestCase):
+    """Test cases for the process-wide neighbor lookup"""
+
+    def test_neighbors_follow_catalog(self):
+        """
+        Confirm CATALOG.clear() drops the lookup and reloads the graph.
+        """
+        test_catalog = catalog.Catalog(lambda: None, lambda: None,
+                                       lambda: None)
+        graphs = [np.zeros((3, 2)), np.ones((4, 2))]
+        with mock.patch.object(search_wrapper, "CATALOG", test_catalog), \
+                mock.patch.object(search, "get_indices",
+                                  side_effect=graphs) as mock_indices:
+            lookup = search_wrapper.get_neighbors()
+            self.assertIs(search_wrapper.get_neighbors(), lookup)
+            self.assertIs(lookup.indices, graphs[0])
+            test_catalog.clear()
+            fresh = search_wrapper.get_neighbors()
+            self.assertIsNot(fresh, lookup)
+            self.assertIs(fresh.indices, graphs[1])
+        self.assertEqual(mock_indices.call_args_list,
+                         [mock.call(0), mock.call(1)])
+
+    def test_indices_reload(self):
+        """
+        Confirm search.get_indices reads the graph again for a new version.
+        """
+        graphs = [np.zeros((3, 2)), np.ones((4, 2))]
+        with mock.patch.object(search, "indices", None), \
+                mock.patch.object(search, "indices_version", None), \
+                mock.patch("numpy.load", side_effect=graphs) as mock_load:
+            self.assertIs(search.get_indices(0), graphs[0])
+            self.assertIs(search.get_indices(0), graphs[0])
+            self.assertIs(search.get_indices(), graphs[0])
+            self.assertIs(search.get_indices(1), graphs[1])
+        self.assertEqual(mock_load.call_count, 2)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,136 @@
+"""
+Module: test_spelling
+
+This module contains unit tests for the spelling module.
+
+Test Functions in TestEditDistance Class
+========================================
+test_edit_distance(self):
+    Confirm each kind of edit counts as one.
+
+test_max_distance(self):
+    Confirm distances over max_distance are cut off.
+
+test_deletes(self):
+    Confirm every deletion of up to max_distance characters is made.
+
+Test Functions in TestSpellingIndex Class
+=========================================
+test_correct(self):
+    Confirm words are corrected to the closest indexed word.
+
+test_suggest(self):
+    Confirm misspelled queries suggest the values they meant.
+
+test_ranked_suggestions(self):
+    Confirm suggestions with fewest other words come first, then most rated.
+
+test_missing_values(self):
+    Confirm missing values are skipped.
+
+Dependencies:
+- unittest: The built-in unit testing framework in Python.
+- pandas: A library for data manipulation and analysis.
+
+Usage:
+Run this module to execute the unit tests for the spelling module.
+
+"""
+import unittest
+import pandas as pd
+try:
+    import spelling
+except ImportError:
+    from bookworm import spelling
+
+
+class TestEditDistance(unittest.TestCase):
+    """
+    Test cases for the edit distance helpers
+    """
+
+    def test_edit_distance(self):
+        """
+        Confirm each kind of edit counts as one.
+        """
+        self.assertEqual(spelling.edit_distance("dune", "dune", 2), 0)
+        self.assertEqual(spelling.edit_distance("dune", "dunes", 2), 1)
+        self.assertEqual(spelling.edit_distance("dune", "dne", 2), 1)
+        self.assertEqual(spelling.edit_distance("dune", "dane", 2), 1)
+        self.assertEqual(spelling.edit_distance("dune", "dnue", 2), 1)
+        self.assertEqual(spelling.edit_distance("messiah", "mesiahh", 2), 2)
+
+    def test_max_distance(self):
+        """
+        Confirm distances over max_distance are cut off.
+        """
+        self.assertEqual(spelling.edit_distance("dune", "emma", 2), 3)
+        self.assertEqual(spelling.edit_distance("dune", "dunesss", 2), 3)
+        self.assertEqual(spelling.edit_distance("", "ab", 2), 2)
+
+    def test_deletes(self):
+        """
+        Confirm every deletion of up to max_distance characters is made.
+        """
+        self.assertEqual(spelling.deletes("abc", 1),
+                         {"abc", "bc", "ac", "ab"})
+        self.assertEqual(spelling.deletes("abc", 2),
+                         {"abc", "bc", "ac", "ab", "a", "b", "c"})
+
+
+class TestSpellingIndex(unittest.TestCase):
+    """
+    Test cases for the spelling index
+    """
+
+    def setUp(self):
+        """
+        Builds an index over a few titles.
+        """
+        self.titles = pd.Series(["Dune", "Dune Messiah", "Children of Dune",
+                                 "Emma", "Persuasion", "The Children"])
+        self.counts = pd.Series([50, 20, 30, 40, 10, 5])
+        self.index = spelling.SpellingIndex(self.titles, self.counts)
+
+    def test_correct(self):
+        """
+        Confirm words are corrected to the closest indexed word.
+        """
+        self.assertEqual(self.index.correct("dune"), "dune")
+        self.assertEqual(self.index.correct("dnue"), "dune")
+        self.assertEqual(self.index.correct("persuasoin"), "persuasion")
+        self.assertEqual(self.index.correct("mesiah"), "messiah")
+        # too short to correct, and too far off
+        self.assertIsNone(self.index.correct("em"))
+        self.assertIsNone(self.index.correct("ulysses"))
+
+    def test_suggest(self):
+        """
+        Confirm misspelled queries suggest the values they meant.
+        """
+        self.assertEqual(self.index.suggest("Dnue Mesiah"), ["Dune Messiah"])
+        self.assertEqual(self.index.suggest("  PERSUASOIN! "), ["Persuasion"])
+        self.assertEqual(self.index.suggest("Ulysses"), [])
+
+    def test_ranked_suggestions(self):
+        """
+        Confirm suggestions with fewest other words come first, then most rated.
+        """
+        self.assertEqual(self.index.suggest("Dnue", 3),
+                         ["Dune", "Dune Messiah", "Children of Dune"])
+        # fewer other words outrank more ratings
+        self.assertEqual(self.index.suggest("Chilren", 2),
+                         ["The Children", "Children of Dune"])
+
+    def test_missing_values(self):
+        """
+        Confirm missing values are skipped.
+        """
+        df = pd.read_csv("data/test_data/test_data.csv")
+        index = spelling.SpellingIndex(df["author"], df["RatingCount"])
+        self.assertEqual(len(index), df["author"].dropna().nunique())
+        self.assertEqual(index.suggest("Frank Hebrert"), ["Frank Herbert"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+# Needed to do this for the use of a general exception to deal with broad API errors.
+# pylint: disable=W0718,E0401
+"""
+Script to add a small batch of new books without rebuilding everything.
+
+Embeds only the new books' summaries with the voyageai API, as
+Embeddings.py does: summaries over 4000 tokens are skipped, and the texts
+of a failed batch are retried one at a time. If any text still cannot be
+embedded, the script stops before writing anything. It then adds the
+books to every dataset the search modes use with ingest.add_books: the
+ratings and genre data, the binary catalog store, the semantic neighbors
+graph (extended with knn_graph.update_knn_graph: the new books get their
+own neighbor lists, and existing books' lists are patched only where a new
+book is closer) and the keyword indexes, which are refitted.
+
+Usage (after build_catalog.py and with API_KEY set):
+    python add_books.py new_books.csv
+
+new_books.csv must have the same columns as complete_w_ratings.csv and
+book ids not already in it.
+"""
+
+import os
+import sys
+import pandas as pd
+from dotenv import load_dotenv
+from voyageai import Client as VoyageClient
+from bookworm import ingest
+
+BATCH_SIZE = 24
+MAX_TOKENS = 4000
+
+
+def embed(texts, client):
+    """
+    Embeds texts with the voyageai API, as Embeddings.py does.
+
+    Parameters:
+    - texts: A list of text summaries.
+    - client: The voyageai client instance.
+
+    Returns:
+    - A list of embeddings, one per text.
+    """
+    return client.embed(texts, model="voyage-lite-02-instruct",
+                        input_type="document").embeddings
+
+
+def generate_embeddings(texts, client, batch_size=BATCH_SIZE):
+    """
+    Generates embeddings for a list of texts in batches, retrying the texts
+    of a failed batch one at a time.
+
+    Parameters:
+    - texts: A list of text summaries.
+    - client: The voyageai client instance.
+    - batch_size: The size of each batch for processing.
+
+    Returns:
+    - A list of embeddings, None for texts that could not be embedded.
+    """
+    all_embeddings = []
+    for i in range(0, len(texts), batch_size):
+        batch_texts = texts[i:i + batch_size]
+        try:
+            all_embeddings.extend(embed(batch_texts, client))
+        except Exception:  # Use of a general exception to deal with broad API Errors.
+            for text in batch_texts:
+                try:
+                    all_embeddings.extend(embed([text], client))
+                except Exception:  # Use of a general exception to deal with broad API Errors
+                    all_embeddings.append(None)
+    return all_embeddings
+
+
+load_dotenv()
+voyage_client = VoyageClient(api_key=os.environ["API_KEY"])
+
+new_books = pd.read_csv(sys.argv[1])
+new_books["summary"] = new_books["summary"].fillna("No Summary Available")
+
+# Same length filter as Embeddings.py: longer summaries are not embedded
+token_counts = new_books["summary"].apply(
+    lambda summary: voyage_client.count_tokens([summary]))
+too_long = new_books["book_id"][token_counts > MAX_TOKENS].tolist()
+if too_long:
+    print(f"Skipping books with summaries over {MAX_TOKENS} tokens: "
+          f"{too_long}")
+new_books = new_books[token_counts <= MAX_TOKENS].copy()
+
+embeddings = generate_embeddings(new_books["summary"].tolist(), voyage_client)
+missing = [book_id for book_id, embedding
+           in zip(new_books["book_id"], embeddings) if embedding is None]
+if missing:
+    sys.exit(f"Could not embed books {missing}; nothing was added.")
+new_books["embeddings"] = embeddings
+
+num_books = ingest.add_books(new_books)
+
+print(f"Added {new_books.shape[0]} books; catalog now has {num_books}.")
@@ -0,0 +1,23 @@
+"""
+Script to build the binary catalog store from the complete_w_embeddings
+csv parts.
+
+Writes bookworm/data/catalog/books.parquet and
+bookworm/data/catalog/embeddings.npy, which search_wrapper loads in place
+of reassembling the csv parts on every search.
+
+Script should be run from /scripts folder.
+"""
+
+import pandas as pd
+from bookworm import catalog
+
+PATH_ROOT = "../bookworm/data/complete_w_embeddings/complete_w_embeddings.csv"
+parts = [pd.read_csv(f"{PATH_ROOT}_part_{i}.csv") for i in range(1, 5)]
+for part in parts[1:]:
+    part.columns = parts[0].columns
+df = pd.concat(parts, ignore_index=True)
+
+matrix = catalog.build_catalog_store(df)
+print(f"Catalog store written to {catalog.STORE_DIR}")
+print(f"Books: {df.shape[0]}, embeddings shape: {matrix.shape}")
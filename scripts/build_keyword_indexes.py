@@ -0,0 +1,18 @@
+"""
+Script to build the pre-fitted keyword (TF-IDF) indexes used by Title and
+Author1 search.
+
+Fits one index per column set searched by select_search (["book_title"]
+and ["author"]) over the same combined text query_to_index builds, and
+writes them to bookworm/data/keyword_index.
+
+Script should be run from the repository root, after build_catalog.py.
+"""
+
+from bookworm import search_wrapper, ingest
+
+indexes = ingest.build_keyword_indexes(search_wrapper.load_embeddings_data())
+
+for name, index in indexes.items():
+    print(f"Keyword index {name}: {index.doc_matrix.shape[0]} books, "
+          f"{index.doc_matrix.shape[1]} terms")
@@ -0,0 +1,20 @@
+"""
+Script to rebuild the semantic nearest-neighbors graph from the catalog.
+
+Replaces the all-at-once NearestNeighbors fit in semantic_scores.py with
+the blocked, multi-process builder in bookworm/knn_graph.py. Writes
+bookworm/data/distances_updated.npy and bookworm/data/indices_updated.npy
+in the same format.
+
+Script should be run after build_catalog.py.
+"""
+
+from bookworm import catalog, knn_graph
+
+embeddings = catalog.parse_embeddings(
+    catalog.load_catalog_store()["embeddings"])
+print(f"Shape of the embeddings array: {embeddings.shape}")
+
+distances, indices = knn_graph.build_knn_graph(embeddings)
+knn_graph.save_knn_graph(distances, indices)
+print(f"Shape of the saved distances array: {distances.shape}")